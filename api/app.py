@@ -1,13 +1,10 @@
-from flask import Flask, request, jsonify, send_from_directory, Response
+from flask import Flask, request, send_from_directory, Response
 from flask_cors import CORS
-from portuguese_converter import convert_text
-from tts_converter import TTSConverter
-from twilio_handler import TwilioHandler
-from llm_processor import LLMProcessor
+from portuguese_converter import convert_text, convert_texts, cache_stats
+from integrations import services
+import endpoints
 import logging
-import os
 from dotenv import load_dotenv
-from user_state_db import get_user_state, save_user_state
 load_dotenv()
 
 # Configure logging
@@ -17,148 +14,152 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 CORS(app)
 
-# Try to initialize Twilio, but continue even if it fails
-try:
-    twilio = TwilioHandler()
-    twilio_enabled = True
-    logger.info("Twilio successfully initialized")
-except ValueError as e:
-    logger.warning(f"Twilio initialization failed: {e}")
-    twilio = None
-    twilio_enabled = False
 
-# Initialize LLM processor
-llm_processor = LLMProcessor()
+@app.errorhandler(Exception)
+def handle_error(e):
+    return endpoints.error_response(e, request.endpoint)
+
+
+def audio_response(audio, key, cache_status=None):
+    """Serve cached or fresh audio with an ETag, answering conditional and Range requests."""
+    response = endpoints.cacheable_audio(Response(audio, mimetype='audio/mpeg'), key, cache_status)
+    return response.make_conditional(request, accept_ranges=True, complete_length=len(audio))
+
 
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
 def catch_all(path):
-    # Always serve from the project root (one level up from api/)
-    root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
-    if path and os.path.exists(os.path.join(root, path)):
-        return send_from_directory(root, path)
-    return send_from_directory(root, 'index.html')
+    return send_from_directory(endpoints.STATIC_ROOT, endpoints.static_file(path))
+
 
 @app.route('/api/portuguese_converter', methods=['GET', 'POST'])
 def handle_portuguese_converter():
-    try:
-        data = request.get_json()
-        if not data or 'text' not in data:
-            return jsonify({'error': 'No text provided'}), 400
+    text, explain, align = endpoints.convert_request(request.get_json(silent=True))
+    return convert_text(text, explain=explain, align=align)
+
+
+@app.route('/api/portuguese_converter/batch', methods=['POST'])
+def handle_portuguese_converter_batch():
+    """
+    Convert a list of texts in one request, given as a JSON array or as
+    {"texts": [...]}; results keep the input order (only 'after' unless
+    "explain" is set in the object form)
+    """
+    texts, explain, align = endpoints.batch_request(request.get_json(silent=True))
+    return {'results': convert_texts(texts, explain=explain, align=align)}
+
 
-        text = data['text']
-        result = convert_text(text)
-        return jsonify(result)
-    except Exception as e:
-        logger.error(f"Error: {str(e)}")
+@app.route('/api/portuguese_converter/rules', methods=['GET'])
+def handle_portuguese_converter_rules():
+    """Descriptions of the rule IDs returned with explain='ids'"""
+    return endpoints.RULES_BODY
+
+
+@app.route('/api/portuguese_converter/stats', methods=['GET'])
+def portuguese_converter_cache_stats():
+    """Sentence and word cache statistics of this worker"""
+    return cache_stats()
+
+
+def synthesize_response(text, variant, stream=False):
+    """
+    Answer a TTS request from the audio cache, or synthesize it. In stream
+    mode the upstream chunks are forwarded as a chunked response as they
+    arrive and teed into the cache.
+    """
+    from tts_converter import TTSConverter
+    key = TTSConverter.cache_key(text, variant)
+    cache = services.get('tts_cache')
+    audio_content = cache.get(key)
+    if audio_content:
+        return audio_response(audio_content, key, 'hit')
+
+    tts = services.get('tts')
+    if stream:
+        chunks = tts.stream_speech(text, variant)
+        if chunks is None:
+            return {'error': 'Failed to generate audio'}, 500
+        return endpoints.tag_audio(Response(cache.tee(key, chunks), mimetype='audio/mpeg'), key, 'miss')
+
+    audio_content = tts.synthesize_speech(text, variant)
+    if not audio_content:
+        return {'error': 'Failed to generate audio'}, 500
+    cache.put(key, audio_content)
+    return audio_response(audio_content, key, 'miss')
 
 
 @app.route('/api/tts', methods=['POST'])
 def text_to_speech():
-    try:
-        data = request.get_json()
-        text = data.get('text', '')
-        variant = data.get('variant', 'br')
-        if not text:
-            return jsonify({'error': 'No text provided'}), 400
-
-        tts = TTSConverter()
-        audio_content = tts.synthesize_speech(text, variant)
-
-        if audio_content:
-            return Response(audio_content, mimetype='audio/mpeg')
-        else:
-            return jsonify({'error': 'Failed to generate audio'}), 500
+    data = request.get_json(silent=True)
+    text, variant = endpoints.tts_request(data)
+    return synthesize_response(text, variant, stream=bool(data.get('stream', False)))
+
+
+@app.route('/api/tts/stream', methods=['GET'])
+def text_to_speech_stream():
+    """Streaming TTS for use as an <audio> src: /api/tts/stream?text=...&variant=br"""
+    text, variant = endpoints.tts_request(request.args.to_dict())
+    return synthesize_response(text, variant, stream=True)
+
+
+@app.route('/api/tts/audio/<key>', methods=['GET'])
+def cached_audio(key):
+    """Replay a previously synthesized clip by the key returned in X-TTS-Key"""
+    endpoints.check_audio_key(key)
+    audio_content = services.get('tts_cache').get(key)
+    if not audio_content:
+        return {'error': 'Audio not found'}, 404
+    return audio_response(audio_content, key, 'hit')
+
+
+@app.route('/api/tts/stats', methods=['GET'])
+def tts_cache_stats():
+    return services.get('tts_cache').stats()
+
+
+@app.route('/api/llm/stats', methods=['GET'])
+def llm_cache_stats():
+    return services.get('llm_processor').cache.stats()
 
-    except Exception as e:
-        logger.error(f"Error: {str(e)}")
-        return jsonify({'error': str(e)}), 500
 
 @app.route('/api/correct_text', methods=['POST'])
 def correct_text():
     """Endpoint for correcting typos, syntax, and grammar with LLM"""
-    try:
-        data = request.get_json()
-        if not data or 'text' not in data:
-            return jsonify({'error': 'No text provided'}), 400
-
-        text = data['text']
-        corrected_text, message = llm_processor.correct_text(text)
-
-        return jsonify({
-            'original': text,
-            'corrected': corrected_text,
-            'message': message
-        })
-    except Exception as e:
-        logger.error(f"Error in text correction: {str(e)}")
-        return jsonify({'error': str(e)}), 500
+    llm_processor = services.get('llm_processor')
+    text = endpoints.require_fields(request.get_json(silent=True), 'text')['text']
+    return endpoints.correction_body(text, *llm_processor.correct_text(text))
+
 
 @app.route('/api/transform_colloquial', methods=['POST'])
 def transform_colloquial():
     """Endpoint for transforming text to colloquial Portuguese using LLM"""
-    try:
-        data = request.get_json()
-        if not data or 'text' not in data:
-            return jsonify({'error': 'No text provided'}), 400
-
-        text = data['text']
-        colloquial_text, message = llm_processor.transform_to_colloquial(text)
-
-        return jsonify({
-            'original': text,
-            'colloquial': colloquial_text,
-            'message': message
-        })
-    except Exception as e:
-        logger.error(f"Error in colloquial transformation: {str(e)}")
-        return jsonify({'error': str(e)}), 500
+    llm_processor = services.get('llm_processor')
+    text = endpoints.require_fields(request.get_json(silent=True), 'text')['text']
+    return endpoints.colloquial_body(text, *llm_processor.transform_to_colloquial(text))
+
 
 @app.route('/api/process_text', methods=['POST'])
 def process_text():
     """Combined endpoint for correction and conversion"""
-    try:
-        data = request.get_json()
-        if not data or 'text' not in data:
-            return jsonify({'error': 'No text provided'}), 400
-
-        text = data['text']
-        apply_correction = data.get('correct', False)
-        apply_conversion = data.get('convert', False)
-        use_llm_conversion = data.get('use_llm', False)
-
-        result = {'original': text}
-
-        # Step 1: Correct text if requested
-        if apply_correction:
-            corrected_text, correction_message = llm_processor.correct_text(text)
-            result['corrected'] = corrected_text
-            result['correction_message'] = correction_message
-            # Use corrected text for next step if available
-            text_for_conversion = corrected_text
+    llm_processor = services.get('llm_processor')
+    text, apply_correction, apply_conversion, use_llm_conversion = endpoints.process_request(
+        request.get_json(silent=True))
+    result = {'original': text}
+
+    # Step 1: Correct text if requested, and convert the corrected text
+    if apply_correction:
+        text, correction_message = llm_processor.correct_text(text)
+        result['corrected'] = text
+        result['correction_message'] = correction_message
+
+    # Step 2: Convert to colloquial Portuguese if requested
+    if apply_conversion:
+        if use_llm_conversion:
+            result['conversion'] = endpoints.llm_conversion(*llm_processor.transform_to_colloquial(text))
         else:
-            text_for_conversion = text
-
-        # Step 2: Convert to colloquial Portuguese if requested
-        if apply_conversion:
-            if use_llm_conversion:
-                # Use LLM-based transformation
-                colloquial_text, conversion_message = llm_processor.transform_to_colloquial(text_for_conversion)
-                result['conversion'] = {
-                    'text': colloquial_text,
-                    'llm_based': True,
-                    'message': conversion_message
-                }
-            else:
-                # Use rule-based transformation
-                conversion_result = convert_text(text_for_conversion)
-                result['conversion'] = conversion_result
-                result['conversion']['llm_based'] = False
-
-        return jsonify(result)
-    except Exception as e:
-        logger.error(f"Error in process_text: {str(e)}")
-        return jsonify({'error': str(e)}), 500
+            result['conversion'] = endpoints.rule_conversion(convert_text(text))
+    return result
+
 
 @app.route('/api/chat', methods=['POST'])
 def chat():
@@ -166,132 +167,50 @@ def chat():
     Unified endpoint for all chat interactions.
     The LLM will interact with the user and handle transformation requests when needed.
     """
-    try:
-        data = request.get_json()
-        if not data or 'text' not in data:
-            return jsonify({'error': 'No text provided'}), 400
-
-        user_text = data['text']
-
-        # Check if this is a request to transform text
-        transform_keywords = ['transform', 'convert', 'colloquial', 'informal', 'brazilian portuguese']
-        is_transform_request = any(keyword in user_text.lower() for keyword in transform_keywords)
-
-        if is_transform_request:
-            # Extract the text to be transformed
-            # First, try to identify if there's a specific text to transform
-            response = llm_processor.client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": "You are an assistant that identifies text to be transformed. If the user wants to transform text to colloquial Brazilian Portuguese, extract the exact text they want to transform. If no specific text is identified, respond with 'NO_TEXT'."},
-                    {"role": "user", "content": user_text}
-                ],
-                temperature=0.1
-            )
-
-            extracted_text = response.choices[0].message.content
-
-            if extracted_text != "NO_TEXT":
-                # If specific text was identified, transform it
-                llm_transformed, _ = llm_processor.transform_to_colloquial(extracted_text)
-
-                # Also apply rule-based transformation for comparison
-                rule_based = convert_text(extracted_text)
-
-                # Get the LLM to create a response about the transformation
-                explanation_response = llm_processor.client.chat.completions.create(
-                    model="gpt-4o",
-                    messages=[
-                        {"role": "system", "content": "You are a helpful assistant explaining Portuguese text transformation. Respond in a friendly, conversational way. Mention that you're showing both LLM and rule-based transformations."},
-                        {"role": "user", "content": f"The user wants to transform this text: '{extracted_text}'"}
-                    ],
-                    temperature=0.7
-                )
-
-                return jsonify({
-                    'response': explanation_response.choices[0].message.content,
-                    'transformation': {
-                        'original': extracted_text,
-                        'llm': llm_transformed,
-                        'rule_based': rule_based['after']
-                    }
-                })
-            else:
-                # If no specific text identified, ask for it (in English)
-                return jsonify({
-                    'response': "I'd be happy to transform Portuguese text to colloquial Brazilian Portuguese! Please provide the text you'd like me to transform."
-                })
-        else:
-            # Regular chat interaction - detect Portuguese and show transformation if applicable
-            response, is_portuguese, colloquial_version, glossary = llm_processor.ask_question(user_text)
-
-            result = {
-                'response': response,
-                'glossary': glossary
-            }
-
-            # Include transformation if Portuguese was detected and this isn't a command/question
-            if is_portuguese and len(user_text.split()) > 3 and not user_text.endswith('?'):
-                result['transformation'] = {
-                    'llm': colloquial_version,
-                    'rule_based': convert_text(user_text)['after']
-                }
-
-            return jsonify(result)
-
-    except Exception as e:
-        logger.error(f"Error in chat endpoint: {str(e)}")
-        return jsonify({'error': str(e)}), 500
+    llm_processor = services.get('llm_processor')
+    user_text, user_id = endpoints.chat_request(request.get_json(silent=True))
+
+    if not endpoints.is_transform_request(user_text):
+        # Regular chat interaction - detect Portuguese and show transformation if applicable
+        response, is_portuguese, colloquial_version, glossary = endpoints.ask_tutor(
+            llm_processor, user_id, user_text)
+        if not endpoints.shows_transformation(user_text, is_portuguese):
+            return endpoints.chat_body(response, glossary)
+        return endpoints.chat_body(response, glossary, colloquial_version,
+                                   convert_text(user_text, explain=False)['after'])
+
+    # Find the text to transform, if the user gave one
+    response = llm_processor.client.chat.completions.create(
+        model="gpt-4o", messages=endpoints.extract_text_messages(user_text), temperature=0.1)
+    extracted_text = response.choices[0].message.content
+    if extracted_text == endpoints.NO_TEXT:
+        return endpoints.ASK_FOR_TEXT_BODY
+
+    # Transform it with the LLM and the rules, and have the LLM present both
+    llm_transformed, _ = llm_processor.transform_to_colloquial(extracted_text)
+    rule_based = convert_text(extracted_text, explain=False)
+    explanation_response = llm_processor.client.chat.completions.create(
+        model="gpt-4o", messages=endpoints.explain_transform_messages(extracted_text), temperature=0.7)
+    return endpoints.transformation_body(explanation_response.choices[0].message.content,
+                                         extracted_text, llm_transformed, rule_based['after'])
 
 
 @app.route('/api/ask_llm', methods=['POST'])
 def ask_llm():
     """Interactive endpoint for LLM chat with Portuguese detection"""
-    try:
-        data = request.get_json()
-        if not data or 'text' not in data or 'username' not in data:
-            return jsonify({'error': 'No text or username provided'}), 400
-
-        user_text = data['text']
-        user_id = data['username']
-
-        # Load state from DB
-        state = get_user_state(user_id)
-        # The restored ask_question returns only 4 values
-        response, is_portuguese, colloquial_version, new_state = llm_processor.ask_question(
-            user_text
-        )
-        # Save updated state
-        save_user_state(user_id, new_state)
-
-        result = {
-            'response': response,
-            'is_portuguese': is_portuguese
-        }
-
-        # Include colloquial version if Portuguese was detected
-        if is_portuguese and colloquial_version:
-            result['colloquial'] = colloquial_version
-            rule_based = convert_text(user_text)
-            result['rule_based'] = rule_based['after']
-
-        return jsonify(result)
-    except Exception as e:
-        logger.error(f"Error in ask_llm: {str(e)}")
-        return jsonify({'error': str(e)}), 500
+    llm_processor = services.get('llm_processor')
+    user_text, user_id = endpoints.ask_llm_request(request.get_json(silent=True))
+    response, is_portuguese, colloquial_version, _ = endpoints.ask_tutor(llm_processor, user_id, user_text)
+    if not (is_portuguese and colloquial_version):
+        return endpoints.ask_llm_body(response, is_portuguese)
+    return endpoints.ask_llm_body(response, is_portuguese, colloquial_version,
+                                  convert_text(user_text, explain=False)['after'])
+
 
 @app.route('/webhook/twilio', methods=['POST'])
 def twilio_webhook():
-    try:
-        if not twilio_enabled:
-            logger.warning("Twilio webhook called but Twilio is not configured")
-            return jsonify({'error': 'Twilio is not configured'}), 503
-
-        twilio.handle_message(request.form)
-        return '', 200
-    except Exception as e:
-        logger.error(f"Error in Twilio webhook: {str(e)}")
-        return '', 500
+    # Answer right away; a worker converts and replies
+    return endpoints.enqueue_twilio_message(request.form.to_dict())
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=3001, debug=True)
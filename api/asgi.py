@@ -0,0 +1,363 @@
+"""
+ASGI serving mode: the routes of app.py on Quart, so slow upstream calls do
+not hold a thread each.
+
+  - ElevenLabs and the OpenAI rewrites (correct_text, transform_to_colloquial)
+    use async clients. The ElevenLabs client has its own connection limit,
+    TTS_ASYNC_POOL_SIZE, since waiting requests hold no thread here.
+  - The Twilio webhook only enqueues the message (message_queue.py); the
+    queue's worker threads run its conversion on the converter pool.
+  - The rule-based converter is CPU-bound and runs on a process pool
+    (ASGI_CONVERT_PROCESSES, 0 for a thread pool instead), so a burst of
+    conversions never blocks the event loop.
+  - The tutor flow (ask_question and the user state store) is synchronous
+    and runs on a bounded thread pool (ASGI_BLOCKING_THREADS), apart from the
+    converter.
+  - /ws/portuguese_converter converts while the user types: each connection
+    keeps its document (incremental.py) and only re-converts the sentences
+    an edit touches.
+
+The routes share their validation, prompts and response bodies with app.py
+through endpoints.py; only the framework glue is here.
+
+Run from the api/ directory:
+    uvicorn asgi:app --host 0.0.0.0 --port 3001
+or, for development:
+    python asgi.py
+The Procfile's opt-in `asgi` process and the "Run ASGI" Replit workflow
+start it the same way; `web` still runs the Flask app.
+hypercorn also works, but its workers are daemonic processes that cannot
+start a process pool, so conversions fall back to threads there.
+"""
+
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from quart import Quart, request, websocket, send_from_directory, Response
+from quart_cors import cors
+
+import endpoints
+from incremental import IncrementalConverter
+from portuguese_converter import convert_text, convert_texts, cache_stats, init_worker
+from integrations import services, create_twilio_queue
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Converter worker processes (0 runs conversions on a thread pool instead)
+ASGI_CONVERT_PROCESSES = int(os.getenv('ASGI_CONVERT_PROCESSES', str(os.cpu_count() or 1)))
+# Threads for the remaining blocking work (synchronous LLM calls, disk cache)
+ASGI_BLOCKING_THREADS = int(os.getenv('ASGI_BLOCKING_THREADS', '32'))
+
+app = cors(Quart(__name__))
+
+convert_executor = None
+blocking_executor = None
+
+
+@app.before_serving
+async def start_executors():
+    global convert_executor, blocking_executor
+    blocking_executor = ThreadPoolExecutor(ASGI_BLOCKING_THREADS, thread_name_prefix='blocking')
+    # Daemonic workers (hypercorn's) cannot start child processes
+    if ASGI_CONVERT_PROCESSES > 0 and multiprocessing.current_process().daemon:
+        logger.warning("Running in a daemonic worker, converting on threads instead of processes")
+    elif ASGI_CONVERT_PROCESSES > 0:
+        convert_executor = ProcessPoolExecutor(ASGI_CONVERT_PROCESSES, initializer=init_worker)
+    if convert_executor is None:
+        convert_executor = ThreadPoolExecutor(os.cpu_count() or 1, thread_name_prefix='convert')
+
+
+def convert_on_pool(text):
+    """Convert a WhatsApp message from a queue worker thread, on the converter pool."""
+    return convert_executor.submit(convert_text, text, False).result()['after']
+
+
+services.register('twilio_queue', lambda: create_twilio_queue(convert_on_pool))
+
+
+@app.after_serving
+async def stop_executors():
+    if services.is_initialized('twilio_queue'):
+        await run_blocking(services.get('twilio_queue').stop, 5)
+    if services.is_initialized('async_tts'):
+        await services.get('async_tts').aclose()
+    convert_executor.shutdown(cancel_futures=True)
+    blocking_executor.shutdown(cancel_futures=True)
+
+
+async def run_convert(fn, *args):
+    """Run a converter function on the converter pool."""
+    return await asyncio.get_running_loop().run_in_executor(convert_executor, fn, *args)
+
+
+async def run_blocking(fn, *args):
+    """Run a blocking call on the thread pool reserved for it."""
+    return await asyncio.get_running_loop().run_in_executor(blocking_executor, fn, *args)
+
+
+@app.errorhandler(Exception)
+async def handle_error(e):
+    return endpoints.error_response(e, request.endpoint)
+
+
+async def audio_response(audio, key, cache_status=None):
+    """Serve cached or fresh audio with an ETag, answering conditional and Range requests."""
+    response = endpoints.cacheable_audio(Response(audio, mimetype='audio/mpeg'), key, cache_status)
+    return await response.make_conditional(request, accept_ranges=True, complete_length=len(audio))
+
+
+@app.route('/', defaults={'path': ''})
+@app.route('/<path:path>')
+async def catch_all(path):
+    return await send_from_directory(endpoints.STATIC_ROOT, endpoints.static_file(path))
+
+
+@app.route('/api/portuguese_converter', methods=['GET', 'POST'])
+async def handle_portuguese_converter():
+    text, explain, align = endpoints.convert_request(await request.get_json(silent=True))
+    return await run_convert(convert_text, text, explain, align)
+
+
+@app.route('/api/portuguese_converter/batch', methods=['POST'])
+async def handle_portuguese_converter_batch():
+    """
+    Convert a list of texts in one request, given as a JSON array or as
+    {"texts": [...]}; results keep the input order (only 'after' unless
+    "explain" is set in the object form)
+    """
+    texts, explain, align = endpoints.batch_request(await request.get_json(silent=True))
+    return {'results': await run_convert(convert_texts, texts, explain, align)}
+
+
+@app.route('/api/portuguese_converter/rules', methods=['GET'])
+async def handle_portuguese_converter_rules():
+    """Descriptions of the rule IDs returned with explain='ids'"""
+    return endpoints.RULES_BODY
+
+
+@app.route('/api/portuguese_converter/stats', methods=['GET'])
+async def portuguese_converter_cache_stats():
+    """Sentence and word cache statistics of one converter worker (each keeps its own caches)"""
+    return await run_convert(cache_stats)
+
+
+@app.websocket('/ws/portuguese_converter')
+async def live_portuguese_converter():
+    """
+    Live conversion over a WebSocket. Each connection keeps its document;
+    messages are JSON objects:
+
+      {"type": "reset", "text": ...}
+          -> {"type": "reset", "version": n, "text": <converted document>}
+      {"type": "edit", "start": s, "end": e, "text": ...}
+          -> {"type": "patch", "version": n, "start": s2, "end": e2, "text": ...}
+
+    An edit replaces text[s:e] of the document; the patch replaces
+    converted[s2:e2]. Offsets count Unicode code points. A bad message is
+    answered with {"type": "error", "error": ...} and leaves the document
+    as it was.
+    """
+    document = IncrementalConverter()
+    version = 0
+    while True:
+        frame = await websocket.receive()
+        try:
+            message = json.loads(frame)
+            if not isinstance(message, dict):
+                raise ValueError('Messages must be JSON objects')
+            kind = message.get('type')
+            if kind == 'reset':
+                converted = await run_blocking(document.reset, message_field(message, 'text', str, ''))
+                version += 1
+                await websocket.send_json({'type': 'reset', 'version': version, 'text': converted})
+            elif kind == 'edit':
+                out_start, out_end, converted = await run_blocking(
+                    document.edit, message_field(message, 'start', int), message_field(message, 'end', int),
+                    message_field(message, 'text', str, ''))
+                version += 1
+                await websocket.send_json({'type': 'patch', 'version': version,
+                                           'start': out_start, 'end': out_end, 'text': converted})
+            else:
+                await websocket.send_json({'type': 'error', 'error': f'Unknown message type: {kind}'})
+        except (TypeError, ValueError) as e:
+            # json.JSONDecodeError is a ValueError
+            await websocket.send_json({'type': 'error', 'error': str(e)})
+        except Exception as e:
+            # No single message may end the session
+            logger.exception("Error in live conversion")
+            await websocket.send_json({'type': 'error', 'error': str(e)})
+
+
+def message_field(message, key, kind, default=None):
+    """
+    message[key], which must be of type `kind` (bool is not an int, and
+    JSON numbers such as 1.0 or 1e400 are floats); a missing key gives
+    `default`, or a ValueError if there is none.
+    """
+    if key not in message:
+        if default is None:
+            raise ValueError(f"Missing '{key}'")
+        return default
+    value = message[key]
+    if not isinstance(value, kind) or isinstance(value, bool):
+        raise TypeError(f"'{key}' must be {'an integer' if kind is int else 'a string'}")
+    return value
+
+
+async def synthesize_response(text, variant, stream=False):
+    """Async counterpart of app.synthesize_response."""
+    from tts_converter import TTSConverter
+    key = TTSConverter.cache_key(text, variant)
+    cache = services.get('tts_cache')
+    audio_content = await run_blocking(cache.get, key)
+    if audio_content:
+        return await audio_response(audio_content, key, 'hit')
+
+    tts = services.get('async_tts')
+    if stream:
+        chunks = await tts.stream_speech(text, variant)
+        if chunks is None:
+            return {'error': 'Failed to generate audio'}, 500
+        return endpoints.tag_audio(Response(cache.atee(key, chunks), mimetype='audio/mpeg'), key, 'miss')
+
+    audio_content = await tts.synthesize_speech(text, variant)
+    if not audio_content:
+        return {'error': 'Failed to generate audio'}, 500
+    await run_blocking(cache.put, key, audio_content)
+    return await audio_response(audio_content, key, 'miss')
+
+
+@app.route('/api/tts', methods=['POST'])
+async def text_to_speech():
+    data = await request.get_json(silent=True)
+    text, variant = endpoints.tts_request(data)
+    return await synthesize_response(text, variant, stream=bool(data.get('stream', False)))
+
+
+@app.route('/api/tts/stream', methods=['GET'])
+async def text_to_speech_stream():
+    """Streaming TTS for use as an <audio> src: /api/tts/stream?text=...&variant=br"""
+    text, variant = endpoints.tts_request(request.args.to_dict())
+    return await synthesize_response(text, variant, stream=True)
+
+
+@app.route('/api/tts/audio/<key>', methods=['GET'])
+async def cached_audio(key):
+    """Replay a previously synthesized clip by the key returned in X-TTS-Key"""
+    endpoints.check_audio_key(key)
+    audio_content = await run_blocking(services.get('tts_cache').get, key)
+    if not audio_content:
+        return {'error': 'Audio not found'}, 404
+    return await audio_response(audio_content, key, 'hit')
+
+
+@app.route('/api/tts/stats', methods=['GET'])
+async def tts_cache_stats():
+    return services.get('tts_cache').stats()
+
+
+@app.route('/api/llm/stats', methods=['GET'])
+async def llm_cache_stats():
+    return services.get('llm_processor').cache.stats()
+
+
+@app.route('/api/correct_text', methods=['POST'])
+async def correct_text():
+    """Endpoint for correcting typos, syntax, and grammar with LLM"""
+    llm_processor = services.get('llm_processor')
+    text = endpoints.require_fields(await request.get_json(silent=True), 'text')['text']
+    return endpoints.correction_body(text, *await llm_processor.acorrect_text(text))
+
+
+@app.route('/api/transform_colloquial', methods=['POST'])
+async def transform_colloquial():
+    """Endpoint for transforming text to colloquial Portuguese using LLM"""
+    llm_processor = services.get('llm_processor')
+    text = endpoints.require_fields(await request.get_json(silent=True), 'text')['text']
+    return endpoints.colloquial_body(text, *await llm_processor.atransform_to_colloquial(text))
+
+
+@app.route('/api/process_text', methods=['POST'])
+async def process_text():
+    """Combined endpoint for correction and conversion"""
+    llm_processor = services.get('llm_processor')
+    text, apply_correction, apply_conversion, use_llm_conversion = endpoints.process_request(
+        await request.get_json(silent=True))
+    result = {'original': text}
+
+    # Step 1: Correct text if requested, and convert the corrected text
+    if apply_correction:
+        text, correction_message = await llm_processor.acorrect_text(text)
+        result['corrected'] = text
+        result['correction_message'] = correction_message
+
+    # Step 2: Convert to colloquial Portuguese if requested
+    if apply_conversion:
+        if use_llm_conversion:
+            result['conversion'] = endpoints.llm_conversion(*await llm_processor.atransform_to_colloquial(text))
+        else:
+            result['conversion'] = endpoints.rule_conversion(await run_convert(convert_text, text))
+    return result
+
+
+@app.route('/api/chat', methods=['POST'])
+async def chat():
+    """
+    Unified endpoint for all chat interactions.
+    The LLM will interact with the user and handle transformation requests when needed.
+    """
+    llm_processor = services.get('llm_processor')
+    user_text, user_id = endpoints.chat_request(await request.get_json(silent=True))
+
+    if not endpoints.is_transform_request(user_text):
+        response, is_portuguese, colloquial_version, glossary = await run_blocking(
+            endpoints.ask_tutor, llm_processor, user_id, user_text)
+        if not endpoints.shows_transformation(user_text, is_portuguese):
+            return endpoints.chat_body(response, glossary)
+        rule_based = await run_convert(convert_text, user_text, False)
+        return endpoints.chat_body(response, glossary, colloquial_version, rule_based['after'])
+
+    # Find the text to transform, if the user gave one
+    response = await llm_processor.async_client.chat.completions.create(
+        model="gpt-4o", messages=endpoints.extract_text_messages(user_text), temperature=0.1)
+    extracted_text = response.choices[0].message.content
+    if extracted_text == endpoints.NO_TEXT:
+        return endpoints.ASK_FOR_TEXT_BODY
+
+    # The LLM transform, the rule-based one and the explanation are independent
+    (llm_transformed, _), rule_based, explanation_response = await asyncio.gather(
+        llm_processor.atransform_to_colloquial(extracted_text),
+        run_convert(convert_text, extracted_text, False),
+        llm_processor.async_client.chat.completions.create(
+            model="gpt-4o", messages=endpoints.explain_transform_messages(extracted_text), temperature=0.7))
+    return endpoints.transformation_body(explanation_response.choices[0].message.content,
+                                         extracted_text, llm_transformed, rule_based['after'])
+
+
+@app.route('/api/ask_llm', methods=['POST'])
+async def ask_llm():
+    """Interactive endpoint for LLM chat with Portuguese detection"""
+    llm_processor = services.get('llm_processor')
+    user_text, user_id = endpoints.ask_llm_request(await request.get_json(silent=True))
+    response, is_portuguese, colloquial_version, _ = await run_blocking(
+        endpoints.ask_tutor, llm_processor, user_id, user_text)
+    if not (is_portuguese and colloquial_version):
+        return endpoints.ask_llm_body(response, is_portuguese)
+    rule_based = await run_convert(convert_text, user_text, False)
+    return endpoints.ask_llm_body(response, is_portuguese, colloquial_version, rule_based['after'])
+
+
+@app.route('/webhook/twilio', methods=['POST'])
+async def twilio_webhook():
+    # Answer right away; a queue worker converts and replies
+    form = await request.form
+    return await run_blocking(endpoints.enqueue_twilio_message, form.to_dict())
+
+
+if __name__ == '__main__':
+    app.run(host='0.0.0.0', port=3001)
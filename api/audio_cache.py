@@ -0,0 +1,210 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from lru_cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+# Age after which a *.tmp file in the disk tier is a crashed writer's leftover
+# rather than a clip another worker is still writing
+STALE_TMP_SECONDS = 3600
+
+
+def audio_cache_key(text, variant, voice_id, model_id, voice_settings):
+    """Content address of a synthesized clip: sha256 over everything that shapes the audio."""
+    payload = json.dumps([text, variant, voice_id, model_id, voice_settings],
+                         sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class AudioCache:
+    """
+    Two-tier cache for synthesized audio, keyed by audio_cache_key.
+
+    The memory tier is an LRUCache bounded by total bytes. The disk tier keeps
+    one file per clip under `disk_dir` and evicts the least recently used
+    files (by mtime, refreshed on every hit) once their total size exceeds
+    `disk_bytes`. Disk hits are promoted to memory. Pass disk_dir=None to run
+    with the memory tier only. Disk errors are logged and treated as misses.
+    Partial writes (*.tmp) older than STALE_TMP_SECONDS are deleted when the
+    cache opens its directory.
+    """
+
+    def __init__(self, memory_bytes=32 * 1024 * 1024, disk_dir=None,
+                 disk_bytes=512 * 1024 * 1024):
+        self.memory = LRUCache(memory_bytes, sizeof=len)
+        self.disk_dir = disk_dir
+        self.disk_bytes = disk_bytes
+        self.disk_hits = 0
+        self.misses = 0
+        self._disk_size = 0
+        self._lock = threading.Lock()
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self._remove_stale_tmp()
+            self._disk_size = sum(size for _, size, _ in self._disk_entries())
+
+    def _path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.mp3")
+
+    def _disk_entries(self):
+        """(path, size, mtime) for every cached file on disk."""
+        entries = []
+        with os.scandir(self.disk_dir) as it:
+            for entry in it:
+                if entry.name.endswith('.mp3'):
+                    stat = entry.stat()
+                    entries.append((entry.path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def _remove_stale_tmp(self):
+        """Delete partial writes left behind by writers that crashed."""
+        cutoff = time.time() - STALE_TMP_SECONDS
+        with os.scandir(self.disk_dir) as it:
+            for entry in it:
+                try:
+                    if entry.name.endswith('.tmp') and entry.stat().st_mtime < cutoff:
+                        os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    logger.warning(f"Could not remove stale TTS cache file {entry.path}: {e}")
+
+    def get(self, key):
+        """Return the cached audio bytes for key, or None."""
+        audio = self.memory.get(key)
+        if audio is not None:
+            return audio
+        if self.disk_dir:
+            path = self._path(key)
+            try:
+                with open(path, 'rb') as f:
+                    audio = f.read()
+                os.utime(path)
+            except FileNotFoundError:
+                audio = None
+            except OSError as e:
+                logger.warning(f"TTS cache read failed for {key}: {e}")
+                audio = None
+            if audio is not None:
+                with self._lock:
+                    self.disk_hits += 1
+                self.memory.put(key, audio)
+                return audio
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, audio):
+        """Store audio bytes under key in both tiers."""
+        if not audio:
+            return
+        self.memory.put(key, audio)
+        if not self.disk_dir or len(audio) > self.disk_bytes:
+            return
+        path = self._path(key)
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.disk_dir, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(audio)
+            with self._lock:
+                # Two misses on the same clip both write it: count only the
+                # difference when this replaces a file
+                try:
+                    replaced = os.stat(path).st_size
+                except FileNotFoundError:
+                    replaced = 0
+                os.replace(tmp_path, path)
+                self._disk_size += len(audio) - replaced
+                if self._disk_size > self.disk_bytes:
+                    self._evict_disk()
+        except OSError as e:
+            logger.warning(f"TTS cache write failed for {key}: {e}")
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def tee(self, key, chunks):
+        """
+        Pass audio chunks through while collecting them, and store the clip
+        under key once the stream has been fully consumed. A stream that is
+        cut short (client gone, upstream error) or that outgrows both tiers
+        is not cached.
+        """
+        limit = max(self.memory.maxsize, self.disk_bytes if self.disk_dir else 0)
+        parts = []
+        size = 0
+        try:
+            for chunk in chunks:
+                if parts is not None:
+                    size += len(chunk)
+                    if size > limit:
+                        parts = None
+                    else:
+                        parts.append(chunk)
+                yield chunk
+        finally:
+            # Releases the upstream connection when the client disconnects
+            if hasattr(chunks, 'close'):
+                chunks.close()
+        if parts is not None:
+            self.put(key, b''.join(parts))
+
+    async def atee(self, key, chunks):
+        """tee for an async iterator of chunks; the final store runs off the event loop."""
+        limit = max(self.memory.maxsize, self.disk_bytes if self.disk_dir else 0)
+        parts = []
+        size = 0
+        try:
+            async for chunk in chunks:
+                if parts is not None:
+                    size += len(chunk)
+                    if size > limit:
+                        parts = None
+                    else:
+                        parts.append(chunk)
+                yield chunk
+        finally:
+            if hasattr(chunks, 'aclose'):
+                await chunks.aclose()
+        if parts is not None:
+            await asyncio.get_running_loop().run_in_executor(None, self.put, key, b''.join(parts))
+
+    def _evict_disk(self):
+        # Caller holds the lock. Rescan, since other workers share the directory.
+        entries = sorted(self._disk_entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total <= self.disk_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except FileNotFoundError:
+                total -= size
+            except OSError as e:
+                logger.warning(f"TTS cache eviction failed for {path}: {e}")
+        self._disk_size = total
+
+    def stats(self):
+        """Hit/miss counts per tier and the overall hit rate."""
+        memory = self.memory.stats()
+        with self._lock:
+            hits = memory['hits'] + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                'memory_hits': memory['hits'],
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': hits / lookups if lookups else 0.0,
+                'memory_bytes': memory['currsize'],
+                'memory_max_bytes': memory['maxsize'],
+                'disk_bytes': self._disk_size,
+                'disk_max_bytes': self.disk_bytes if self.disk_dir else 0,
+            }
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Regression check and benchmark for word_combinations.combine_tokens
+against the original restart-from-the-start combination loop.
+
+Usage (from the api/ directory):
+    python benchmarks/bench_combinations.py [--texts N] [--words N]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from phonetic_rules import apply_phonetic_rules, ALL_ROOTS
+from portuguese_converter import Token, tokenize_text, merge_word_pairs, render_events
+from word_combinations import apply_combinations, combine_tokens
+from config.irregular_verbs import IRREGULAR_VERBS
+from config.phonetic_dict import PHONETIC_DICTIONARY
+from config.verb_patterns import ALL_ENDINGS
+from config.word_pairs import WORD_PAIRS
+
+
+def combine_tokens_legacy(tokens):
+    """The original loop: merge the leftmost combinable pair, then rescan."""
+    explanations = []
+    made_combination = True
+    while made_combination:
+        made_combination = False
+        new_tokens = []
+        i = 0
+        while i < len(tokens):
+            if i < len(tokens) - 1 and not made_combination:
+                word1, punct1 = tokens[i]
+                word2, punct2 = tokens[i + 1]
+                combined, rule_explanation = apply_combinations(word1, word2, punct1, punct2)
+                if combined is not None and rule_explanation is not None:
+                    explanations.append(rule_explanation)
+                    new_tokens.append((combined, punct2))
+                    i += 2
+                    made_combination = True
+                    continue
+            new_tokens.append(tokens[i])
+            i += 1
+        if made_combination:
+            tokens = new_tokens
+    return tokens, explanations
+
+
+def combine_tokens_explained(tokens):
+    """
+    combine_tokens on (word, punct) tuples, with its events rendered, to
+    compare with the legacy output (includes building the Tokens).
+    """
+    words = [word for word, _ in tokens]
+    events = []
+    combined = combine_tokens([Token(word, punct, 0, 0) for word, punct in tokens], events)
+    return [(t.word, t.punct) for t in combined], render_events('', [], words, events)[1]
+
+
+def build_corpus(texts, words_per_text, seed=0):
+    """Random Portuguese-looking texts built from the shipped vocabulary."""
+    rnd = random.Random(seed)
+    vocab = list(PHONETIC_DICTIONARY) + list(IRREGULAR_VERBS)
+    for pair in WORD_PAIRS:
+        vocab.extend(pair.split())
+    roots = sorted(ALL_ROOTS)
+    vocab.extend(rnd.choice(roots) + rnd.choice(ALL_ENDINGS) for _ in range(500))
+    puncts = [''] * 8 + [',', '.', '!', '?', ';', ' -']
+    corpus = []
+    for _ in range(texts):
+        n = rnd.randint(1, words_per_text)
+        corpus.append(' '.join(rnd.choice(vocab) + rnd.choice(puncts) for _ in range(n)))
+    return corpus
+
+
+def transformed_tokens(text):
+    """Tokens as they reach the combination stage of transform_text."""
+    tokens = [(t.word, t.punct) for t in merge_word_pairs(tokenize_text(text))]
+    result = []
+    for i, (word, punct) in enumerate(tokens):
+        if word:
+            next_word = tokens[i + 1][0] if i + 1 < len(tokens) else None
+            next_next_word = tokens[i + 2][0] if i + 2 < len(tokens) else None
+            prev_word = tokens[i - 1][0] if i > 0 else None
+            word = apply_phonetic_rules(word, next_word, next_next_word, prev_word)[0]
+        result.append((word, punct))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--texts', type=int, default=2000)
+    parser.add_argument('--words', type=int, default=400)
+    args = parser.parse_args()
+
+    corpus = [transformed_tokens(text) for text in build_corpus(args.texts, args.words)]
+
+    timings = {}
+    outputs = {}
+    for name, fn in (('legacy', combine_tokens_legacy), ('combine_tokens', combine_tokens_explained)):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            outputs[name] = [fn(list(tokens)) for tokens in corpus]
+        timings[name] = time.perf_counter() - start
+
+    mismatches = [i for i, (a, b) in enumerate(zip(outputs['legacy'], outputs['combine_tokens'])) if a != b]
+    total_words = sum(len(tokens) for tokens in corpus)
+    print(f"texts: {len(corpus)}, tokens: {total_words}")
+    for name, seconds in timings.items():
+        print(f"{name:15s} {seconds:8.3f} s")
+    print(f"speedup:        {timings['legacy'] / timings['combine_tokens']:8.1f}x")
+    if mismatches:
+        print(f"MISMATCH in {len(mismatches)} texts, first: {corpus[mismatches[0]]}")
+        return 1
+    print("outputs identical")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Per-keystroke latency of live conversion (incremental.IncrementalConverter)
+against converting the whole document on every change.
+
+For each document size, types corpus sentences one character at a time at
+random places in a document built from the bundled corpus, with the odd
+backspace, and times every edit. Then checks that the patched output equals
+convert_text of the final document.
+
+Usage (from the api/ directory):
+    python benchmarks/bench_incremental.py [--sizes 10,100,1000,10000] [--keystrokes 2000]
+"""
+
+import argparse
+import contextlib
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from bench_pipeline import load_corpus, percentile
+from incremental import IncrementalConverter
+from portuguese_converter import convert_text
+
+
+def full_convert(text):
+    return convert_text(text, explain=False)['after']
+
+
+def run(size, keystrokes, seed=0):
+    rnd = random.Random(seed)
+    sentences = load_corpus(size, seed)
+    document = IncrementalConverter(' '.join(sentences))
+    output = document.output
+
+    latencies = []
+    perf_counter = time.perf_counter
+    typed = 0
+    while typed < keystrokes:
+        # Start a new sentence after a random sentence end
+        block = rnd.randrange(len(document.texts))
+        position = document._offsets(block, rnd.randrange(len(document.texts[block])))[0]
+        for char in ' ' + rnd.choice(sentences):
+            if rnd.random() < 0.05 and position:
+                start, end, replacement = position - 1, position, ''
+                position -= 1
+            else:
+                start, end, replacement = position, position, char
+                position += 1
+            t = perf_counter()
+            out_start, out_end, patch = document.edit(start, end, replacement)
+            latencies.append(perf_counter() - t)
+            output = output[:out_start] + patch + output[out_end:]
+            typed += 1
+
+    full = []
+    for _ in range(5):
+        t = perf_counter()
+        expected = full_convert(document.text)
+        full.append(perf_counter() - t)
+    latencies.sort()
+    return {
+        'chars': len(document.text),
+        'p50_us': percentile(latencies, 0.50) * 1e6,
+        'p99_us': percentile(latencies, 0.99) * 1e6,
+        'full_ms': min(full) * 1000,
+        'ok': output == expected,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default='10,100,1000,10000',
+                        help="Comma-separated document sizes in sentences (default: %(default)s)")
+    parser.add_argument('--keystrokes', type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'size':>6} {'chars':>9} {'edit p50 µs':>12} {'edit p99 µs':>12} {'full ms':>9}  output")
+    failed = False
+    for size in (int(s) for s in args.sizes.split(',')):
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            r = run(size, args.keystrokes)
+        failed |= not r['ok']
+        print(f"{size:>6} {r['chars']:>9} {r['p50_us']:12.1f} {r['p99_us']:12.1f} {r['full_ms']:9.2f}  "
+              f"{'ok' if r['ok'] else 'MISMATCH'}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Microbenchmark for phonetic_rules.is_verb: the precomputed VERB_FORMS
+index against the original linear scan over ALL_ENDINGS.
+
+Usage (from the api/ directory):
+    python benchmarks/bench_is_verb.py [--repeat N]
+"""
+
+import argparse
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from phonetic_rules import is_verb, ALL_ROOTS
+from config.irregular_verbs import IRREGULAR_VERBS
+from config.phonetic_dict import PHONETIC_DICTIONARY
+from config.verb_patterns import ALL_ENDINGS
+from config.word_pairs import WORD_PAIRS
+
+
+def is_verb_linear(word):
+    """The original is_verb: dict-view scan plus a loop over every ending."""
+    if not word:
+        return False
+    lw = word.lower()
+    if lw in IRREGULAR_VERBS or lw in IRREGULAR_VERBS.values():
+        return True
+    for end in ALL_ENDINGS:
+        if lw.endswith(end):
+            root = lw[:-len(end)]
+            if root in ALL_ROOTS:
+                return True
+    return False
+
+
+def build_word_list(size=5000, seed=0):
+    """
+    A realistic mix: mostly non-verbs from the dictionary and word pairs,
+    some irregular verbs and some regular root+ending forms.
+    """
+    rnd = random.Random(seed)
+    others = list(PHONETIC_DICTIONARY)
+    for pair in WORD_PAIRS:
+        others.extend(pair.split())
+    irregular = list(IRREGULAR_VERBS)
+    roots = sorted(ALL_ROOTS)
+    words = []
+    for _ in range(size):
+        r = rnd.random()
+        if r < 0.6:
+            words.append(rnd.choice(others))
+        elif r < 0.8:
+            words.append(rnd.choice(irregular))
+        else:
+            words.append(rnd.choice(roots) + rnd.choice(ALL_ENDINGS))
+    return words
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--size', type=int, default=5000)
+    args = parser.parse_args()
+
+    words = build_word_list(args.size)
+    mismatches = [w for w in words if is_verb(w) != is_verb_linear(w)]
+    if mismatches:
+        print(f"Mismatch between implementations: {mismatches[:10]}")
+        return 1
+
+    def run(fn):
+        best = min(timeit.repeat(lambda: [fn(w) for w in words], number=1, repeat=args.repeat))
+        return best / len(words) * 1e9
+
+    linear = run(is_verb_linear)
+    indexed = run(is_verb)
+    print(f"words: {len(words)}")
+    print(f"linear scan:  {linear:8.0f} ns/word")
+    print(f"VERB_FORMS:   {indexed:8.0f} ns/word")
+    print(f"speedup:      {linear / indexed:8.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Accuracy and latency of the local Portuguese detector.
+
+Runs detect_portuguese over a labelled mixed English/Portuguese set
+(benchmarks/language_corpus.tsv plus every line of corpus_pt.txt as
+Portuguese) and reports:
+
+  - how many texts are decided locally vs. sent to the LLM (confidence below
+    the threshold),
+  - the accuracy of the local decisions,
+  - the mean and p99 time per call.
+
+Usage (from the api/ directory):
+    python benchmarks/bench_language_detector.py [--threshold 0.7] [--repeat 200] [-v]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.abspath(os.path.join(BENCH_DIR, '..')))
+
+from language_detector import detect_portuguese, DETECT_THRESHOLD  # noqa: E402
+
+
+def load_corpus():
+    """Return [(is_portuguese, text)] for the labelled set."""
+    rows = []
+    with open(os.path.join(BENCH_DIR, 'language_corpus.tsv'), encoding='utf-8') as f:
+        for line in f:
+            if line.startswith('#') or not line.strip():
+                continue
+            label, text = line.rstrip('\n').split('\t', 1)
+            rows.append((label == 'pt', text))
+    with open(os.path.join(BENCH_DIR, 'corpus_pt.txt'), encoding='utf-8') as f:
+        rows.extend((True, line.strip()) for line in f if line.strip())
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threshold', type=float, default=DETECT_THRESHOLD)
+    parser.add_argument('--repeat', type=int, default=200, help='Timing passes over the corpus')
+    parser.add_argument('-v', '--verbose', action='store_true', help='List fallbacks and wrong decisions')
+    args = parser.parse_args()
+
+    rows = load_corpus()
+    local = correct = fallback = 0
+    for expected, text in rows:
+        is_portuguese, confidence = detect_portuguese(text)
+        if confidence < args.threshold:
+            fallback += 1
+            if args.verbose:
+                print(f"  LLM   {confidence:.2f} {'pt' if expected else 'en'}  {text}")
+            continue
+        local += 1
+        if is_portuguese == expected:
+            correct += 1
+        elif args.verbose:
+            print(f"  WRONG {confidence:.2f} {'pt' if expected else 'en'}  {text}")
+
+    per_call = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        for _, text in rows:
+            detect_portuguese(text)
+        per_call.append((time.perf_counter() - start) / len(rows) * 1e6)
+    per_call.sort()
+
+    print(f"texts={len(rows)} portuguese={sum(1 for expected, _ in rows if expected)} threshold={args.threshold}")
+    print(f"decided locally: {local} ({local / len(rows):.1%}), sent to LLM: {fallback}")
+    print(f"local accuracy: {correct}/{local} ({correct / local if local else 0:.1%})")
+    print(f"latency per call: mean={statistics.mean(per_call):.1f}us "
+          f"p99={per_call[max(0, int(len(per_call) * 0.99) - 1)]:.1f}us")
+
+
+if __name__ == "__main__":
+    main()
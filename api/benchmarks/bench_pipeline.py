@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Stage-by-stage benchmark of the conversion pipeline over the bundled corpus.
+
+Times tokenize_text, merge_word_pairs, apply_word_rules, the combination
+stage, reassemble_tokens_smartly and end-to-end transform_text for each corpus
+size, reporting words/sec, p50/p99 per-sentence latency and peak memory.
+
+Usage (from the api/ directory):
+    python benchmarks/bench_pipeline.py [--sizes 100,1000,10000] [--output results.json]
+    python benchmarks/bench_pipeline.py --compare [--threshold 0.2]
+    python benchmarks/bench_pipeline.py --save-baseline
+
+With --compare the exit status is 1 if any stage's words/sec dropped by more
+than the threshold (a fraction of the baseline) for a size present in both runs.
+Both options default to benchmarks/baseline.json, which is committed. It was
+recorded on one machine; numbers from another are only comparable with it
+after running --save-baseline there first (on the commit before the change
+being measured).
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from phonetic_rules import clear_word_cache
+from portuguese_converter import (Token, tokenize_text, merge_word_pairs, apply_word_rules,
+                                  reassemble_tokens_smartly, transform_text)
+from word_combinations import combine_tokens
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), 'corpus_pt.txt')
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+
+def load_corpus(size, seed=0):
+    """Return `size` sentences drawn from the bundled corpus in a fixed shuffled order."""
+    with open(CORPUS_PATH, encoding='utf-8') as f:
+        lines = [line.strip() for line in f if line.strip()]
+    rnd = random.Random(seed)
+    sentences = []
+    while len(sentences) < size:
+        batch = lines[:]
+        rnd.shuffle(batch)
+        sentences.extend(batch)
+    return sentences[:size]
+
+
+def copy_tokens(tokens):
+    return [Token(t.word, t.punct, t.start, t.end) for t in tokens]
+
+
+def build_stages(sentences):
+    """
+    Return [(name, function, inputs, prepare)] with each stage fed the
+    previous stage's output. The token stages work in place, so they get a
+    fresh copy of their input (prepare, not timed) on every call.
+    """
+    tokens = [tokenize_text(s) for s in sentences]
+    merged = [merge_word_pairs(copy_tokens(t)) for t in tokens]
+    transformed = [apply_word_rules(copy_tokens(t)) for t in merged]
+    combined = [combine_tokens(copy_tokens(t)) for t in transformed]
+    return [
+        ('tokenize_text', tokenize_text, sentences, None),
+        ('merge_word_pairs', merge_word_pairs, tokens, copy_tokens),
+        ('apply_word_rules', apply_word_rules, merged, copy_tokens),
+        ('combine_tokens', combine_tokens, transformed, copy_tokens),
+        ('reassemble_tokens_smartly', reassemble_tokens_smartly, combined, None),
+        ('transform_text', transform_text, sentences, None),
+    ]
+
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def measure(fn, inputs, words, prepare=None, repeat=1):
+    """
+    Time fn over every input, keeping the fastest of `repeat` passes (each
+    from a cold word cache), then rerun it under tracemalloc for peak memory.
+    If given, prepare(input) builds the argument passed to fn, untimed.
+    """
+    best = None
+    perf_counter = time.perf_counter
+    for _ in range(repeat):
+        items = inputs if prepare is None else [prepare(item) for item in inputs]
+        clear_word_cache()
+        latencies = []
+        for item in items:
+            start = perf_counter()
+            fn(item)
+            latencies.append(perf_counter() - start)
+        if best is None or sum(latencies) < sum(best):
+            best = latencies
+    latencies = sorted(best)
+    total = sum(latencies)
+
+    if prepare is not None:
+        inputs = [prepare(item) for item in inputs]
+    clear_word_cache()
+    tracemalloc.start()
+    for item in inputs:
+        fn(item)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        'sentences': len(inputs),
+        'words': words,
+        'seconds': total,
+        'words_per_sec': words / total if total else 0.0,
+        'p50_us': percentile(latencies, 0.50) * 1e6,
+        'p99_us': percentile(latencies, 0.99) * 1e6,
+        'peak_kb': peak / 1024,
+    }
+
+
+def run(sizes, repeat=1):
+    results = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'sizes': {},
+    }
+    for size in sizes:
+        sentences = load_corpus(size)
+        words = sum(len(s.split()) for s in sentences)
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            stages = build_stages(sentences)
+            results['sizes'][str(size)] = {
+                name: measure(fn, inputs, words, prepare, repeat) for name, fn, inputs, prepare in stages
+            }
+    return results
+
+
+def print_results(results):
+    print(f"{'size':>6} {'stage':26} {'words/s':>12} {'p50 µs':>9} {'p99 µs':>9} {'peak KB':>9}")
+    for size, stages in results['sizes'].items():
+        for name, r in stages.items():
+            print(f"{size:>6} {name:26} {r['words_per_sec']:12.0f} {r['p50_us']:9.1f} "
+                  f"{r['p99_us']:9.1f} {r['peak_kb']:9.0f}")
+
+
+def compare(results, baseline, threshold):
+    """Return a list of (size, stage, baseline words/sec, current words/sec) regressions."""
+    regressions = []
+    for size, stages in results['sizes'].items():
+        for name, r in stages.items():
+            base = baseline.get('sizes', {}).get(size, {}).get(name)
+            if not base or not base['words_per_sec']:
+                continue
+            if r['words_per_sec'] < base['words_per_sec'] * (1 - threshold):
+                regressions.append((size, name, base['words_per_sec'], r['words_per_sec']))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default='100,1000,10000',
+                        help="Comma-separated corpus sizes in sentences (default: %(default)s)")
+    parser.add_argument('--repeat', type=int, default=5,
+                        help="Timed passes per stage; the fastest is reported (default: %(default)s)")
+    parser.add_argument('--output', help="Write the results as JSON to this file")
+    parser.add_argument('--save-baseline', nargs='?', const=BASELINE_PATH,
+                        help="Write the results as a new baseline JSON file (default: benchmarks/baseline.json)")
+    parser.add_argument('--compare', nargs='?', const=BASELINE_PATH,
+                        help="Baseline JSON file to compare against (default: benchmarks/baseline.json)")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="Allowed words/sec drop as a fraction of the baseline (default: %(default)s)")
+    args = parser.parse_args()
+
+    # Fail before the (slow) run rather than after it
+    if args.compare and not os.path.exists(args.compare):
+        print(f"Baseline {args.compare} not found. Record one on this machine first with\n"
+              f"    python benchmarks/bench_pipeline.py --save-baseline {args.compare}\n"
+              f"(on the commit to compare against), then rerun with --compare.", file=sys.stderr)
+        return 2
+
+    results = run([int(s) for s in args.sizes.split(',')], args.repeat)
+    print_results(results)
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for size, name, base, current in regressions:
+            print(f"REGRESSION size={size} {name}: {base:.0f} → {current:.0f} words/sec "
+                  f"({(1 - current / base) * 100:.0f}% slower)")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.threshold:.0%} against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
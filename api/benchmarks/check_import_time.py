@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Import-time budget check for the API.
+
+Imports a module in a fresh interpreter with `python -X importtime`, parses
+the per-module timings from stderr and fails if the module took longer than
+the budget, or if it pulled in an integration SDK that should only be loaded
+on first use.
+
+Usage (from the api/ directory):
+    python benchmarks/check_import_time.py [--module app] [--budget-ms 300]
+    python benchmarks/check_import_time.py --module asgi
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+API_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# SDKs that app.py and asgi.py must import lazily
+LAZY_MODULES = ('openai', 'twilio', 'requests', 'httpx', 'elevenlabs', 'llm_processor',
+                'twilio_handler', 'tts_converter')
+
+# Default budgets. asgi gets more because quart.app imports Flask and
+# Hypercorn (about 250 ms of the total here) and asgi:app has to be a Quart
+# instance at import time for uvicorn to load it, so that part cannot be
+# deferred; everything asgi.py adds on top of Quart is lazy (LAZY_MODULES).
+BUDGETS_MS = {'app': 300.0, 'asgi': 450.0}
+DEFAULT_BUDGET_MS = 300.0
+
+
+def import_times(module):
+    """Return {module name: cumulative import time in µs} for a fresh import of module."""
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                          cwd=API_DIR, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr}")
+    times = {}
+    for line in proc.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--module', default='app')
+    parser.add_argument('--budget-ms', type=float,
+                        help="Import time budget (default: BUDGETS_MS for the module, else 300)")
+    parser.add_argument('--top', type=int, default=10, help="Show the N slowest top-level imports")
+    args = parser.parse_args()
+
+    if args.budget_ms is None:
+        args.budget_ms = BUDGETS_MS.get(args.module, DEFAULT_BUDGET_MS)
+
+    times = import_times(args.module)
+    total_ms = times.get(args.module, 0) / 1000
+    for name, us in sorted(times.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{us / 1000:8.1f} ms  {name}")
+
+    failures = []
+    if total_ms > args.budget_ms:
+        failures.append(f"import {args.module} took {total_ms:.1f} ms (budget {args.budget_ms:.0f} ms)")
+    eager = sorted(name for name in times if name.split('.')[0] in LAZY_MODULES)
+    if eager:
+        failures.append(f"import {args.module} eagerly loaded: {', '.join(eager)}")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        return 1
+    print(f"OK: import {args.module} took {total_ms:.1f} ms (budget {args.budget_ms:.0f} ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TTS client check against a local stub of the ElevenLabs API.
+
+Starts an HTTP/1.1 keep-alive server on localhost that answers GET /voices
+and POST /text-to-speech/<voice_id>, points one shared TTSConverter at it and
+fires a number of synthesis requests. Fails if the client opened more
+connections than its pool allows, repeated the voices check within its TTL,
+or sent the wrong payload. Prints the per-request latency.
+
+Usage (from the api/ directory):
+    python benchmarks/check_tts_client.py [--requests 200] [--threads 4] [--delay-ms 5]
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tts_converter import TTSConverter  # noqa: E402
+
+FAKE_AUDIO = b'ID3' + b'\0' * 2048
+
+
+class StubState:
+    def __init__(self, delay):
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.voices_calls = 0
+        self.tts_calls = 0
+        self.bad_requests = []
+
+
+def make_handler(state):
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        disable_nagle_algorithm = True
+
+        def setup(self):
+            super().setup()
+            with state.lock:
+                state.connections += 1
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status, body, content_type):
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path != '/v1/voices':
+                return self._send(404, b'{}', 'application/json')
+            with state.lock:
+                state.voices_calls += 1
+            voices = [{'voice_id': voice_id} for voice_id in TTSConverter.VOICES.values()]
+            self._send(200, json.dumps({'voices': voices}).encode(), 'application/json')
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            payload = json.loads(body)
+            if self.headers.get('xi-api-key') != 'stub-key' or payload.get('model_id') != TTSConverter.MODEL_ID:
+                with state.lock:
+                    state.bad_requests.append(self.path)
+                return self._send(400, b'{}', 'application/json')
+            with state.lock:
+                state.tts_calls += 1
+            time.sleep(state.delay)
+            self._send(200, FAKE_AUDIO, 'audio/mpeg')
+
+    return StubHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--delay-ms', type=float, default=5.0, help='Simulated synthesis latency')
+    args = parser.parse_args()
+
+    state = StubState(args.delay_ms / 1000)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(state))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f'http://127.0.0.1:{server.server_port}/v1'
+
+    tts = TTSConverter(api_key='stub-key', base_url=base_url, voices_ttl=3600)
+
+    def one(i):
+        start = time.perf_counter()
+        audio = tts.synthesize_speech(f'frase {i}', 'br' if i % 2 else 'pt')
+        return time.perf_counter() - start, audio
+
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        with ThreadPoolExecutor(args.threads) as pool:
+            results = list(pool.map(one, range(args.requests)))
+    tts.close()
+    server.shutdown()
+
+    latencies = sorted(elapsed * 1000 for elapsed, _ in results)
+    failed = sum(1 for _, audio in results if audio != FAKE_AUDIO)
+    print(f"requests={args.requests} threads={args.threads} connections={state.connections} "
+          f"voices_calls={state.voices_calls} tts_calls={state.tts_calls}")
+    print(f"p50={statistics.median(latencies):.2f}ms "
+          f"p99={latencies[int(len(latencies) * 0.99) - 1]:.2f}ms")
+
+    errors = []
+    if failed:
+        errors.append(f"{failed} requests did not return the stub audio")
+    if state.bad_requests:
+        errors.append(f"{len(state.bad_requests)} requests had a wrong key or payload")
+    if state.voices_calls != 1:
+        errors.append(f"voices were checked {state.voices_calls} times, expected once")
+    if state.connections > args.threads:
+        errors.append(f"{state.connections} connections opened for {args.threads} threads")
+    for error in errors:
+        print(f"FAIL: {error}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+WhatsApp webhook check against a local fake of the Twilio Messages API.
+
+Starts a fake API on localhost (POST /2010-04-01/Accounts/<sid>/Messages.json),
+points TwilioHandler at it with TWILIO_API_BASE_URL and a temporary
+MESSAGE_QUEUE_DB, and posts webhooks to the Flask app:
+
+  - every message is posted twice, as Twilio does after a timeout,
+  - the fake answers the first send attempts with 500 (--flaky),
+  - one recipient is rejected with 400 and must not be retried.
+
+Fails unless every message gets exactly one reply with the converted text,
+the rejected one ends up failed after one attempt, and nothing is left
+queued. Prints the webhook latency and the time to drain the queue.
+
+Usage (from the api/ directory):
+    python benchmarks/check_twilio_queue.py [--messages 200] [--flaky 20] [--delay-ms 50]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.abspath(os.path.join(BENCH_DIR, '..')))
+
+ACCOUNT_SID = 'ACfake'
+REJECTED = 'whatsapp:+15550000000'
+
+
+class FakeTwilio:
+    def __init__(self, delay, flaky):
+        self.delay = delay
+        self.flaky = flaky
+        self.lock = threading.Lock()
+        self.attempts = 0
+        self.sent = {}  # recipient -> [bodies]
+
+
+def make_handler(state):
+    class FakeHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        disable_nagle_algorithm = True
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status, body):
+            body = body.encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            form = parse_qs(self.rfile.read(int(self.headers.get('Content-Length', 0))).decode())
+            if self.path != f'/2010-04-01/Accounts/{ACCOUNT_SID}/Messages.json':
+                return self._send(404, '{"status": 404, "message": "not found"}')
+            time.sleep(state.delay)
+            recipient = form['To'][0]
+            with state.lock:
+                state.attempts += 1
+                if state.attempts <= state.flaky:
+                    return self._send(500, '{"status": 500, "message": "try again"}')
+            if recipient == REJECTED:
+                return self._send(400, '{"status": 400, "code": 21211, "message": "invalid To"}')
+            with state.lock:
+                state.sent.setdefault(recipient, []).append(form['Body'][0])
+            self._send(201, '{"sid": "SMfake", "status": "queued"}')
+
+    return FakeHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--messages', type=int, default=200)
+    parser.add_argument('--flaky', type=int, default=20, help='Send attempts answered with 500 first')
+    parser.add_argument('--delay-ms', type=float, default=50.0, help='Fake API latency')
+    parser.add_argument('--timeout', type=float, default=60.0)
+    args = parser.parse_args()
+
+    state = FakeTwilio(args.delay_ms / 1000, args.flaky)
+    fake = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(state))
+    threading.Thread(target=fake.serve_forever, daemon=True).start()
+
+    tmp = tempfile.mkdtemp()
+    os.environ.update({
+        'TWILIO_ACCOUNT_SID': ACCOUNT_SID,
+        'TWILIO_AUTH_TOKEN': 'fake-token',
+        'TWILIO_WHATSAPP_NUMBER': '+15559999999',
+        'TWILIO_API_BASE_URL': f'http://127.0.0.1:{fake.server_port}',
+        'MESSAGE_QUEUE_DB': os.path.join(tmp, 'message_queue.db'),
+        'MESSAGE_RETRY_BASE': '0.05',
+    })
+    from app import app
+    from integrations import services
+    from portuguese_converter import convert_text
+
+    with open(os.path.join(BENCH_DIR, 'corpus_pt.txt'), encoding='utf-8') as f:
+        texts = [line.strip() for line in f if line.strip()]
+    messages = [(f'SM{i:06d}', f'whatsapp:+1555{i:07d}', texts[i % len(texts)]) for i in range(1, args.messages + 1)]
+    messages.append(('SMrejected', REJECTED, texts[0]))
+
+    client = app.test_client()
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(2):
+        for sid, sender, text in messages:
+            t = time.perf_counter()
+            response = client.post('/webhook/twilio', data={'MessageSid': sid, 'From': sender, 'Body': text})
+            latencies.append((time.perf_counter() - t) * 1000)
+            assert response.status_code == 200, response.status_code
+
+    queue = services.get('twilio_queue').queue
+    deadline = time.monotonic() + args.timeout
+    while time.monotonic() < deadline:
+        stats = queue.stats()
+        if not stats['pending'] and not stats['running']:
+            break
+        time.sleep(0.05)
+    drained = time.perf_counter() - start
+    services.get('twilio_queue').stop()
+    fake.shutdown()
+
+    errors = []
+    for sid, sender, text in messages[:-1]:
+        bodies = state.sent.get(sender, [])
+        if bodies != [convert_text(text, explain=False)['after']]:
+            errors.append(f"{sid}: got {len(bodies)} replies {bodies[:2]}")
+    if REJECTED in state.sent:
+        errors.append("rejected recipient was sent a message")
+    stats = queue.stats()
+    row = queue._db().execute("SELECT status, attempts FROM message_jobs WHERE key = 'SMrejected'").fetchone()
+    if row != ('failed', 1):
+        errors.append(f"rejected job ended as {row}, expected ('failed', 1)")
+    if stats != {'pending': 0, 'running': 0, 'done': len(messages) - 1, 'failed': 1}:
+        errors.append(f"queue stats {stats}")
+
+    latencies.sort()
+    print(f"webhooks={len(latencies)} sends={state.attempts} (of which {min(args.flaky, state.attempts)} failed with 500)")
+    print(f"webhook latency: p50={statistics.median(latencies):.2f}ms "
+          f"p99={latencies[max(0, int(len(latencies) * 0.99) - 1)]:.2f}ms")
+    print(f"all messages answered after {drained:.2f}s, queue {stats}")
+    for error in errors:
+        print(f"ERROR {error}")
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Load test for the ASGI serving mode (asgi.py) against a local ElevenLabs stub.
+
+Starts the stub from check_tts_client.py with a long synthesis delay, runs
+asgi:app under uvicorn pointed at it, then measures the converter endpoint
+alternately on its own and while a number of slow TTS requests are in
+flight, for a few rounds.
+
+Fails unless the converter keeps at least --min-ratio of its throughput
+while TTS is in flight, and the slow TTS requests all finish within
+--max-tts-factor times the stub's delay (they must not queue behind each
+other or behind the converter).
+
+The TTS requests go through their own HTTP client: httpx's connection pool
+does work proportional to the requests pending on it, so sharing one
+client with the converter load would slow the load generator itself. Each
+round uses new TTS texts, so none is answered from the audio cache.
+
+Usage (from the api/ directory):
+    python benchmarks/load_test_asgi.py [--requests 1000] [--concurrency 20]
+                                        [--slow 50] [--tts-delay-ms 2000]
+                                        [--rounds 2] [--min-ratio 0.7]
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from http.server import ThreadingHTTPServer
+
+import httpx
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+API_DIR = os.path.abspath(os.path.join(BENCH_DIR, '..'))
+sys.path.insert(0, BENCH_DIR)
+
+from check_tts_client import StubState, make_handler  # noqa: E402
+
+CORPUS = os.path.join(BENCH_DIR, 'corpus_pt.txt')
+
+
+class StubServer(ThreadingHTTPServer):
+    # The default backlog of 5 drops connections when every slow TTS
+    # request connects at once, which would time the stub, not the server
+    request_queue_size = 256
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port, stub_url, convert_processes):
+    env = dict(os.environ,
+               ELEVENLABS_BASE_URL=stub_url,
+               ELEVENLABS_API_KEY='stub-key',
+               TTS_CACHE_DIR='',
+               ASGI_CONVERT_PROCESSES=str(convert_processes))
+    return subprocess.Popen([sys.executable, '-m', 'uvicorn', 'asgi:app', '--host', '127.0.0.1', '--port', str(port),
+                             '--log-level', 'warning'],
+                            cwd=API_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+async def wait_ready(client, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get('/api/tts/stats')).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("ASGI server did not start")
+
+
+async def convert_load(client, texts, total, concurrency):
+    """Send `total` converter requests with `concurrency` in flight; returns (seconds, latencies ms)."""
+    latencies = []
+    counter = iter(range(total))
+
+    async def worker():
+        for i in counter:
+            start = time.perf_counter()
+            response = await client.post('/api/portuguese_converter',
+                                         json={'text': texts[i % len(texts)], 'explain': False})
+            response.raise_for_status()
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - start, sorted(latencies)
+
+
+async def slow_tts(client, count):
+    """Send `count` TTS requests at once, with texts no earlier round used; returns (seconds, statuses)."""
+    tag = uuid.uuid4().hex[:8]
+
+    async def one(i):
+        response = await client.post('/api/tts', json={'text': f'frase lenta {tag} número {i}', 'variant': 'br'})
+        return response.status_code
+
+    start = time.perf_counter()
+    statuses = await asyncio.gather(*(one(i) for i in range(count)))
+    return time.perf_counter() - start, statuses
+
+
+def report(label, elapsed, latencies):
+    p99 = latencies[max(0, int(len(latencies) * 0.99) - 1)]
+    throughput = len(latencies) / elapsed
+    print(f"{label:<28} {throughput:8.1f} req/s  "
+          f"p50={statistics.median(latencies):7.1f}ms  p99={p99:7.1f}ms")
+    return throughput
+
+
+async def run(args, base_url):
+    """Return a list of failure messages."""
+    with open(CORPUS, encoding='utf-8') as f:
+        texts = [line.strip() for line in f if line.strip()]
+
+    failures = []
+    alone, loaded = [], []
+    tts_budget = args.max_tts_factor * args.tts_delay_ms / 1000
+    async with httpx.AsyncClient(base_url=base_url, timeout=60,
+                                 limits=httpx.Limits(max_connections=args.concurrency + 5)) as client, \
+            httpx.AsyncClient(base_url=base_url, timeout=60,
+                              limits=httpx.Limits(max_connections=args.slow + 5)) as tts_client:
+        await wait_ready(client)
+        await convert_load(client, texts, args.concurrency * 5, args.concurrency)  # warm up
+
+        for _ in range(args.rounds):
+            elapsed, latencies = await convert_load(client, texts, args.requests, args.concurrency)
+            alone.append(report("converter alone", elapsed, latencies))
+
+            slow = asyncio.ensure_future(slow_tts(tts_client, args.slow))
+            elapsed, latencies = await convert_load(client, texts, args.requests, args.concurrency)
+            loaded.append(report(f"converter + {args.slow} slow TTS", elapsed, latencies))
+            tts_elapsed, statuses = await slow
+            print(f"{args.slow} slow TTS requests finished in {tts_elapsed:.2f}s "
+                  f"(upstream delay {args.tts_delay_ms / 1000:.2f}s), statuses {sorted(set(statuses))}")
+            if set(statuses) != {200}:
+                failures.append(f"TTS statuses {sorted(set(statuses))}")
+            if tts_elapsed > tts_budget:
+                failures.append(f"slow TTS took {tts_elapsed:.2f}s (limit {tts_budget:.2f}s)")
+
+    ratio = statistics.mean(loaded) / statistics.mean(alone)
+    print(f"converter kept {ratio:.0%} of its throughput with TTS in flight (floor {args.min_ratio:.0%})")
+    if ratio < args.min_ratio:
+        failures.append(f"converter throughput dropped to {ratio:.0%} with TTS in flight")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=1000, help='Converter requests per run')
+    parser.add_argument('--concurrency', type=int, default=20, help='Converter requests in flight')
+    parser.add_argument('--slow', type=int, default=50, help='Concurrent slow TTS requests')
+    parser.add_argument('--tts-delay-ms', type=float, default=2000.0, help='Stub synthesis latency')
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1,
+                        help='ASGI_CONVERT_PROCESSES for the server (0 = thread pool)')
+    parser.add_argument('--rounds', type=int, default=2, help='Alternating alone/with-TTS measurements')
+    parser.add_argument('--min-ratio', type=float, default=0.7,
+                        help='Converter throughput floor with TTS in flight, as a fraction of alone (default: %(default)s)')
+    parser.add_argument('--max-tts-factor', type=float, default=2.0,
+                        help='Slow TTS must finish within this multiple of the stub delay (default: %(default)s)')
+    args = parser.parse_args()
+
+    stub = StubServer(('127.0.0.1', 0), make_handler(StubState(args.tts_delay_ms / 1000)))
+    threading.Thread(target=stub.serve_forever, daemon=True).start()
+
+    port = free_port()
+    server = start_server(port, f'http://127.0.0.1:{stub.server_port}/v1', args.processes)
+    try:
+        failures = asyncio.run(run(args, f'http://127.0.0.1:{port}'))
+    finally:
+        server.terminate()
+        server.wait()
+        stub.shutdown()
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
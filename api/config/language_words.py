@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Seed vocabulary for the local language detector. Portuguese words are added
+# to the dictionary, verb and phrase tables already shipped; English words are
+# the evidence against Portuguese. Any word found on both sides is ignored.
+
+# Frequent Portuguese words that the conversion tables do not already list
+PORTUGUESE_WORDS = {
+    "a", "o", "as", "os", "de", "da", "das", "dos", "em", "na", "nas", "no",
+    "nos", "num", "numa", "um", "uma", "uns", "umas", "ao", "aos", "à", "às", "pelo", "pela",
+    "pelos", "pelas", "para", "pra", "pro", "com", "sem", "por", "sobre",
+    "entre", "até", "desde", "que", "quê", "se", "mas", "ou", "e", "é", "também",
+    "muito", "muita", "muitos", "muitas", "pouco", "mais", "menos", "bem",
+    "mal", "sim", "já", "ainda", "agora", "hoje", "ontem", "amanhã", "aqui",
+    "ali", "lá", "onde", "como", "porque", "porquê", "então", "sempre", "nunca",
+    "nada", "tudo", "algo", "todo", "toda", "todos", "todas", "outro", "outra",
+    "mesmo", "mesma", "você", "voce", "vocês", "voces", "nós", "dele", "dela",
+    "deles", "delas", "minha", "minhas", "meus", "teu", "tua", "comigo",
+    "contigo", "obrigado", "obrigada", "olá", "oi", "tchau", "bom", "boa",
+    "dia", "noite", "tarde", "casa", "cidade", "língua", "inglês", "português",
+    "brasil", "portugal", "nome", "gente", "coisa", "tempo", "ano", "anos",
+    "vez", "vezes", "dinheiro", "trabalho", "amigo", "amiga", "água", "comida",
+    "obrigadão", "desculpa", "desculpe", "favor", "tudo", "beleza", "legal",
+    "gosto", "quero", "queria", "preciso", "posso", "pode", "vou", "vai",
+    "sou", "somos", "são", "foi", "fui", "tenho", "tem", "temos", "moro",
+    "falo", "fala", "estou", "está", "estamos", "claro", "problema", "livro",
+    "livros", "carro", "carros", "mesa", "mesas", "cadeira", "cadeiras",
+    "caneta", "canetas", "computador", "computadores", "professor",
+    "professora", "professores", "professoras",
+}
+
+# Frequent English words (function words and everyday vocabulary)
+ENGLISH_WORDS = {
+    "the", "a", "an", "and", "or", "but", "if", "of", "to", "in", "on", "at",
+    "by", "for", "with", "from", "about", "into", "over", "after", "before",
+    "is", "are", "was", "were", "be", "been", "being", "am", "do", "does",
+    "did", "done", "have", "has", "had", "will", "would", "shall", "should",
+    "can", "could", "may", "might", "must", "i", "you", "he", "she", "it", "as",
+    "we", "they", "me", "him", "her", "us", "them", "my", "your", "his",
+    "its", "our", "their", "mine", "yours", "this", "that", "these", "those",
+    "what", "which", "who", "whom", "whose", "when", "where", "why", "how",
+    "not", "no", "yes", "all", "any", "some", "many", "much", "more", "most",
+    "other", "such", "only", "own", "same", "so", "than", "too", "very",
+    "just", "also", "now", "then", "there", "here", "again", "still", "ever",
+    "never", "always", "often", "hello", "hi", "hey", "thanks", "thank",
+    "please", "sorry", "okay", "ok", "sure", "ready", "start", "let", "lets",
+    "want", "need", "know", "think", "learn", "learning", "teach", "help",
+    "say", "said", "tell", "mean", "means", "meaning", "word", "words",
+    "sentence", "phrase", "language", "english", "portuguese", "brazilian",
+    "grammar", "verb", "verbs", "noun", "lesson", "next", "again", "good",
+    "great", "nice", "like", "love", "make", "get", "go", "going", "come",
+    "see", "look", "give", "take", "use", "find", "work", "call", "try",
+    "ask", "feel", "become", "leave", "put", "keep", "show", "hear", "play",
+    "run", "move", "live", "believe", "bring", "happen", "write", "read",
+    "speak", "understand", "explain", "difference", "between", "example",
+    "question", "answer", "right", "wrong", "correct", "way", "day", "time",
+    "year", "people", "thing", "things", "name", "city", "from", "which",
+    "would", "could", "why", "because", "really", "well", "one", "two",
+    "three", "first", "last", "new", "old", "big", "small", "don", "doesn",
+    "didn", "isn", "aren", "won", "im", "ive", "youre", "whats", "ate",
+    "four", "five", "ten", "examples", "morning", "evening", "night",
+    "dinner", "lunch", "breakfast", "much", "last", "week", "today",
+    "tomorrow", "yesterday", "home", "friend", "friends", "book", "books",
+}
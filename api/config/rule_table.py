@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Forms of 'entrar' that keep their initial 'ent'
+ENTRAR_FORMS = frozenset({'entrar', 'entro', 'entra', 'entramos', 'entram', 'entrei', 'entrou',
+                          'entraram', 'entrava', 'entravam'})
+
+CONSONANTS = 'bcdfgjklmnpqrstvwxz'
+VOWELS = 'aeiouáéíóúâêîôúãẽĩõũ'
+
+# Rule conditions, evaluated against the original word
+RULE_ALWAYS = None
+RULE_NOT_ENTRAR = 'not_entrar'
+RULE_VERB = 'verb'
+RULE_NOT_VERB = 'not_verb'
+
+# Ordered table of single-word rules: (rule_id, pattern, replacement, explanation, condition).
+# Rules run top to bottom on the lowercased word, each one seeing the output of the
+# previous one, so the order matters. Rule IDs are what conversion results report
+# (see rule_ids.py): keep them stable, and give a new rule an unused ID.
+PHONETIC_RULES = [
+    (100, r'^ent', 'int', "Initial ent → int", RULE_NOT_ENTRAR),
+    (101, r'^des', 'dis', "Transform initial 'des' to 'dis'", RULE_ALWAYS),
+    (102, r'^menti', 'minti', "Transform initial 'menti' to 'minti'", RULE_ALWAYS),
+
+    (103, r'ovo$', 'ôvo', "Transform ending 'ovo' to 'ôvo'", RULE_ALWAYS),
+    (104, r'ovos$', 'óvos', "Transform ending 'ovos' to 'óvos'", RULE_ALWAYS),
+    (105, r'ogo$', 'ôgo', "Transform ending 'ogo' to 'ôgo'", RULE_ALWAYS),
+    (106, r'ogos$', 'ógos', "Transform ending 'ogos' to 'ógos'", RULE_ALWAYS),
+    (107, r'oso$', 'ôso', "Transform ending 'oso' to 'ôso'", RULE_ALWAYS),
+    (108, r'osos$', 'ósos', "Transform ending 'osos' to 'ósos'", RULE_ALWAYS),
+
+    (109, r'ar$', 'á', "Infinitive ending: ar → á", RULE_VERB),
+    (110, r'er$', 'ê', "Infinitive ending: er →ê", RULE_VERB),
+    (111, r'ir$', 'í', "Infinitive ending: ir → í", RULE_VERB),
+    (112, r'am[ou]s$', 'ãmu', "Verb ending 'amos/amus' → 'ãmu'", RULE_VERB),
+    (113, r'em[ou]s$', 'êmu', "Verb ending 'emos/emus' → 'êmu'", RULE_VERB),
+    (114, r'im[ou]s$', 'imu', "Verb ending 'imos/imus' → 'imu'", RULE_VERB),
+
+    (115, r'o$', 'u', "Final o → u", RULE_ALWAYS),
+    (116, r'os$', 'us', "Final os → us", RULE_ALWAYS),
+    (117, r'e$', 'i', "Final e → i", RULE_ALWAYS),
+    (118, r'es$', 'is', "Final es → is", RULE_ALWAYS),
+    (119, r'ão$', 'ãun', "ão → ãun", RULE_ALWAYS),
+    (120, r'^es', 'is', "Initial es → is", RULE_ALWAYS),
+
+    # Rule 9p: 's' between vowels becomes 'z'
+    (121, r'([' + VOWELS + '])s([' + VOWELS + '])', r'\1z\2', "s → z between vowels", RULE_ALWAYS),
+
+    (122, r'olh', 'ôli', "olh → ôly", RULE_NOT_VERB),
+    (123, r'lh', 'li', "lh → ly", RULE_ALWAYS),
+    # Unified rule for any "ou" to "ô" transformation anywhere in the word
+    (124, r'ou', 'ô', "ou → ô (anywhere)", RULE_ALWAYS),
+
+    (125, r'al([' + CONSONANTS + '])', r'au\1', "al+consonant → au", RULE_ALWAYS),
+    (126, r'on(?!h)([' + CONSONANTS + '])', r'oun\1', "on+consonant → oun", RULE_ALWAYS),
+    (127, r'am$', 'ã', "Final am → ã", RULE_ALWAYS),
+    (128, r'em$', 'êin', "Final em →êin", RULE_ALWAYS),
+    (129, r'om$', 'ôun', "Final om → ôun", RULE_ALWAYS),
+    (130, r'um$', 'un', "Final um → un", RULE_ALWAYS),
+    (131, r'^h', '', "Remove initial h", RULE_ALWAYS),
+    (132, r'^ex', 'iz', "Initial ex → iz", RULE_ALWAYS),
+    (133, r'^pol', 'pul', "Initial pol → pul", RULE_ALWAYS),
+    (134, r'ol$', 'óu', "Final ol → óu", RULE_ALWAYS),
+    (135, r'l$', 'u', "Final l → u", RULE_ALWAYS),
+    (136, r'ul([' + CONSONANTS + '])', r'u\1', "ul before consonant → u (remove duplicate u)", RULE_ALWAYS),
+    (137, r'([^u])l([' + CONSONANTS + '])', r'\1u\2', "l before consonant → u (if not after u)", RULE_ALWAYS),
+] + [
+    (140 + n, rf'({p[0]})({p[1]})', r'\1i\2', f"Insert i: {p} → {p[0]}i{p[1]}", RULE_ALWAYS)
+    for n, p in enumerate(['bs', 'ps', 'pn', 'dv', 'pt', 'pç', 'dm', 'gn', 'tm', 'tn'])
+] + [
+    (150, r'[dtbfjkpv]$', r'\0i', "Append i after final consonant", RULE_ALWAYS),
+    (151, r'c$', 'ki', "Final c → ki", RULE_ALWAYS),
+    (152, r'g$', r'\0ui', "Append ui after final g", RULE_ALWAYS),
+    (153, r'eir', 'êr', "eir → êr", RULE_ALWAYS),
+    # Removed specific initial 'ou' rules as they're covered by the unified rule
+    (154, r'^des', 'dis', "Transform initial 'des' to 'dis'", RULE_ALWAYS),
+    (155, r'ora$', 'óra', "Transform ending 'ora' to 'óra'", RULE_ALWAYS),
+    (156, r'oras$', 'óras', "Transform ending 'oras' to 'óras'", RULE_ALWAYS),
+    (157, r'ês$', 'êis', "Final 'ês' becomes 'êis'", RULE_ALWAYS),
+]
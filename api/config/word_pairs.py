@@ -2,6 +2,8 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+# Lowercase phrases (two or more words) merged into a single token before the
+# single-word rules run; when phrases overlap, the longest one wins.
 WORD_PAIRS = {
     "bem estar": "bein-está",
     "a gente": "agenti",
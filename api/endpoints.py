@@ -0,0 +1,240 @@
+"""
+The framework-independent part of the HTTP endpoints, shared by the Flask
+app (app.py) and the ASGI app (asgi.py): request validation, prompts,
+response bodies and error responses. The apps only route requests, await
+or offload the calls, and serialize what these functions return.
+
+Bodies are returned as dicts or (dict, status) tuples, which both Flask and
+Quart serialize as JSON.
+"""
+
+import logging
+import os
+
+from werkzeug.exceptions import HTTPException
+
+from integrations import services, MAX_BATCH_SIZE
+from rule_ids import RULES
+from services import ServiceUnavailable
+from user_state_db import get_user_state, save_user_state
+
+logger = logging.getLogger(__name__)
+
+# The front end is served from the project root (one level up from api/)
+STATIC_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+RULES_BODY = {'rules': {str(rule_id): description for rule_id, description in RULES.items()}}
+
+# /api/chat: a message containing one of these asks for a transformation
+TRANSFORM_KEYWORDS = ['transform', 'convert', 'colloquial', 'informal', 'brazilian portuguese']
+EXTRACT_TEXT_PROMPT = "You are an assistant that identifies text to be transformed. If the user wants to transform text to colloquial Brazilian Portuguese, extract the exact text they want to transform. If no specific text is identified, respond with 'NO_TEXT'."
+EXPLAIN_TRANSFORM_PROMPT = "You are a helpful assistant explaining Portuguese text transformation. Respond in a friendly, conversational way. Mention that you're showing both LLM and rule-based transformations."
+NO_TEXT = "NO_TEXT"
+ASK_FOR_TEXT_BODY = {
+    'response': "I'd be happy to transform Portuguese text to colloquial Brazilian Portuguese! Please provide the text you'd like me to transform."
+}
+
+
+class RequestError(Exception):
+    """A request the client has to fix, answered with {'error': message} and `status`."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def error_response(e, where):
+    """
+    The response for an exception raised by an endpoint: HTTP exceptions
+    (404 and the like) are passed through, bad requests and unavailable
+    services get their status, anything else is logged and answered 500.
+    """
+    if isinstance(e, HTTPException):
+        return e
+    if isinstance(e, RequestError):
+        return {'error': str(e)}, e.status
+    if isinstance(e, ServiceUnavailable):
+        return {'error': str(e)}, 503
+    logger.error(f"Error in {where}: {str(e)}")
+    return {'error': str(e)}, 500
+
+
+def static_file(path):
+    """The file under STATIC_ROOT to serve for a front-end path."""
+    if path and os.path.exists(os.path.join(STATIC_ROOT, path)):
+        return path
+    return 'index.html'
+
+
+def require_fields(data, *fields):
+    """The request's JSON object, if it has all `fields`."""
+    if not isinstance(data, dict) or any(field not in data for field in fields):
+        raise RequestError(f"No {' or '.join(fields)} provided")
+    return data
+
+
+def convert_request(data):
+    """(text, explain, align) of a /api/portuguese_converter request."""
+    data = require_fields(data, 'text')
+    return data['text'], data.get('explain', True), bool(data.get('align', False))
+
+
+def batch_request(data):
+    """
+    (texts, explain, align) of a batch request, given as a JSON array or as
+    {"texts": [...]}; a bare array takes the default options.
+    """
+    options = data if isinstance(data, dict) else {}
+    texts = data if isinstance(data, list) else options.get('texts')
+    if not isinstance(texts, list):
+        raise RequestError('No texts provided')
+    if len(texts) > MAX_BATCH_SIZE:
+        raise RequestError(f'Too many texts (max {MAX_BATCH_SIZE})', 413)
+    return texts, options.get('explain', False), bool(options.get('align', False))
+
+
+def tts_request(args):
+    """(text, variant) of a TTS request, from its JSON body or query string."""
+    if not isinstance(args, dict) or not args.get('text'):
+        raise RequestError('No text provided')
+    return args['text'], args.get('variant', 'br')
+
+
+def check_audio_key(key):
+    """Reject anything but the hex digest returned in X-TTS-Key."""
+    if len(key) != 64 or any(c not in '0123456789abcdef' for c in key):
+        raise RequestError('Invalid audio key')
+
+
+def tag_audio(response, key, cache_status=None):
+    """Add the audio cache headers to a TTS response."""
+    if cache_status:
+        response.headers['X-TTS-Cache'] = cache_status
+    response.headers['X-TTS-Key'] = key
+    return response
+
+
+def cacheable_audio(response, key, cache_status=None):
+    """Tag a complete clip and let clients cache it by its ETag."""
+    response.set_etag(key)
+    response.cache_control.public = True
+    response.cache_control.max_age = 86400
+    return tag_audio(response, key, cache_status)
+
+
+def correction_body(text, corrected_text, message):
+    return {'original': text, 'corrected': corrected_text, 'message': message}
+
+
+def colloquial_body(text, colloquial_text, message):
+    return {'original': text, 'colloquial': colloquial_text, 'message': message}
+
+
+def process_request(data):
+    """(text, correct, convert, use_llm) of a /api/process_text request."""
+    data = require_fields(data, 'text')
+    return data['text'], data.get('correct', False), data.get('convert', False), data.get('use_llm', False)
+
+
+def llm_conversion(colloquial_text, message):
+    """The 'conversion' of /api/process_text with use_llm."""
+    return {'text': colloquial_text, 'llm_based': True, 'message': message}
+
+
+def rule_conversion(conversion_result):
+    """The 'conversion' of /api/process_text without use_llm: a convert_text result."""
+    conversion_result['llm_based'] = False
+    return conversion_result
+
+
+def chat_request(data):
+    """(text, user_id) of a /api/chat request."""
+    data = require_fields(data, 'text')
+    # Clients that do not send a username share one tutor state
+    return data['text'], data.get('username', 'anonymous')
+
+
+def is_transform_request(user_text):
+    return any(keyword in user_text.lower() for keyword in TRANSFORM_KEYWORDS)
+
+
+def extract_text_messages(user_text):
+    """Messages asking the LLM for the text to transform, or NO_TEXT."""
+    return [
+        {"role": "system", "content": EXTRACT_TEXT_PROMPT},
+        {"role": "user", "content": user_text}
+    ]
+
+
+def explain_transform_messages(extracted_text):
+    """Messages asking the LLM to present the transformation of extracted_text."""
+    return [
+        {"role": "system", "content": EXPLAIN_TRANSFORM_PROMPT},
+        {"role": "user", "content": f"The user wants to transform this text: '{extracted_text}'"}
+    ]
+
+
+def transformation_body(explanation, extracted_text, llm_transformed, rule_based):
+    return {
+        'response': explanation,
+        'transformation': {
+            'original': extracted_text,
+            'llm': llm_transformed,
+            'rule_based': rule_based
+        }
+    }
+
+
+def ask_tutor(llm_processor, user_id, user_text):
+    """
+    Answer a tutor message with the user's stored state and save the state
+    it returns (blocking). Returns (response, is_portuguese, colloquial_text,
+    glossary) as ask_question does.
+    """
+    response, is_portuguese, colloquial_version, glossary, state = llm_processor.ask_question(
+        user_text, get_user_state(user_id))
+    save_user_state(user_id, state)
+    return response, is_portuguese, colloquial_version, glossary
+
+
+def shows_transformation(user_text, is_portuguese):
+    """Whether a chat answer includes the transformations of the message."""
+    # Portuguese that is not a command or a question
+    return is_portuguese and len(user_text.split()) > 3 and not user_text.endswith('?')
+
+
+def chat_body(response, glossary, colloquial_version=None, rule_based=None):
+    result = {'response': response, 'glossary': glossary}
+    if rule_based is not None:
+        result['transformation'] = {'llm': colloquial_version, 'rule_based': rule_based}
+    return result
+
+
+def ask_llm_request(data):
+    """(text, user_id) of a /api/ask_llm request."""
+    data = require_fields(data, 'text', 'username')
+    return data['text'], data['username']
+
+
+def ask_llm_body(response, is_portuguese, colloquial_version=None, rule_based=None):
+    result = {'response': response, 'is_portuguese': is_portuguese}
+    # The colloquial versions are only sent for Portuguese
+    if rule_based is not None:
+        result['colloquial'] = colloquial_version
+        result['rule_based'] = rule_based
+    return result
+
+
+def enqueue_twilio_message(form):
+    """
+    Queue an incoming WhatsApp message for a worker to convert and answer
+    (blocking); Twilio's retries of the same MessageSid are dropped.
+    """
+    try:
+        twilio_queue = services.get('twilio_queue')
+    except ServiceUnavailable:
+        logger.warning("Twilio webhook called but Twilio is not configured")
+        return {'error': 'Twilio is not configured'}, 503
+    if not twilio_queue.submit(form.get('MessageSid'), form):
+        logger.info(f"Duplicate Twilio webhook for {form.get('MessageSid')}")
+    return '', 200
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Incremental re-conversion for live typing.
+
+IncrementalConverter keeps a document as a list of sentence segments, each
+with its converted text. An edit re-tokenizes and re-converts only the
+segments it touches (plus a neighbour when the edit joins two sentences)
+and reports the change as one span of the previous output, so the work per
+keystroke depends on the sentence being typed, not on the document size.
+
+This is exact: phrases, word context and combinations never reach across a
+punctuation token (see portuguese_converter.split_sentences), so the joined
+segments are always equal to convert_text(document, explain=False)['after'].
+
+Offsets are str indices (Unicode code points).
+"""
+
+import os
+from bisect import bisect_right
+from itertools import accumulate
+
+from portuguese_converter import tokenize_text, split_sentences, convert_tokens, SENTENCE_END
+
+# Longest document a live session accepts, in characters
+LIVE_MAX_CHARS = int(os.getenv('LIVE_MAX_CHARS', '1000000'))
+
+# Segments per block; a block is split once it holds twice as many
+BLOCK_SIZE = 128
+
+
+class BlockSums:
+    """
+    Running sums of block lengths (a Fenwick tree): the start of a block and
+    the block holding a position in O(log blocks), and O(log blocks) updates
+    when a block's length changes.
+    """
+
+    def __init__(self, lengths):
+        self.size = len(lengths)
+        self.total = sum(lengths)
+        self.tree = [0, *lengths]
+        for i in range(1, self.size + 1):
+            parent = i + (i & -i)
+            if parent <= self.size:
+                self.tree[parent] += self.tree[i]
+
+    def add(self, block, delta):
+        self.total += delta
+        i = block + 1
+        while i <= self.size:
+            self.tree[i] += delta
+            i += i & -i
+
+    def start(self, block):
+        """Sum of the lengths of the blocks before `block`."""
+        total = 0
+        while block > 0:
+            total += self.tree[block]
+            block -= block & -block
+        return total
+
+    def find(self, position):
+        """(block, start of that block) for the block holding `position` < total."""
+        block = start = 0
+        step = 1 << (self.size.bit_length() - 1) if self.size else 0
+        while step:
+            i = block + step
+            if i <= self.size and start + self.tree[i] <= position:
+                block = i
+                start += self.tree[i]
+            step >>= 1
+        return block, start
+
+
+class IncrementalConverter:
+    """
+    The source text and converted output of one live document.
+
+    The text is split into segments, each ending with a sentence punctuation
+    token (apart from the last), kept in blocks of about BLOCK_SIZE:
+    texts[b][i] is the source of segment i of block b and outputs[b][i] its
+    converted text, and text_lengths[b] and output_lengths[b] the lengths of
+    the whole block. The source is never joined into one string; positions
+    are found from the running sums of the block lengths instead, so an
+    edit only touches its own block (and the sums, in O(log blocks)).
+    """
+
+    def __init__(self, text=''):
+        self.reset(text)
+
+    @property
+    def text(self):
+        return ''.join(''.join(block) for block in self.texts)
+
+    @property
+    def output(self):
+        return ''.join(''.join(block) for block in self.outputs)
+
+    def reset(self, text):
+        """Replace the whole document and return its converted text."""
+        if len(text) > LIVE_MAX_CHARS:
+            raise ValueError(f"Document too long (max {LIVE_MAX_CHARS} characters)")
+        texts, outputs, _ = self._convert(text, started=False)
+        self.texts = [texts[i:i + BLOCK_SIZE] for i in range(0, len(texts), BLOCK_SIZE)]
+        self.outputs = [outputs[i:i + BLOCK_SIZE] for i in range(0, len(outputs), BLOCK_SIZE)]
+        self.text_lengths = [sum(map(len, block)) for block in self.texts]
+        self.output_lengths = [sum(map(len, block)) for block in self.outputs]
+        self._sum_blocks()
+        return self.output
+
+    def edit(self, start, end, replacement):
+        """
+        Replace text[start:end] with `replacement`.
+
+        Returns (output_start, output_end, new_text): the converted text that
+        replaces output[output_start:output_end], trimmed to what changed.
+        The document is left as it was if the edit is rejected or fails.
+        """
+        size = self.text_sums.total
+        if not 0 <= start <= end <= size:
+            raise ValueError(f"Edit span {start}:{end} outside a text of {size} characters")
+        if size + len(replacement) - (end - start) > LIVE_MAX_CHARS:
+            raise ValueError(f"Document too long (max {LIVE_MAX_CHARS} characters)")
+
+        # The segments holding the characters on either side of the edit:
+        # inserted text can extend a word or punctuation lump on both sides
+        first_block, first, window_start = self._locate(start - 1) if start else (0, 0, 0)
+        if end < size:
+            last_block, last, _ = self._locate(end)
+        else:
+            last_block, last = len(self.texts) - 1, len(self.texts[-1]) - 1
+        old_texts = self._segments(self.texts, first_block, first, last_block, last)
+        old_outputs = self._segments(self.outputs, first_block, first, last_block, last)
+
+        # Re-convert them, taking in the next segment while the window no
+        # longer ends a sentence (the edit removed the sentence punctuation)
+        window = ''.join(old_texts)
+        window = window[:start - window_start] + replacement + window[end - window_start:]
+        started = first_block > 0 or first > 0
+        while True:
+            texts, outputs, complete = self._convert(window, started)
+            if complete or (last_block == len(self.texts) - 1 and last == len(self.texts[-1]) - 1):
+                break
+            last += 1
+            if last == len(self.texts[last_block]):
+                last_block, last = last_block + 1, 0
+            old_texts.append(self.texts[last_block][last])
+            old_outputs.append(self.outputs[last_block][last])
+            window += old_texts[-1]
+
+        old = ''.join(old_outputs)
+        new = ''.join(outputs)
+        out_start = self.output_sums.start(first_block) + sum(map(len, self.outputs[first_block][:first]))
+        self._replace(first_block, first, last_block, last, texts, outputs)
+
+        # Trim the unchanged ends so clients patch as little as possible
+        prefix = 0
+        limit = min(len(old), len(new))
+        while prefix < limit and old[prefix] == new[prefix]:
+            prefix += 1
+        suffix = 0
+        limit -= prefix
+        while suffix < limit and old[-1 - suffix] == new[-1 - suffix]:
+            suffix += 1
+        return out_start + prefix, out_start + len(old) - suffix, new[prefix:len(new) - suffix]
+
+    def _locate(self, position):
+        """(block, index, text position) of the segment holding text[position]."""
+        block, block_start = self.text_sums.find(position)
+        ends = list(accumulate(map(len, self.texts[block]), initial=block_start))
+        index = bisect_right(ends, position) - 1
+        return block, index, ends[index]
+
+    def _offsets(self, block, index):
+        """(text position, output position) where segment `index` of `block` starts."""
+        return (self.text_sums.start(block) + sum(map(len, self.texts[block][:index])),
+                self.output_sums.start(block) + sum(map(len, self.outputs[block][:index])))
+
+    @staticmethod
+    def _segments(blocks, first_block, first, last_block, last):
+        """The segments from blocks[first_block][first] to blocks[last_block][last]."""
+        if first_block == last_block:
+            return blocks[first_block][first:last + 1]
+        segments = blocks[first_block][first:]
+        for block in blocks[first_block + 1:last_block]:
+            segments += block
+        return segments + blocks[last_block][:last + 1]
+
+    def _replace(self, first_block, first, last_block, last, texts, outputs):
+        """Replace the segments from (first_block, first) to (last_block, last)."""
+        merged_texts = self.texts[first_block][:first] + texts + self.texts[last_block][last + 1:]
+        merged_outputs = self.outputs[first_block][:first] + outputs + self.outputs[last_block][last + 1:]
+        if first_block == last_block and len(merged_texts) < 2 * BLOCK_SIZE:
+            # The usual case: one block changes length
+            self.texts[first_block] = merged_texts
+            self.outputs[first_block] = merged_outputs
+            for lengths, sums, block in ((self.text_lengths, self.text_sums, merged_texts),
+                                         (self.output_lengths, self.output_sums, merged_outputs)):
+                length = sum(map(len, block))
+                sums.add(first_block, length - lengths[first_block])
+                lengths[first_block] = length
+            return
+        # The edit spans blocks or overfills one: re-block these segments
+        text_blocks = [merged_texts[i:i + BLOCK_SIZE] for i in range(0, len(merged_texts), BLOCK_SIZE)]
+        output_blocks = [merged_outputs[i:i + BLOCK_SIZE] for i in range(0, len(merged_outputs), BLOCK_SIZE)]
+        self.texts[first_block:last_block + 1] = text_blocks
+        self.outputs[first_block:last_block + 1] = output_blocks
+        self.text_lengths[first_block:last_block + 1] = [sum(map(len, block)) for block in text_blocks]
+        self.output_lengths[first_block:last_block + 1] = [sum(map(len, block)) for block in output_blocks]
+        self._sum_blocks()
+
+    def _sum_blocks(self):
+        """Rebuild the running sums from the block lengths, after blocks were added or removed."""
+        self.text_sums = BlockSums(self.text_lengths)
+        self.output_sums = BlockSums(self.output_lengths)
+
+    @staticmethod
+    def _convert(text, started):
+        """
+        Convert `text` as consecutive segments; started tells whether they
+        follow earlier output. Returns (texts, outputs, complete), where
+        complete tells whether the last segment ends a sentence.
+        """
+        tokens = tokenize_text(text.replace('\xa0', ' '))
+        if not tokens:
+            return [text], [''], False
+
+        texts = []
+        outputs = []
+        segment_start = 0
+        for sentence in split_sentences(tokens):
+            segment_end = sentence[-1].end
+            texts.append(text[segment_start:segment_end])
+            segment_start = segment_end
+            # Only the document's first segment starts the output
+            outputs.append(convert_tokens(sentence, started=started or len(outputs) > 0))
+        # The last segment runs to the end of the window
+        texts[-1] += text[segment_start:]
+        last_punct = tokens[-1].punct
+        return texts, outputs, bool(last_punct) and not SENTENCE_END.isdisjoint(last_punct)
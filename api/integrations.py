@@ -0,0 +1,77 @@
+"""
+Configuration and lazily constructed integrations shared by the Flask app
+(app.py) and the ASGI app (asgi.py).
+"""
+
+import os
+from dotenv import load_dotenv
+
+from services import ServiceRegistry
+
+load_dotenv()
+
+# Upper bound on the number of texts accepted by the batch endpoint
+MAX_BATCH_SIZE = int(os.getenv('MAX_BATCH_SIZE', '10000'))
+
+# Synthesized audio cache: bytes kept in memory, directory and byte budget on
+# disk (an empty TTS_CACHE_DIR keeps the cache in memory only)
+TTS_CACHE_MEMORY_BYTES = int(os.getenv('TTS_CACHE_MEMORY_BYTES', str(32 * 1024 * 1024)))
+TTS_CACHE_DIR = os.getenv('TTS_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tts_cache'))
+TTS_CACHE_DISK_BYTES = int(os.getenv('TTS_CACHE_DISK_BYTES', str(512 * 1024 * 1024)))
+
+
+# Integrations are imported and constructed on first use, so a worker that
+# only serves the rule-based converter never loads the OpenAI or Twilio SDKs
+def create_twilio_handler():
+    from twilio_handler import TwilioHandler
+    return TwilioHandler()
+
+
+def create_twilio_queue(convert=None):
+    """
+    Durable queue and worker pool that answer WhatsApp messages; needs Twilio.
+    `convert` replaces the in-thread conversion (see TwilioHandler.handle_message).
+    """
+    import atexit
+    from message_queue import MessageQueue, WorkerPool
+    twilio = services.get('twilio')
+
+    def handle(payload):
+        if convert is None:
+            twilio.handle_message(payload)
+        else:
+            twilio.handle_message(payload, convert)
+
+    pool = WorkerPool(MessageQueue(), handle)
+    pool.start()
+    atexit.register(pool.stop, 5)
+    return pool
+
+
+def create_llm_processor():
+    from llm_processor import LLMProcessor
+    return LLMProcessor()
+
+
+def create_tts():
+    from tts_converter import TTSConverter
+    return TTSConverter()
+
+
+def create_async_tts():
+    from tts_converter import AsyncTTSConverter
+    return AsyncTTSConverter()
+
+
+def create_tts_cache():
+    from audio_cache import AudioCache
+    return AudioCache(TTS_CACHE_MEMORY_BYTES, TTS_CACHE_DIR or None, TTS_CACHE_DISK_BYTES)
+
+
+services = ServiceRegistry()
+services.register('twilio', create_twilio_handler)
+services.register('twilio_queue', create_twilio_queue)
+services.register('llm_processor', create_llm_processor)
+services.register('tts', create_tts)
+services.register('async_tts', create_async_tts)
+services.register('tts_cache', create_tts_cache)
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Offline Portuguese detector.
+
+Answers the same question as the tutor's LLM detection call ("does this text
+contain Portuguese, even partially?") from the vocabulary the converter
+already ships: the phonetic dictionary, irregular verbs, word pairs, every
+verb root × ending form and a seed list of frequent words (config/
+language_words.py), plus Portuguese diacritics and digraphs. Each word is
+evidence for Portuguese or for English; the detector returns a decision and
+a confidence, and callers fall back to the LLM when the confidence is below
+DETECT_THRESHOLD.
+"""
+
+import os
+import re
+
+from lexicon import LEXICON
+
+PORTUGUESE_VOCABULARY = LEXICON['portuguese_vocabulary']
+ENGLISH_VOCABULARY = LEXICON['english_vocabulary']
+
+# Below this confidence the caller should ask the LLM instead
+DETECT_THRESHOLD = float(os.getenv('LANGUAGE_DETECT_THRESHOLD', '0.7'))
+
+_WORD = re.compile(r"[^\W\d_]+")
+_DIACRITICS = frozenset('ãõçáéíóúâêôàü')
+_DIGRAPHS = ('nh', 'lh')
+
+# Evidence weights
+KNOWN_WORD = 1.0
+DIACRITIC_WORD = 2.0
+DIGRAPH_WORD = 0.5
+
+
+def word_evidence(word):
+    """Return (portuguese, english) evidence for one lowercase word."""
+    if word in PORTUGUESE_VOCABULARY:
+        return (DIACRITIC_WORD if _DIACRITICS.intersection(word) else KNOWN_WORD), 0.0
+    if word in ENGLISH_VOCABULARY:
+        return 0.0, KNOWN_WORD
+    if _DIACRITICS.intersection(word):
+        return DIACRITIC_WORD, 0.0
+    if len(word) > 3 and any(digraph in word for digraph in _DIGRAPHS):
+        return DIGRAPH_WORD, 0.0
+    return 0.0, 0.0
+
+
+def detect_portuguese(text):
+    """
+    Decide whether text contains Portuguese.
+
+    Returns (is_portuguese, confidence) with confidence in [0, 1]. Any
+    Portuguese evidence makes the text Portuguese; confidence grows with the
+    amount of evidence and shrinks as the English share of it grows. Text with
+    no evidence either way gets confidence 0.
+    """
+    portuguese = english = 0.0
+    for word in _WORD.findall(text.lower()):
+        pt, en = word_evidence(word)
+        portuguese += pt
+        english += en
+
+    if portuguese:
+        share = portuguese / (portuguese + english)
+        return True, (1 - 0.3 ** portuguese) * (0.6 + 0.4 * share)
+    return False, 1 - 0.3 ** english
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Prebuilt lexicon snapshot.
+
+Every table under config/ and the indexes derived from them (verb forms,
+phrase trie, compiled rule table) are built once and pickled into a single
+versioned snapshot file, so a new worker loads them with one read instead of
+importing the config literals and rebuilding the indexes.
+
+The snapshot records a fingerprint of its source files (config/*.py and this
+module). If it is missing, unreadable or stale, the lexicon is rebuilt from
+the sources and the snapshot rewritten.
+
+Build step (from the api/ directory), run by the deploy workflow and the
+Replit deployment build so that read-only deployments start from a fresh
+snapshot:
+    python lexicon.py
+"""
+
+import glob
+import hashlib
+import logging
+import os
+import pickle
+import re
+import sys
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+# Bump when the layout of the lexicon dict changes
+SNAPSHOT_VERSION = 3
+
+API_DIR = os.path.dirname(os.path.abspath(__file__))
+CONFIG_DIR = os.path.join(API_DIR, 'config')
+SNAPSHOT_PATH = os.getenv('LEXICON_SNAPSHOT', os.path.join(API_DIR, 'lexicon.pickle'))
+
+# How a compiled rule is matched: plain string operations where the pattern is
+# a literal, a precompiled regex otherwise
+MATCH_PREFIX = 0
+MATCH_SUFFIX = 1
+MATCH_ANYWHERE = 2
+MATCH_REGEX = 3
+
+# Marks the end of a phrase in the phrase index (None can never be a word)
+PHRASE_END = None
+
+
+def _is_literal(text):
+    return not any(c in text for c in '\\.^$*+?{}[]()|')
+
+
+def compile_rule(rule_id, pattern, repl, explanation, condition):
+    """
+    Compile one PHONETIC_RULES entry into (kind, target, repl, rule_id, condition);
+    the explanation is looked up by rule_id when a result is rendered (rule_ids.py).
+    Literal patterns anchored at the start, the end or not at all are turned into
+    startswith/endswith/replace operations; everything else gets a compiled regex.
+    """
+    if '\\' not in repl:
+        if pattern.startswith('^') and _is_literal(pattern[1:]):
+            return MATCH_PREFIX, pattern[1:], repl, rule_id, condition
+        if pattern.endswith('$') and _is_literal(pattern[:-1]):
+            return MATCH_SUFFIX, pattern[:-1], repl, rule_id, condition
+        if _is_literal(pattern):
+            return MATCH_ANYWHERE, pattern, repl, rule_id, condition
+    return MATCH_REGEX, re.compile(pattern), repl, rule_id, condition
+
+
+def build_verb_forms(roots, endings, irregular_verbs):
+    """
+    Precompute every word is_verb accepts: irregular verbs (both the standard
+    forms and their colloquial spellings) plus every root × ending combination.
+    """
+    forms = set(irregular_verbs)
+    forms.update(irregular_verbs.values())
+    forms.update(root + end for root in roots for end in endings)
+    return frozenset(forms)
+
+
+def build_phrase_index(phrases):
+    """
+    Build a token-level trie from a {phrase: replacement} mapping such as
+    WORD_PAIRS. Each level is a dict keyed by one lowercase word; the node
+    reached by a phrase's last word stores (phrase, replacement) under
+    PHRASE_END. Phrases can have any number of words (at least two).
+    """
+    index = {}
+    for phrase, replacement in phrases.items():
+        words = phrase.split()
+        if len(words) < 2:
+            continue
+        node = index
+        for word in words:
+            node = node.setdefault(word, {})
+        node[PHRASE_END] = (' '.join(words), replacement)
+    return index
+
+
+def build_detector_vocabulary(phonetic_dictionary, irregular_verbs, word_pairs, verb_forms,
+                               portuguese_words, english_words):
+    """
+    Word sets for the language detector: every Portuguese word the conversion
+    tables know, and the English seed list, with words on both sides removed.
+    """
+    portuguese = set(portuguese_words)
+    portuguese.update(phonetic_dictionary)
+    portuguese.update(irregular_verbs)
+    portuguese.update(verb_forms)
+    for phrase in word_pairs:
+        portuguese.update(phrase.split())
+    english = set(english_words)
+    ambiguous = portuguese & english
+    return frozenset(portuguese - ambiguous), frozenset(english - ambiguous)
+
+
+def build_lexicon():
+    """Import the config tables and build every derived index from them."""
+    from config.phonetic_dict import PHONETIC_DICTIONARY
+    from config.irregular_verbs import IRREGULAR_VERBS
+    from config.word_pairs import WORD_PAIRS
+    from config.verb_patterns import (BASIC_VERB_ROOTS, ACTION_VERB_ROOTS,
+                                      COGNITIVE_VERB_ROOTS, PROCESS_VERB_ROOTS,
+                                      ALL_ENDINGS)
+    from config.rule_table import PHONETIC_RULES, ENTRAR_FORMS
+    from config.language_words import PORTUGUESE_WORDS, ENGLISH_WORDS
+
+    all_roots = BASIC_VERB_ROOTS | ACTION_VERB_ROOTS | COGNITIVE_VERB_ROOTS | PROCESS_VERB_ROOTS
+    verb_forms = build_verb_forms(all_roots, ALL_ENDINGS, IRREGULAR_VERBS)
+    portuguese_vocabulary, english_vocabulary = build_detector_vocabulary(
+        PHONETIC_DICTIONARY, IRREGULAR_VERBS, WORD_PAIRS, verb_forms, PORTUGUESE_WORDS, ENGLISH_WORDS)
+    return {
+        'phonetic_dictionary': PHONETIC_DICTIONARY,
+        'irregular_verbs': IRREGULAR_VERBS,
+        'word_pairs': WORD_PAIRS,
+        'all_roots': all_roots,
+        'all_endings': ALL_ENDINGS,
+        'entrar_forms': ENTRAR_FORMS,
+        'verb_forms': verb_forms,
+        'phrase_index': build_phrase_index(WORD_PAIRS),
+        'compiled_rules': tuple(compile_rule(*rule) for rule in PHONETIC_RULES),
+        'portuguese_vocabulary': portuguese_vocabulary,
+        'english_vocabulary': english_vocabulary,
+    }
+
+
+def source_files():
+    """The files a snapshot is built from, in a stable order."""
+    return sorted(glob.glob(os.path.join(CONFIG_DIR, '*.py'))) + [os.path.abspath(__file__)]
+
+
+def fingerprint():
+    """Hash of the snapshot format, the Python version and every source file."""
+    digest = hashlib.sha256()
+    digest.update(f"{SNAPSHOT_VERSION}:{sys.version_info[0]}.{sys.version_info[1]}".encode())
+    for path in source_files():
+        digest.update(os.path.basename(path).encode())
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def read_snapshot(path, expected_fingerprint):
+    """Return the lexicon stored at path, or None if it is missing, broken or stale."""
+    try:
+        with open(path, 'rb') as f:
+            snapshot = pickle.loads(f.read())
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable lexicon snapshot {path}: {e}")
+        return None
+    if not isinstance(snapshot, dict) or snapshot.get('version') != SNAPSHOT_VERSION \
+            or snapshot.get('fingerprint') != expected_fingerprint:
+        logger.info(f"Lexicon snapshot {path} is stale, rebuilding")
+        return None
+    return snapshot['lexicon']
+
+
+def write_snapshot(lexicon, path, snapshot_fingerprint):
+    """Atomically write the lexicon to path."""
+    data = pickle.dumps({
+        'version': SNAPSHOT_VERSION,
+        'fingerprint': snapshot_fingerprint,
+        'lexicon': lexicon,
+    }, protocol=pickle.HIGHEST_PROTOCOL)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return len(data)
+
+
+def load_lexicon(path=SNAPSHOT_PATH):
+    """
+    Load the lexicon from the snapshot at path, rebuilding it from the config
+    sources (and rewriting the snapshot when possible) if it is stale.
+    """
+    expected = fingerprint()
+    lexicon = read_snapshot(path, expected)
+    if lexicon is None:
+        lexicon = build_lexicon()
+        try:
+            write_snapshot(lexicon, path, expected)
+        except OSError as e:
+            logger.warning(f"Could not write lexicon snapshot {path}: {e}")
+    return lexicon
+
+
+LEXICON = load_lexicon()
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else SNAPSHOT_PATH
+    size = write_snapshot(build_lexicon(), path, fingerprint())
+    print(f"Wrote lexicon snapshot {path} ({size} bytes)")
+
+
+if __name__ == "__main__":
+    main()
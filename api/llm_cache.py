@@ -0,0 +1,141 @@
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+from lru_cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_input(text):
+    """NFC-normalize and collapse whitespace, so trivially different inputs share an entry."""
+    return _WHITESPACE.sub(' ', unicodedata.normalize('NFC', text)).strip()
+
+
+def llm_cache_key(operation, model, prompt_version, text):
+    payload = json.dumps([operation, model, prompt_version, normalize_input(text)], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class LLMCache:
+    """
+    Cache for LLM completions keyed by llm_cache_key.
+
+    Entries expire `ttl` seconds after they were stored. The in-process tier
+    is an LRUCache of (expires_at, value). If `db_path` is given, entries are
+    also written to a SQLite table that every worker on the host shares; a
+    memory miss falls back to it and promotes the entry. SQLite errors are
+    logged and treated as misses, so the database never fails a request.
+    """
+
+    def __init__(self, maxsize=2048, ttl=86400, db_path=None):
+        self.memory = LRUCache(maxsize)
+        self.ttl = ttl
+        self.db_path = db_path
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        if db_path:
+            try:
+                self._db().execute(
+                    "CREATE TABLE IF NOT EXISTS llm_cache ("
+                    "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)")
+            except sqlite3.Error as e:
+                logger.warning(f"LLM cache database {db_path} unavailable: {e}")
+                self.db_path = None
+
+    def _db(self):
+        # One connection per thread; sqlite3 connections are not shareable
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        """Return the cached value for key, or None if it is missing or expired."""
+        now = time.time()
+        entry = self.memory.get(key)
+        if entry is not None and entry[0] > now:
+            with self._lock:
+                self.memory_hits += 1
+            return entry[1]
+        if self.db_path:
+            try:
+                row = self._db().execute(
+                    "SELECT value, expires_at FROM llm_cache WHERE key = ? AND expires_at > ?",
+                    (key, now)).fetchone()
+            except sqlite3.Error as e:
+                logger.warning(f"LLM cache read failed: {e}")
+                row = None
+            if row is not None:
+                value = json.loads(row[0])
+                self.memory.put(key, (row[1], value))
+                with self._lock:
+                    self.db_hits += 1
+                return value
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, value):
+        """Store a JSON-serializable value under key for ttl seconds."""
+        expires_at = time.time() + self.ttl
+        self.memory.put(key, (expires_at, value))
+        if self.db_path:
+            try:
+                self._db().execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(value, ensure_ascii=False), expires_at))
+            except sqlite3.Error as e:
+                logger.warning(f"LLM cache write failed: {e}")
+
+    def purge_expired(self):
+        """Delete expired rows from the database; returns how many were removed."""
+        if not self.db_path:
+            return 0
+        try:
+            return self._db().execute("DELETE FROM llm_cache WHERE expires_at <= ?", (time.time(),)).rowcount
+        except sqlite3.Error as e:
+            logger.warning(f"LLM cache purge failed: {e}")
+            return 0
+
+    def clear(self):
+        self.memory.clear()
+        if self.db_path:
+            try:
+                self._db().execute("DELETE FROM llm_cache")
+            except sqlite3.Error as e:
+                logger.warning(f"LLM cache clear failed: {e}")
+        with self._lock:
+            self.memory_hits = 0
+            self.db_hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Hit/miss counts per tier and the overall hit rate."""
+        memory = self.memory.stats()
+        with self._lock:
+            hits = self.memory_hits + self.db_hits
+            lookups = hits + self.misses
+            return {
+                'memory_hits': self.memory_hits,
+                'db_hits': self.db_hits,
+                'misses': self.misses,
+                'hit_rate': hits / lookups if lookups else 0.0,
+                'size': memory['size'],
+                'maxsize': memory['maxsize'],
+                'ttl': self.ttl,
+                'persistent': bool(self.db_path),
+            }
@@ -1,15 +1,103 @@
+import copy
 import os
 print("DEBUG: Running llm_processor.py from:", os.path.abspath(__file__))
 import re
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 from dotenv import load_dotenv
 import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from llm_cache import LLMCache, llm_cache_key
+from language_detector import detect_portuguese, DETECT_THRESHOLD
 
 logger = logging.getLogger(__name__)
 
+# Completion cache for correct_text and transform_to_colloquial: entries,
+# seconds to live, and an optional SQLite file shared by every worker
+LLM_CACHE_SIZE = int(os.getenv('LLM_CACHE_SIZE', '2048'))
+LLM_CACHE_TTL = float(os.getenv('LLM_CACHE_TTL', '86400'))
+LLM_CACHE_DB = os.getenv('LLM_CACHE_DB', '')
+# Threads running the independent LLM calls of ask_question concurrently.
+# Each ask_question submits one task, so this defaults to the number of
+# requests the ASGI server runs at once; past that, tasks run inline
+LLM_POOL_WORKERS = int(os.getenv('LLM_POOL_WORKERS', os.getenv('ASGI_BLOCKING_THREADS', '32')))
+
+_executor = None
+_executor_lock = threading.Lock()
+# Pool threads not yet claimed by a submitted task
+_idle_workers = threading.BoundedSemaphore(LLM_POOL_WORKERS)
+
+
+def get_executor():
+    """Process-wide pool for concurrent LLM calls, created on first use."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=LLM_POOL_WORKERS, thread_name_prefix='llm')
+    return _executor
+
+
+def submit_timed(timings, stage, fn, *args):
+    """
+    Run timed(timings, stage, fn, *args) on the pool, returning its future.
+
+    A task never waits behind others: when every pool thread is busy it runs
+    inline and the returned future is already done. The time a pooled task
+    waited for its thread is recorded under timings[stage + '_queued'].
+    """
+    if not _idle_workers.acquire(blocking=False):
+        logger.debug(f"LLM pool saturated ({LLM_POOL_WORKERS} threads), running {stage} inline")
+        timings[stage + '_queued'] = 'inline'
+        future = Future()
+        try:
+            future.set_result(timed(timings, stage, fn, *args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    submitted = time.perf_counter()
+
+    def task():
+        timings[stage + '_queued'] = round((time.perf_counter() - submitted) * 1000, 1)
+        try:
+            return timed(timings, stage, fn, *args)
+        finally:
+            _idle_workers.release()
+
+    try:
+        return get_executor().submit(task)
+    except BaseException:
+        _idle_workers.release()
+        raise
+
+
+def timed(timings, stage, fn, *args):
+    """Call fn(*args), recording its wall time in milliseconds under timings[stage]."""
+    start = time.perf_counter()
+    try:
+        return fn(*args)
+    finally:
+        timings[stage] = round((time.perf_counter() - start) * 1000, 1)
+
 
 class LLMProcessor:
 
+    MODEL = "gpt-4.1-mini"
+    # Bump when a cached operation's prompt or parameters change
+    PROMPT_VERSION = 1
+
+    CORRECT_TEXT_PROMPT = "You are a helpful assistant that corrects typos, syntax, and grammar issues in Portuguese text. Keep the overall meaning intact. Return only the corrected text without explanations."
+    COLLOQUIAL_PROMPT = "You are an expert in Brazilian Portuguese, transforming formal text into concise speech Brazilian Portuguese. Apply common speech patterns, contractions, and informal expressions without changing the meaning."
+
+    # Cached single-prompt rewrites: operation -> (system prompt, temperature, success message)
+    REWRITES = {
+        'correct_text': (CORRECT_TEXT_PROMPT, 0.2, "Text corrected successfully"),
+        'transform_to_colloquial': (COLLOQUIAL_PROMPT, 0.7,
+                                    "Text transformed to concise Brazilian Portuguese speech successfully"),
+    }
+
     def __init__(self):
         load_dotenv()
         self.api_key = os.getenv('OPENAI_API_KEY')
@@ -17,12 +105,12 @@ class LLMProcessor:
         if not self.api_key:
             logger.warning("Warning: OPENAI_API_KEY not found in environment")
             self.client = None
+            self.async_client = None
         else:
             self.client = OpenAI(api_key=self.api_key)
+            self.async_client = AsyncOpenAI(api_key=self.api_key)
 
-        # Track the current lesson and subtopic
-        self.current_lesson = 1
-        self.current_subtopic = "A"  # Start with the first subtopic
+        self.cache = LLMCache(LLM_CACHE_SIZE, LLM_CACHE_TTL, LLM_CACHE_DB or None)
 
         self.portuguese_tutor_prompt = """You are a helpful and friendly Portuguese tutor following a structured syllabus.
 
@@ -117,6 +205,63 @@ Definite Articles (Lesson 2):
 
 """
 
+    def _rewrite_request(self, operation, text):
+        prompt, temperature, _ = self.REWRITES[operation]
+        return dict(
+            model=self.MODEL,
+            messages=[{
+                "role": "system",
+                "content": prompt
+            }, {
+                "role": "user",
+                "content": text
+            }],
+            temperature=temperature)
+
+    def _rewrite(self, operation, text):
+        """Run a cached single-prompt rewrite (see REWRITES); returns (text, message)."""
+        if not self.client:
+            return text, "API key not configured"
+
+        success = self.REWRITES[operation][2]
+        key = llm_cache_key(operation, self.MODEL, self.PROMPT_VERSION, text)
+        rewritten = self.cache.get(key)
+        if rewritten is not None:
+            return rewritten, success
+
+        try:
+            response = self.client.chat.completions.create(**self._rewrite_request(operation, text))
+            rewritten = response.choices[0].message.content
+            if rewritten is not None:
+                self.cache.put(key, rewritten)
+            return rewritten, success
+
+        except Exception as e:
+            logger.error(f"Error in {operation}: {str(e)}")
+            return text, f"Error: {str(e)}"
+
+    async def _arewrite(self, operation, text):
+        """_rewrite on the async client, sharing the same cache."""
+        if not self.async_client:
+            return text, "API key not configured"
+
+        success = self.REWRITES[operation][2]
+        key = llm_cache_key(operation, self.MODEL, self.PROMPT_VERSION, text)
+        rewritten = self.cache.get(key)
+        if rewritten is not None:
+            return rewritten, success
+
+        try:
+            response = await self.async_client.chat.completions.create(**self._rewrite_request(operation, text))
+            rewritten = response.choices[0].message.content
+            if rewritten is not None:
+                self.cache.put(key, rewritten)
+            return rewritten, success
+
+        except Exception as e:
+            logger.error(f"Error in {operation}: {str(e)}")
+            return text, f"Error: {str(e)}"
+
     def correct_text(self, text):
         """
         Use LLM to correct typos, syntax, and grammar in the given text.
@@ -127,29 +272,7 @@ Definite Articles (Lesson 2):
         Returns:
             tuple: (corrected_text, message)
         """
-        if not self.client:
-            return text, "API key not configured"
-
-        try:
-            response = self.client.chat.completions.create(
-                model="gpt-4.1-mini",
-                messages=[{
-                    "role":
-                    "system",
-                    "content":
-                    "You are a helpful assistant that corrects typos, syntax, and grammar issues in Portuguese text. Keep the overall meaning intact. Return only the corrected text without explanations."
-                }, {
-                    "role": "user",
-                    "content": text
-                }],
-                temperature=0.2)
-
-            corrected_text = response.choices[0].message.content
-            return corrected_text, "Text corrected successfully"
-
-        except Exception as e:
-            logger.error(f"Error in correct_text: {str(e)}")
-            return text, f"Error: {str(e)}"
+        return self._rewrite('correct_text', text)
 
     def transform_to_colloquial(self, text):
         """
@@ -161,29 +284,15 @@ Definite Articles (Lesson 2):
         Returns:
             tuple: (transformed_text, message)
         """
-        if not self.client:
-            return text, "API key not configured"
-
-        try:
-            response = self.client.chat.completions.create(
-                model="gpt-4.1-mini",
-                messages=[{
-                    "role":
-                    "system",
-                    "content":
-                    "You are an expert in Brazilian Portuguese, transforming formal text into concise speech Brazilian Portuguese. Apply common speech patterns, contractions, and informal expressions without changing the meaning."
-                }, {
-                    "role": "user",
-                    "content": text
-                }],
-                temperature=0.7)
+        return self._rewrite('transform_to_colloquial', text)
 
-            transformed_text = response.choices[0].message.content
-            return transformed_text, "Text transformed to concise Brazilian Portuguese speech successfully"
+    async def acorrect_text(self, text):
+        """Async correct_text, for the ASGI app."""
+        return await self._arewrite('correct_text', text)
 
-        except Exception as e:
-            logger.error(f"Error in transform_to_colloquial: {str(e)}")
-            return text, f"Error: {str(e)}"
+    async def atransform_to_colloquial(self, text):
+        """Async transform_to_colloquial, for the ASGI app."""
+        return await self._arewrite('transform_to_colloquial', text)
 
     def extract_portuguese_words(self, text):
         """
@@ -257,11 +366,51 @@ IMPORTANT INSTRUCTIONS:
             logger.error(f"Error in extract_portuguese_words: {str(e)}")
             return []
 
-    def ask_question(self, question):
+    @staticmethod
+    def new_state():
+        """Tutor state of a user who has not started the syllabus."""
+        return {
+            'current_lesson': 1,
+            'current_subtopic': "A",  # Start with the first subtopic
+            'user_info': {},
+        }
+
+    def ask_question(self, question, state=None):
+        """
+        Answer a tutor message for one user.
+
+        `state` is that user's tutor state (see new_state; None starts a new
+        user). It is not modified; the updated copy is returned, as
+        (response, is_portuguese, colloquial_text, glossary, state). When an
+        LLM call fails the response is "Error: ..." and the state returned
+        is the one passed in, so the user does not skip what they missed.
+
+        The LLM calls form a small dependency graph: detection (local, with
+        the LLM only when the detector is unsure) decides the branch; for
+        Portuguese input the colloquial transform of the question runs on the
+        pool alongside the tutor response (inline first, if the pool is
+        saturated); the glossary needs the response. Latency is therefore
+        detection + max(response, transform) + glossary. Per-stage timings,
+        including the transform's wait for a pool thread, are logged.
+        """
         print("DEBUG: ask_question method -- LOCAL VERSION RUNNING")
+        state = state or self.new_state()
         if not self.client:
-            return "Sorry, API key not configured.", False, None, []
+            return "Sorry, API key not configured.", False, None, [], state
 
+        timings = {}
+        start = time.perf_counter()
+        try:
+            new_state = copy.deepcopy(state)
+            return (*self._ask_question(question, new_state, timings), new_state)
+        except Exception as e:
+            # The state only advances with an answer the user gets to see
+            return f"Error: {str(e)}", False, None, [], state
+        finally:
+            timings['total'] = round((time.perf_counter() - start) * 1000, 1)
+            logger.info(f"ask_question timings (ms): {timings}")
+
+    def _ask_question(self, question, state, timings):
         try:
             # Check if the user is showing agreement to start the syllabus or progress to next topic
             agreement_words = [
@@ -283,12 +432,12 @@ IMPORTANT INSTRUCTIONS:
                 }
 
                 # Use the current_subtopic to determine what to teach next
-                current_topic = subtopics[self.current_subtopic]
+                current_topic = subtopics[state['current_subtopic']]
 
                 # We will automatically move to next subtopic when the user demonstrates using the current one
 
                 # Generate response based on current topic
-                syllabus_response = self.client.chat.completions.create(
+                syllabus_response = timed(timings, 'response', lambda: self.client.chat.completions.create(
                     model="gpt-4.1-mini",
                     messages=[{
                         "role":
@@ -305,29 +454,32 @@ IMPORTANT INSTRUCTIONS:
                         "role": "user",
                         "content": question
                     }],
-                    temperature=0.5)
+                    temperature=0.5))
 
                 return syllabus_response.choices[
                     0].message.content, False, None, []
 
-            # First determine if the text contains Portuguese
-            detect_response = self.client.chat.completions.create(
-                model="gpt-4.1-mini",
-                messages=[{
-                    "role":
-                    "system",
-                    "content":
-                    "You are a language detection assistant. Your only job is to determine if\
-                    text contains Portuguese. Respond with 'YES' if the text is in Portuguese\
-                    (even partially), and 'NO' if it's not."
-                }, {
-                    "role": "user",
-                    "content": question
-                }],
-                temperature=0.1)
+            # First determine if the text contains Portuguese, locally when
+            # the detector is confident and with the LLM otherwise
+            is_portuguese, confidence = timed(timings, 'detect_local', detect_portuguese, question)
+            if confidence < DETECT_THRESHOLD:
+                detect_response = timed(timings, 'detect', lambda: self.client.chat.completions.create(
+                    model="gpt-4.1-mini",
+                    messages=[{
+                        "role":
+                        "system",
+                        "content":
+                        "You are a language detection assistant. Your only job is to determine if\
+                        text contains Portuguese. Respond with 'YES' if the text is in Portuguese\
+                        (even partially), and 'NO' if it's not."
+                    }, {
+                        "role": "user",
+                        "content": question
+                    }],
+                    temperature=0.1))
 
-            message_content = detect_response.choices[0].message.content
-            is_portuguese = "YES" in message_content.upper() if message_content is not None else False
+                message_content = detect_response.choices[0].message.content
+                is_portuguese = "YES" in message_content.upper() if message_content is not None else False
 
             # Additional instruction to focus strictly on the curriculum sequence
             sequence_instruction = "IMPORTANT: Never invite the user to divert from the established learning sequence. Always stay focused on offering the next step in the syllabus process. Only move forward once the user demonstrates understanding of the current topic."
@@ -357,19 +509,19 @@ IMPORTANT INSTRUCTIONS:
                 system_prompt = self.portuguese_tutor_prompt + "\n\n" + sequence_instruction
 
                 # Track user information
-                self.user_info = getattr(self, 'user_info', {})
+                user_info = state['user_info']
 
-                current_pattern = subtopics[self.current_subtopic][0].lower()
+                current_pattern = subtopics[state['current_subtopic']][0].lower()
                 # Check if user has demonstrated the current topic correctly
                 has_demonstrated = current_pattern in question.lower()
                 is_correct = has_demonstrated
 
                 # Ensure we're following the proper sequence (A→B→C→D→review)
                 expected_subtopic_sequence = ["A", "B", "C", "D", "review"]
-                current_index = expected_subtopic_sequence.index(self.current_subtopic) if self.current_subtopic in expected_subtopic_sequence else 0
+                current_index = expected_subtopic_sequence.index(state['current_subtopic']) if state['current_subtopic'] in expected_subtopic_sequence else 0
 
                 # More specific validation for each subtopic
-                if self.current_subtopic == "A" and has_demonstrated:
+                if state['current_subtopic'] == "A" and has_demonstrated:
                     # Simple presence check for "Eu sou [something]" is sufficient
                     is_correct = True
                     # Extract the user's name from the input
@@ -388,11 +540,11 @@ IMPORTANT INSTRUCTIONS:
                             user_name = name_match.group(1).capitalize()
 
                         # Store user's name for future references
-                        self.user_info['name'] = user_name
+                        user_info['name'] = user_name
 
                         # Add acknowledgment with improved formatting guidance
                         system_prompt += f"\n\nThe user has shared their name as '{user_name}'. Begin your response by acknowledging this with 'Thank you for sharing your name, {user_name}!' before continuing with the next lesson step. Use separate paragraphs for clarity - do not bundle the acknowledgment, explanation, and examples into a single paragraph."
-                elif self.current_subtopic == "B" and has_demonstrated:
+                elif state['current_subtopic'] == "B" and has_demonstrated:
                     # Check if "Eu sou de [city]" is properly formed
                     is_correct = "eu sou de" in question.lower() and len(question.split()) >= 4
 
@@ -401,8 +553,8 @@ IMPORTANT INSTRUCTIONS:
                     if city_match:
                         # Get the hometown from input preserving capitalization
                         hometown = " ".join(word for word in question.split()[3:])
-                        self.user_info['hometown'] = hometown
-                elif self.current_subtopic == "C" and has_demonstrated:
+                        user_info['hometown'] = hometown
+                elif state['current_subtopic'] == "C" and has_demonstrated:
                     # Check if "Eu moro em [city]" is properly formed
                     is_correct = "eu moro em" in question.lower() and len(question.split()) >= 4
 
@@ -411,12 +563,12 @@ IMPORTANT INSTRUCTIONS:
                     if city_match:
                         # Get the current city from input preserving capitalization
                         current_city = " ".join(word for word in question.split()[3:])
-                        self.user_info['current_city'] = current_city
+                        user_info['current_city'] = current_city
 
                     # Add specific instruction to ensure 'Eu falo' is taught next
                     if is_correct:
                         system_prompt += "\n\nThe user has correctly used 'Eu moro em'. Now teach them about 'Eu falo [language]' (I speak [language]). Provide examples like 'Eu falo inglês' (I speak English), 'Eu falo português' (I speak Portuguese), etc. This is the final phrase in our self-introduction sequence before reviewing."
-                elif self.current_subtopic == "D" and has_demonstrated:
+                elif state['current_subtopic'] == "D" and has_demonstrated:
                     # Check if "Eu falo [language]" is properly formed
                     is_correct = "eu falo" in question.lower() and len(question.split()) >= 3
 
@@ -425,7 +577,7 @@ IMPORTANT INSTRUCTIONS:
                     if lang_match and is_correct:
                         # Get the language from input preserving capitalization
                         language = " ".join(word for word in question.split()[2:])
-                        self.user_info['language'] = language
+                        user_info['language'] = language
 
                     # Check for common English language names that should be in Portuguese
                     english_languages = ["english", "japanese", "spanish", "french", "german", "italian", "chinese"]
@@ -435,13 +587,13 @@ IMPORTANT INSTRUCTIONS:
                     if "ingles" in question.lower() and "inglês" not in question.lower():
                         # Accept "ingles" without accent for English speakers
                         is_correct = True
-                        self.user_info['language'] = "inglês"
+                        user_info['language'] = "inglês"
 
                     # For other English language names, provide guidance instead of marking as incorrect
                     for i, lang in enumerate(english_languages):
                         if lang.lower() in question.lower() and lang.lower() != "english":
                             # Store the language the user is trying to express
-                            self.user_info['language'] = portuguese_languages[i]
+                            user_info['language'] = portuguese_languages[i]
 
                             # The sentence is structurally correct, just needs vocabulary help
                             is_correct = True
@@ -451,7 +603,7 @@ IMPORTANT INSTRUCTIONS:
                             break
 
                     # After 'Eu falo ...', trigger a recap and move directly to Lesson 2
-                    if is_correct and self.current_subtopic == "D":
+                    if is_correct and state['current_subtopic'] == "D":
                         # Always use the most recent value of language (from this answer)
                         language = None
                         # Try to extract the language from the current answer, if possible
@@ -460,11 +612,11 @@ IMPORTANT INSTRUCTIONS:
                             # Use the actual user input for the language
                             language = " ".join(word for word in question.split()[2:])
                         else:
-                            language = self.user_info.get('language', '[language]')
+                            language = user_info.get('language', '[language]')
                         recap = "Here is a recap of your self-introduction in Portuguese, using your own information:\n\n"
-                        name = self.user_info.get('name', '[name]')
-                        hometown = self.user_info.get('hometown', '[city]')
-                        current_city = self.user_info.get('current_city', '[city]')
+                        name = user_info.get('name', '[name]')
+                        hometown = user_info.get('hometown', '[city]')
+                        current_city = user_info.get('current_city', '[city]')
                         recap += f'"Eu sou {name}" - I am {name}\n'
                         recap += f'"Eu sou de {hometown}" - I am from {hometown}\n'
                         recap += f'"Eu moro em {current_city}" - I live in {current_city}\n'
@@ -474,12 +626,12 @@ IMPORTANT INSTRUCTIONS:
                         recap += "- 'o' (masculine singular)\n- 'a' (feminine singular)\n- 'os' (masculine plural)\n- 'as' (feminine plural)\n\n"
                         recap += "Now, could you tell me your preferred pronoun (he/him, she/her, or they/them)? This will help personalize your introduction in Portuguese using the correct article. Please reply with your pronoun."
                         system_prompt += f"\n\n{recap}"
-                        self.current_subtopic = "A"
-                        self.current_lesson = 2
+                        state['current_subtopic'] = "A"
+                        state['current_lesson'] = 2
                         # Store that we are waiting for pronoun
-                        self.user_info['awaiting_pronoun'] = True
+                        user_info['awaiting_pronoun'] = True
                     # After user provides pronoun, present 'Eu sou o/a [name]' form
-                    elif self.user_info.get('awaiting_pronoun') and ('he/him' in question.lower() or 'she/her' in question.lower() or 'they/them' in question.lower()):
+                    elif user_info.get('awaiting_pronoun') and ('he/him' in question.lower() or 'she/her' in question.lower() or 'they/them' in question.lower()):
                         pronoun = None
                         article = None
                         if 'he/him' in question.lower():
@@ -491,18 +643,18 @@ IMPORTANT INSTRUCTIONS:
                         elif 'they/them' in question.lower():
                             pronoun = 'they/them'
                             article = 'x'
-                        name = self.user_info.get('name', '[name]')
+                        name = user_info.get('name', '[name]')
                         # Save pronoun and article
-                        self.user_info['pronoun'] = pronoun
-                        self.user_info['article'] = article
-                        self.user_info['awaiting_pronoun'] = False
+                        user_info['pronoun'] = pronoun
+                        user_info['article'] = article
+                        user_info['awaiting_pronoun'] = False
                         # Present the personalized introduction
                         system_prompt += f"\n\nBased on your pronoun, here is how you would introduce yourself in Portuguese using the correct article:\n\n\"Eu sou {article} {name}\" - I am {name} (with the appropriate article for your gender/pronoun).\n\nLet's continue with more about definite articles and their usage."
-                    elif self.current_subtopic == "A" and self.current_lesson == 2:
+                    elif state['current_subtopic'] == "A" and state['current_lesson'] == 2:
                         system_prompt += "\n\nIMPORTANT: Now move to teaching Lesson 2 on definite articles. Do NOT suggest more languages to speak. Introduce the definite articles 'o', 'a', 'os', 'as' and explain when to use them. Provide clear examples showing gender and number agreement."
-                    elif self.current_subtopic == "A" and self.current_lesson == 3:
+                    elif state['current_subtopic'] == "A" and state['current_lesson'] == 3:
                         system_prompt += "\n\nIMPORTANT: Now move to teaching Lesson 3 on prepositions and contractions. Introduce the preposition 'de' and its various uses. Provide clear examples of how prepositions are used in everyday conversation."
-                    elif self.current_subtopic == "review":
+                    elif state['current_subtopic'] == "review":
                         system_prompt += "Before moving to Lesson 2 on definite articles, provide a comprehensive review of Lesson 1. Summarize all four components they've learned: 'Eu sou [name]', 'Eu sou de [city]', 'Eu moro em [city]', and 'Eu falo [language]'. Use the user's actual provided information in your examples. After this review, instruct the user to confirm when they're ready to proceed to Lesson 2."
                     else:
                         system_prompt += "Then introduce the next concept. Provide a clear example of the next phrase pattern. Move directly to teaching the next concept."
@@ -512,7 +664,12 @@ IMPORTANT INSTRUCTIONS:
                     # User attempted but made a mistake
                     system_prompt += "\n\nThe user has attempted the current topic but made a mistake. Point out the specific error in their Portuguese response and ask them to try again. Provide the correct pattern again as a reminder. Do NOT move on to the next topic until they get this right."
 
-                response = self.client.chat.completions.create(
+                # The colloquial form depends only on the input, so it runs
+                # while the tutor response is generated
+                colloquial_future = submit_timed(
+                    timings, 'colloquial', self.transform_to_colloquial, question)
+
+                response = timed(timings, 'response', lambda: self.client.chat.completions.create(
                     model="gpt-4.1-mini",
                     messages=[{
                         "role": "system",
@@ -521,26 +678,27 @@ IMPORTANT INSTRUCTIONS:
                         "role": "user",
                         "content": question
                     }],
-                    temperature=0.7)
+                    temperature=0.7))
 
                 # Advance to next subtopic if correct
                 if is_correct:
                     expected_subtopic_sequence = ["A", "B", "C", "D", "review"]
-                    current_index = expected_subtopic_sequence.index(self.current_subtopic) if self.current_subtopic in expected_subtopic_sequence else 0
+                    current_index = expected_subtopic_sequence.index(state['current_subtopic']) if state['current_subtopic'] in expected_subtopic_sequence else 0
                     if current_index < len(expected_subtopic_sequence) - 1:
-                        self.current_subtopic = expected_subtopic_sequence[current_index + 1]
-
-                # Convert the Portuguese text to colloquial form
-                colloquial_text, _ = self.transform_to_colloquial(question)
+                        state['current_subtopic'] = expected_subtopic_sequence[current_index + 1]
 
                 # Generate glossary for response text
-                glossary = self.extract_portuguese_words(response.choices[0].message.content)
+                glossary = timed(timings, 'glossary', self.extract_portuguese_words,
+                                 response.choices[0].message.content)
+
+                # The transform catches its own errors and falls back to the input
+                colloquial_text, _ = colloquial_future.result()
 
                 # Only focus on words in the system response, not from user input
                 return response.choices[0].message.content, True, colloquial_text, glossary
             else:
                 # If not Portuguese, just respond normally in English
-                response = self.client.chat.completions.create(
+                response = timed(timings, 'response', lambda: self.client.chat.completions.create(
                     model="gpt-4.1-mini",
                     messages=[{
                         "role":
@@ -552,13 +710,14 @@ IMPORTANT INSTRUCTIONS:
                         "role": "user",
                         "content": question
                     }],
-                    temperature=0.7)
+                    temperature=0.7))
 
                 # Generate glossary for any Portuguese words in the response
-                glossary = self.extract_portuguese_words(response.choices[0].message.content)
+                glossary = timed(timings, 'glossary', self.extract_portuguese_words,
+                                 response.choices[0].message.content)
 
                 return response.choices[0].message.content, False, None, glossary
 
         except Exception as e:
             logger.error(f"Error in ask_question: {str(e)}")
-            return f"Error: {str(e)}", False, None, []
\ No newline at end of file
+            raise
\ No newline at end of file
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    Bounded least-recently-used cache with hit/miss counters.
+    All operations take a lock, so one instance can be shared between the
+    threads of a gunicorn worker. A maxsize of 0 disables caching.
+
+    By default maxsize counts entries. Pass sizeof (e.g. len for bytes values)
+    to bound the total size of the values instead; a value larger than
+    maxsize on its own is not cached.
+    """
+
+    def __init__(self, maxsize=4096, sizeof=None):
+        self.maxsize = maxsize
+        self.sizeof = sizeof
+        self.currsize = 0
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Return the cached value for key (marking it recently used), or default."""
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Store value under key, evicting the least recently used entries if full."""
+        size = self.sizeof(value) if self.sizeof else 1
+        if size > self.maxsize:
+            return
+        with self._lock:
+            self.currsize += size - self._sizes.get(key, 0)
+            self._data[key] = value
+            self._sizes[key] = size
+            self._data.move_to_end(key)
+            self._evict(self.maxsize)
+
+    def resize(self, maxsize):
+        """Change the maximum size, evicting entries if the cache shrank."""
+        with self._lock:
+            self.maxsize = maxsize
+            self._evict(max(maxsize, 0))
+
+    def _evict(self, maxsize):
+        # Caller holds the lock
+        while self.currsize > maxsize:
+            key, _ = self._data.popitem(last=False)
+            self.currsize -= self._sizes.pop(key)
+
+    def clear(self):
+        """Drop every entry and reset the counters."""
+        with self._lock:
+            self._data.clear()
+            self._sizes.clear()
+            self.currsize = 0
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        """Return a dict with hits, misses, hit_rate, size (entries), currsize and maxsize."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'size': len(self._data),
+                'currsize': self.currsize,
+                'maxsize': self.maxsize
+            }
@@ -0,0 +1,264 @@
+"""
+Durable job queue for incoming WhatsApp messages.
+
+The Twilio webhook only records the message and answers; a WorkerPool then
+converts it and sends the reply. Jobs live in a SQLite table keyed by
+Twilio's MessageSid, so a webhook that Twilio retries (after a timeout, or a
+worker restart) is enqueued once and answered once.
+
+A claimed job is leased for MESSAGE_LEASE seconds. A job whose worker died is
+claimed again when the lease runs out, so every process sharing the database
+can run a pool. Failures are retried with exponential backoff up to
+MESSAGE_MAX_ATTEMPTS times; a handler raises PermanentError for failures that
+a retry cannot fix. Finished jobs are kept for MESSAGE_KEEP_DONE seconds to
+recognise late duplicates.
+"""
+
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+MESSAGE_QUEUE_DB = os.getenv('MESSAGE_QUEUE_DB', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'message_queue.db'))
+# Messages converted and sent concurrently per process
+MESSAGE_WORKERS = int(os.getenv('MESSAGE_WORKERS', '4'))
+MESSAGE_MAX_ATTEMPTS = int(os.getenv('MESSAGE_MAX_ATTEMPTS', '6'))
+# Retry delay: MESSAGE_RETRY_BASE * 2^(attempt-1) seconds, capped, with jitter
+MESSAGE_RETRY_BASE = float(os.getenv('MESSAGE_RETRY_BASE', '2'))
+MESSAGE_RETRY_MAX = float(os.getenv('MESSAGE_RETRY_MAX', '300'))
+MESSAGE_LEASE = float(os.getenv('MESSAGE_LEASE', '120'))
+MESSAGE_KEEP_DONE = float(os.getenv('MESSAGE_KEEP_DONE', '86400'))
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class PermanentError(Exception):
+    """Raised by a job handler for a failure that retrying will not fix."""
+
+
+class MessageQueue:
+    """SQLite-backed queue of message jobs, deduplicated on their key."""
+
+    def __init__(self, db_path=MESSAGE_QUEUE_DB, max_attempts=MESSAGE_MAX_ATTEMPTS, retry_base=MESSAGE_RETRY_BASE,
+                 retry_max=MESSAGE_RETRY_MAX, lease=MESSAGE_LEASE, keep_done=MESSAGE_KEEP_DONE):
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.lease = lease
+        self.keep_done = keep_done
+        self._local = threading.local()
+        db = self._db()
+        # next_attempt_at is when a pending job is due, or when a running job's lease expires
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS message_jobs ("
+            "key TEXT PRIMARY KEY, payload TEXT NOT NULL, status TEXT NOT NULL, "
+            "attempts INTEGER NOT NULL DEFAULT 0, next_attempt_at REAL NOT NULL, "
+            "last_error TEXT, created_at REAL NOT NULL, updated_at REAL NOT NULL)")
+        db.execute("CREATE INDEX IF NOT EXISTS message_jobs_due ON message_jobs (status, next_attempt_at)")
+
+    def _db(self):
+        # One connection per thread; sqlite3 connections are not shareable
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def enqueue(self, key, payload):
+        """
+        Add a job; returns False if a job with this key already exists.
+        A job without a key (None) is always added.
+        """
+        now = time.time()
+        cursor = self._db().execute(
+            "INSERT OR IGNORE INTO message_jobs (key, payload, status, next_attempt_at, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (key or f'local-{uuid.uuid4().hex}', json.dumps(payload, ensure_ascii=False), PENDING, now, now, now))
+        return cursor.rowcount == 1
+
+    def claim(self):
+        """Lease the next due job; returns (key, payload, attempt) or None."""
+        db = self._db()
+        while True:
+            now = time.time()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                row = db.execute(
+                    "SELECT key, payload, attempts, status FROM message_jobs "
+                    "WHERE status IN (?, ?) AND next_attempt_at <= ? ORDER BY next_attempt_at LIMIT 1",
+                    (PENDING, RUNNING, now)).fetchone()
+                if row is None:
+                    db.execute("COMMIT")
+                    return None
+                key, payload, attempts, status = row
+                if status == RUNNING and attempts >= self.max_attempts:
+                    # Its last attempt never reported back
+                    db.execute(
+                        "UPDATE message_jobs SET status = ?, last_error = ?, updated_at = ? WHERE key = ?",
+                        (FAILED, 'lease expired', now, key))
+                    db.execute("COMMIT")
+                    logger.error(f"Message job {key} failed: lease expired on its last attempt")
+                    continue
+                db.execute(
+                    "UPDATE message_jobs SET status = ?, attempts = attempts + 1, next_attempt_at = ?, updated_at = ? "
+                    "WHERE key = ?",
+                    (RUNNING, now + self.lease, now, key))
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            if status == RUNNING:
+                logger.warning(f"Message job {key} lease expired, retrying")
+            return key, json.loads(payload), attempts + 1
+
+    def complete(self, key):
+        self._finish(key, DONE, None)
+
+    def fail(self, key, error):
+        """Give up on a job."""
+        self._finish(key, FAILED, error)
+        logger.error(f"Message job {key} failed: {error}")
+
+    def retry(self, key, attempt, error):
+        """Schedule another attempt after a backoff, or fail the job if it is out of attempts."""
+        if attempt >= self.max_attempts:
+            self.fail(key, f"{error} (after {attempt} attempts)")
+            return
+        delay = min(self.retry_max, self.retry_base * 2 ** (attempt - 1))
+        delay *= random.uniform(0.5, 1.0)
+        now = time.time()
+        self._db().execute(
+            "UPDATE message_jobs SET status = ?, next_attempt_at = ?, last_error = ?, updated_at = ? WHERE key = ?",
+            (PENDING, now + delay, str(error), now, key))
+        logger.warning(f"Message job {key} attempt {attempt} failed, retrying in {delay:.1f}s: {error}")
+
+    def _finish(self, key, status, error):
+        now = time.time()
+        self._db().execute(
+            "UPDATE message_jobs SET status = ?, last_error = ?, updated_at = ? WHERE key = ?",
+            (status, str(error) if error is not None else None, now, key))
+
+    def next_due(self):
+        """Seconds until the next pending or leased job is due, or None if there is none."""
+        row = self._db().execute(
+            "SELECT MIN(next_attempt_at) FROM message_jobs WHERE status IN (?, ?)", (PENDING, RUNNING)).fetchone()
+        return None if row[0] is None else max(0.0, row[0] - time.time())
+
+    def purge(self):
+        """Delete finished jobs older than keep_done; returns how many were deleted."""
+        cursor = self._db().execute(
+            "DELETE FROM message_jobs WHERE status IN (?, ?) AND updated_at < ?",
+            (DONE, FAILED, time.time() - self.keep_done))
+        return cursor.rowcount
+
+    def stats(self):
+        counts = dict(self._db().execute("SELECT status, COUNT(*) FROM message_jobs GROUP BY status").fetchall())
+        return {status: counts.get(status, 0) for status in (PENDING, RUNNING, DONE, FAILED)}
+
+
+class WorkerPool:
+    """
+    Threads that take jobs from a MessageQueue and pass their payload to
+    `handler`. A handler that returns completes the job; PermanentError fails
+    it; any other exception schedules a retry.
+    """
+
+    # Longest sleep when idle; also bounds how late a job enqueued by another process is noticed
+    POLL_INTERVAL = 1.0
+    PURGE_INTERVAL = 3600.0
+
+    def __init__(self, queue, handler, workers=MESSAGE_WORKERS):
+        self.queue = queue
+        self.handler = handler
+        self.workers = workers
+        self._wakeup = threading.Condition()
+        self._pending_wakeups = 0
+        self._stopping = False
+        self._threads = []
+        self._last_purge = 0.0
+
+    def start(self):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f'message-worker-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"Started {self.workers} message workers on {self.queue.db_path}")
+
+    def submit(self, key, payload):
+        """Enqueue a job and wake a worker; returns False for a duplicate key."""
+        added = self.queue.enqueue(key, payload)
+        if added:
+            with self._wakeup:
+                self._pending_wakeups += 1
+                self._wakeup.notify()
+        return added
+
+    def stop(self, timeout=None):
+        """Stop after the jobs in progress; jobs left in the queue wait for the next start."""
+        with self._wakeup:
+            self._stopping = True
+            self._wakeup.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _sleep(self):
+        try:
+            due = self.queue.next_due()
+        except sqlite3.Error:
+            due = None
+        timeout = self.POLL_INTERVAL if due is None else min(due, self.POLL_INTERVAL)
+        with self._wakeup:
+            if not self._pending_wakeups and not self._stopping:
+                self._wakeup.wait(timeout)
+            if self._pending_wakeups:
+                self._pending_wakeups -= 1
+
+    def _run(self):
+        while not self._stopping:
+            try:
+                job = self.queue.claim()
+            except sqlite3.Error as e:
+                logger.error(f"Message queue claim failed: {e}")
+                job = None
+            if job is None:
+                self._maybe_purge()
+                self._sleep()
+                continue
+            try:
+                self._process(*job)
+            except sqlite3.Error as e:
+                # The job stays leased and is retried when the lease expires
+                logger.error(f"Message queue update for job {job[0]} failed: {e}")
+
+    def _process(self, key, payload, attempt):
+        try:
+            self.handler(payload)
+        except PermanentError as e:
+            self.queue.fail(key, e)
+        except Exception as e:
+            self.queue.retry(key, attempt, e)
+        else:
+            self.queue.complete(key)
+
+    def _maybe_purge(self):
+        now = time.monotonic()
+        if now - self._last_purge < self.PURGE_INTERVAL:
+            return
+        self._last_purge = now
+        try:
+            self.queue.purge()
+        except sqlite3.Error as e:
+            logger.warning(f"Message queue purge failed: {e}")
@@ -1,33 +1,34 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import re
-from config.phonetic_dict import PHONETIC_DICTIONARY
-from config.irregular_verbs import IRREGULAR_VERBS
-from config.verb_patterns import (BASIC_VERB_ROOTS, ACTION_VERB_ROOTS,
-                              COGNITIVE_VERB_ROOTS, PROCESS_VERB_ROOTS,
-                              ALL_ENDINGS)
+import os
+from lru_cache import LRUCache
+from lexicon import LEXICON, MATCH_PREFIX, MATCH_SUFFIX, MATCH_ANYWHERE
+from config.rule_table import RULE_NOT_ENTRAR, RULE_VERB
+import rule_ids
+
+# Tables and indexes from the lexicon snapshot (see lexicon.py)
+PHONETIC_DICTIONARY = LEXICON['phonetic_dictionary']
+IRREGULAR_VERBS = LEXICON['irregular_verbs']
+ENTRAR_FORMS = LEXICON['entrar_forms']
+COMPILED_RULES = LEXICON['compiled_rules']
 
 # Combined set of all verb roots
-ALL_ROOTS = BASIC_VERB_ROOTS | ACTION_VERB_ROOTS | COGNITIVE_VERB_ROOTS | PROCESS_VERB_ROOTS
+ALL_ROOTS = LEXICON['all_roots']
+
+# Root × ending index, so is_verb is a single hash lookup instead of a scan
+VERB_FORMS = LEXICON['verb_forms']
 
 def is_verb(word):
     """
     Check if a word is a verb by:
     1. Checking if it's in the irregular verbs dictionary
     2. Checking if it has a valid verb root and ending
+    Both checks are answered by the precomputed VERB_FORMS index.
     """
     if not word:
         return False
-    lw = word.lower()
-    if lw in IRREGULAR_VERBS or lw in IRREGULAR_VERBS.values():
-        return True
-    for end in ALL_ENDINGS:
-        if lw.endswith(end):
-            root = lw[:-len(end)]
-            if root in ALL_ROOTS:
-                return True
-    return False
+    return word.lower() in VERB_FORMS
 
 def preserve_capital(original, transformed):
     """
@@ -40,6 +41,97 @@ def preserve_capital(original, transformed):
         return transformed[0].upper() + transformed[1:]
     return transformed
 
+
+def apply_rule_table(word, lword):
+    """
+    Run COMPILED_RULES over a lowercased word.
+
+    Args:
+        word: The original word, used for the rule conditions
+        lword: The lowercased word to transform
+
+    Returns:
+        tuple: (transformed_word, tuple of the IDs of the rules that fired)
+    """
+    trans = lword
+    fired = ()
+    verb = None
+    for kind, target, repl, rule_id, condition in COMPILED_RULES:
+        if condition is not None:
+            if condition == RULE_NOT_ENTRAR:
+                if lword in ENTRAR_FORMS:
+                    continue
+            else:
+                if verb is None:
+                    verb = is_verb(word)
+                if verb != (condition == RULE_VERB):
+                    continue
+
+        if kind == MATCH_SUFFIX:
+            if not trans.endswith(target):
+                continue
+            result = trans[:len(trans) - len(target)] + repl
+        elif kind == MATCH_PREFIX:
+            if not trans.startswith(target):
+                continue
+            result = repl + trans[len(target):]
+        elif kind == MATCH_ANYWHERE:
+            if target not in trans:
+                continue
+            result = trans.replace(target, repl)
+        else:
+            result = target.sub(repl, trans)
+
+        if result != trans:
+            fired += (rule_id,)
+            trans = result
+    return trans, fired
+
+NEGATION_FORMS = frozenset(["não", "nao", "nãun", "nãu", "nau"])
+VOCE_FORMS = frozenset(["você", "voce"])
+VOCES_FORMS = frozenset(["vocês", "voces", "vocêis"])
+
+# Clitic pronouns (and 'já') that may sit between não/você and its verb
+NEGATION_PRONOUNS = frozenset(["me", "te", "se", "nos", "vos", "lhe", "lhes", "o", "a", "os",
+                               "as", "lo", "la", "los", "las", "no", "na", "nos", "nas", "já"])
+VOCE_PRONOUNS = NEGATION_PRONOUNS | NEGATION_FORMS
+
+# The only parts of a word's neighbours that can change its transformation
+CONTEXT_NONE = None
+CONTEXT_VERB = 'verb'
+CONTEXT_PRONOUN_VERB = 'pronoun_verb'
+
+WORD_CACHE_SIZE = int(os.getenv('WORD_CACHE_SIZE', '8192'))
+_word_cache = LRUCache(WORD_CACHE_SIZE)
+
+
+def word_context(word, next_word=None, next_next_word=None):
+    """
+    Reduce the neighbours of a word to what apply_phonetic_rules depends on:
+    CONTEXT_PRONOUN_VERB if não/você/vocês is followed by pronoun+verb,
+    CONTEXT_VERB if it is followed by a verb, CONTEXT_NONE otherwise
+    (always CONTEXT_NONE for every other word).
+    """
+    if not next_word:
+        return CONTEXT_NONE
+    lword = word.lower()
+    if lword in NEGATION_FORMS:
+        pronouns = NEGATION_PRONOUNS
+    elif lword in VOCE_FORMS or lword in VOCES_FORMS:
+        pronouns = VOCE_PRONOUNS
+    else:
+        return CONTEXT_NONE
+
+    if next_word.lower() in pronouns:
+        if next_next_word and is_verb(next_next_word):
+            return CONTEXT_PRONOUN_VERB
+        elif is_verb(next_word):
+            return CONTEXT_VERB
+    elif is_verb(next_word):
+        return CONTEXT_VERB
+    return CONTEXT_NONE
+
+
 def apply_phonetic_rules(word, next_word=None, next_next_word=None, prev_word=None):
     """
     Apply Portuguese phonetic rules to transform a word.
@@ -50,160 +142,101 @@ def apply_phonetic_rules(word, next_word=None, next_next_word=None, prev_word=No
         word: The word to transform
         next_word: The next word in the sequence (optional), used for verb detection
         next_next_word: The word after next_word (optional)
-        prev_word: The previous word (optional)
+        prev_word: The previous word (optional, currently unused)
 
     Returns:
         tuple: (transformed_word, explanation)
     """
     if not word:
         return '', ''
+    trans, fired = apply_phonetic_rule_ids(word, next_word, next_next_word, prev_word)
+    return trans, rule_ids.describe_word(word, trans, fired)
 
-    # Initialize explanation list
-    explanations = []
 
-    # Helper function to apply regex and add explanation if transformation occurred
-    def apply_transform(pattern, repl, text, explanation):
-        result = re.sub(pattern, repl, text)
-        if result != text:
-            explanations.append(explanation)
-        return result
+def apply_phonetic_rule_ids(word, next_word=None, next_next_word=None, prev_word=None):
+    """
+    apply_phonetic_rules without the explanation string: returns
+    (transformed_word, rule_ids), where rule_ids is a tuple of the IDs of
+    the rules that fired (see rule_ids.py), empty if the word is unchanged.
+
+    Results are memoized per (word, word_context) in a bounded LRU cache,
+    so repeated words only cost a lookup.
+    """
+    if not word:
+        return '', ()
+
+    key = (word, word_context(word, next_word, next_next_word))
+    result = _word_cache.get(key)
+    if result is None:
+        result = transform_word(*key)
+        _word_cache.put(key, result)
+    return result
+
+
+def transform_word(word, context=CONTEXT_NONE):
+    """
+    Uncached core of apply_phonetic_rule_ids, with the neighbours already
+    reduced by word_context.
+
+    Returns:
+        tuple: (transformed_word, rule_ids)
+    """
+    if not word:
+        return '', ()
 
     # First check if word is in pre-defined dictionary
     lword = word.lower()
-    
+
     # Special handling for não before verbs
-    if lword in ["não", "nao", "nãun", "nãu", "nau"]:
-        if next_word:
-            pronouns = ["me", "te", "se", "nos", "vos", "lhe", "lhes", "o", "a", "os",
-                       "as", "lo", "la", "los", "las", "no", "na", "nos", "nas", "já"]
-            if next_word.lower() in pronouns:
-                if next_next_word and is_verb(next_next_word):
-                    return preserve_capital(word, "nu"), "Negation before pronoun+verb: não → nu"
-                elif is_verb(next_word):
-                    return preserve_capital(word, "nu"), "Negation before verb: não → nu"
-            elif is_verb(next_word):
-                return preserve_capital(word, "nu"), "Negation before verb: não → nu"
-        return preserve_capital(word, "nãu"), "Default negation: não → nãu"
+    if lword in NEGATION_FORMS:
+        if context == CONTEXT_PRONOUN_VERB:
+            return preserve_capital(word, "nu"), (rule_ids.NEGATION_PRONOUN_VERB,)
+        elif context == CONTEXT_VERB:
+            return preserve_capital(word, "nu"), (rule_ids.NEGATION_VERB,)
+        return preserve_capital(word, "nãu"), (rule_ids.NEGATION_DEFAULT,)
 
     # Special handling for você/vocês before verbs
-    if lword in ["você", "voce"]:
-        if next_word:
-            pronouns = ["me", "te", "se", "nos", "vos", "lhe", "lhes", "o", "a", "os",
-                       "as", "lo", "la", "los", "las", "no", "na", "nos", "nas", "já", "não", "nao", "nãun", "nãu", "nau"]
-            if next_word.lower() in pronouns:
-                if next_next_word and is_verb(next_next_word):
-                    return preserve_capital(word, "cê"), "Pronoun before pronoun+verb: você → cê"
-                elif is_verb(next_word):
-                    return preserve_capital(word, "cê"), "Pronoun before verb: você → cê"
-            elif is_verb(next_word):
-                return preserve_capital(word, "cê"), "Pronoun before verb: você → cê"
+    if lword in VOCE_FORMS:
+        if context == CONTEXT_PRONOUN_VERB:
+            return preserve_capital(word, "cê"), (rule_ids.VOCE_PRONOUN_VERB,)
+        elif context == CONTEXT_VERB:
+            return preserve_capital(word, "cê"), (rule_ids.VOCE_VERB,)
 
     # Special handling for vocês before verbs
-    if lword in ["vocês", "voces", "vocêis"]:
-        if next_word:
-            pronouns = ["me", "te", "se", "nos", "vos", "lhe", "lhes", "o", "a", "os",
-                       "as", "lo", "la", "los", "las", "no", "na", "nos", "nas", "já", "não", "nao", "nãun", "nãu", "nau"]
-            if next_word.lower() in pronouns:
-                if next_next_word and is_verb(next_next_word):
-                    return preserve_capital(word, "cêis"), "Pronoun before pronoun+verb: vocês → cêis"
-                elif is_verb(next_word):
-                    return preserve_capital(word, "cêis"), "Pronoun before verb: vocês → cêis"
-            elif is_verb(next_word):
-                return preserve_capital(word, "cêis"), "Pronoun before verb: vocês → cêis"
+    if lword in VOCES_FORMS:
+        if context == CONTEXT_PRONOUN_VERB:
+            return preserve_capital(word, "cêis"), (rule_ids.VOCES_PRONOUN_VERB,)
+        elif context == CONTEXT_VERB:
+            return preserve_capital(word, "cêis"), (rule_ids.VOCES_VERB,)
 
     # Check irregular verbs first
     if lword in IRREGULAR_VERBS:
         trans = IRREGULAR_VERBS[lword].lower()
         trans = preserve_capital(word, trans)
-        return trans, f"Irregular verb: {word} → {trans}"
-        
+        return trans, (rule_ids.IRREGULAR_VERB,)
+
     # Check direct transformations and dictionary
     if lword in PHONETIC_DICTIONARY:
-        # Special case for 'olho' - treat as verb if preceded by 'eu'
-        if lword == 'olho' and next_word is None and word.lower() == 'olho':
-            prev_word = prev_word.lower() if prev_word else None
-            if prev_word == 'eu':
-                if lword in IRREGULAR_VERBS:
-                    trans = IRREGULAR_VERBS[lword].lower()
-                    trans = preserve_capital(word, trans)
-                    return trans, f"Irregular verb: {word} → {trans}"
         trans = PHONETIC_DICTIONARY[lword].lower()
         trans = preserve_capital(word, trans)
-        return trans, f"Dictionary: {word} → {trans}"
-
-    # Initialize transformed word
-    trans = lword
+        return trans, (rule_ids.DICTIONARY,)
 
-    # Apply transformation rules
-    entrar_forms = ['entrar', 'entro', 'entra', 'entramos', 'entram', 'entrei', 'entrou',
-                    'entraram', 'entrava', 'entravam']
-    trans = apply_transform(r'^ent', 'int', trans, "Initial ent → int") if word.lower() not in entrar_forms else trans
-    trans = apply_transform(r'^des', 'dis', trans, "Transform initial 'des' to 'dis'")
-    trans = apply_transform(r'^menti', 'minti', trans, "Transform initial 'menti' to 'minti'")
-
-    trans = apply_transform(r'ovo$', 'ôvo', trans, "Transform ending 'ovo' to 'ôvo'")
-    trans = apply_transform(r'ovos$', 'óvos', trans, "Transform ending 'ovos' to 'óvos'")
-    trans = apply_transform(r'ogo$', 'ôgo', trans, "Transform ending 'ogo' to 'ôgo'")
-    trans = apply_transform(r'ogos$', 'ógos', trans, "Transform ending 'ogos' to 'ógos'")
-    trans = apply_transform(r'oso$', 'ôso', trans, "Transform ending 'oso' to 'ôso'")
-    trans = apply_transform(r'osos$', 'ósos', trans, "Transform ending 'osos' to 'ósos'")
-
-    if is_verb(word):
-        trans = apply_transform(r'ar$', 'á', trans, "Infinitive ending: ar → á")
-        trans = apply_transform(r'er$', 'ê', trans, "Infinitive ending: er →ê")
-        trans = apply_transform(r'ir$', 'í', trans, "Infinitive ending: ir → í")
-        trans = apply_transform(r'am[ou]s$', 'ãmu', trans, "Verb ending 'amos/amus' → 'ãmu'")
-        trans = apply_transform(r'em[ou]s$', 'êmu', trans, "Verb ending 'emos/emus' → 'êmu'")
-        trans = apply_transform(r'im[ou]s$', 'imu', trans, "Verb ending 'imos/imus' → 'imu'")
-
-    trans = apply_transform(r'o$', 'u', trans, "Final o → u")
-    trans = apply_transform(r'os$', 'us', trans, "Final os → us")
-    trans = apply_transform(r'e$', 'i', trans, "Final e → i")
-    trans = apply_transform(r'es$', 'is', trans, "Final es → is")
-    trans = apply_transform(r'ão$', 'ãun', trans, "ão → ãun")
-    trans = apply_transform(r'^es', 'is', trans, "Initial es → is")
-
-    # Rule 9p: 's' between vowels becomes 'z'
-    if re.search(r'([aeiouáéíóúâêîôúãẽĩõũ])s([aeiouáéíóúâêîôúãẽĩõũ])', trans, re.IGNORECASE):
-        trans = apply_transform(r'([aeiouáéíóúâêîôúãẽĩõũ])s([aeiouáéíóúâêîôúãẽĩõũ])', r'\1z\2',
-                              trans, "s → z between vowels")
-
-    trans = apply_transform(r'olh', 'ôli', trans, "olh → ôly") if not is_verb(word) else trans
-    trans = apply_transform(r'lh', 'li', trans, "lh → ly")
-    # Unified rule for any "ou" to "ô" transformation anywhere in the word
-    trans = apply_transform(r'ou', 'ô', trans, "ou → ô (anywhere)")
-
-    consonants = 'bcdfgjklmnpqrstvwxz'
-    trans = apply_transform(r'al([' + consonants + '])', r'au\1', trans, "al+consonant → au")
-    trans = apply_transform(r'on(?!h)([' + consonants + '])', r'oun\1', trans, "on+consonant → oun")
-    trans = apply_transform(r'am$', 'ã', trans, "Final am → ã")
-    trans = apply_transform(r'em$', 'êin', trans, "Final em →êin")
-    trans = apply_transform(r'om$', 'ôun', trans, "Final om → ôun")
-    trans = apply_transform(r'um$', 'un', trans, "Final um → un")
-    trans = apply_transform(r'^h', '', trans, "Remove initial h")
-    trans = apply_transform(r'^ex', 'iz', trans, "Initial ex → iz")
-    trans = apply_transform(r'^pol', 'pul', trans, "Initial pol → pul")
-    trans = apply_transform(r'ol$', 'óu', trans, "Final ol → óu")
-    trans = apply_transform(r'l$', 'u', trans, "Final l → u")
-    trans = apply_transform(r'ul([' + consonants + '])', r'u\1', trans, "ul before consonant → u (remove duplicate u)")
-    trans = apply_transform(f'([^u])l([{consonants}])', r'\1u\2', trans, "l before consonant → u (if not after u)")
-
-    for p in ['bs', 'ps', 'pn', 'dv', 'pt', 'pç', 'dm', 'gn', 'tm', 'tn']:
-        trans = apply_transform(rf'({p[0]})({p[1]})', r'\1i\2', trans,
-                              f"Insert i: {p} → {p[0]}i{p[1]}")
-
-    trans = apply_transform(r'[dtbfjkpv]$', r'\0i', trans, "Append i after final consonant")
-    trans = apply_transform(r'c$', 'ki', trans, "Final c → ki")
-    trans = apply_transform(r'g$', r'\0ui', trans, "Append ui after final g")
-    trans = apply_transform(r'eir', 'êr', trans, "eir → êr")
-    # Removed specific initial 'ou' rules as they're covered by the unified rule
-    trans = apply_transform(r'^des', 'dis', trans, "Transform initial 'des' to 'dis'")
-    trans = apply_transform(r'ora$', 'óra', trans, "Transform ending 'ora' to 'óra'")
-    trans = apply_transform(r'oras$', 'óras', trans, "Transform ending 'oras' to 'óras'")
-    trans = apply_transform(r'ês$', 'êis', trans, "Final 'ês' becomes 'êis'")
+    trans, fired = apply_rule_table(word, lword)
 
     # Preserve capitalization
-    trans = preserve_capital(word, trans)
+    return preserve_capital(word, trans), fired
+
+
+def configure_word_cache(maxsize):
+    """Resize the per-word cache; 0 disables it."""
+    _word_cache.resize(maxsize)
+
+
+def clear_word_cache():
+    """Empty the per-word cache and reset its statistics."""
+    _word_cache.clear()
+
 
-    explanation = " + ".join(explanations) if explanations else "No changes needed"
-    return trans, explanation
\ No newline at end of file
+def word_cache_stats():
+    """Return hit/miss statistics for the per-word cache."""
+    return _word_cache.stats()
@@ -5,12 +5,18 @@ import re
 import sys
 import traceback
 import io
+import os
+import json
+import argparse
+import contextlib
+import time
 import unicodedata
-from phonetic_rules import apply_phonetic_rules
-from word_combinations import apply_combinations
-from config.verb_patterns import (BASIC_VERB_ROOTS, ACTION_VERB_ROOTS,
-                                COGNITIVE_VERB_ROOTS, PROCESS_VERB_ROOTS)
-from config.word_pairs import WORD_PAIRS
+from collections import deque
+from phonetic_rules import apply_phonetic_rule_ids, word_cache_stats
+from lru_cache import LRUCache
+from word_combinations import combine_tokens, combine_pair
+import rule_ids
+from lexicon import LEXICON, PHRASE_END
 
 # Words ending in 'l' that have special accent patterns
 ACCENTED_L_SUFFIXES = {
@@ -43,8 +49,29 @@ DIRECT_TRANSFORMATIONS = {
     'ótimo': 'ótimu'
 }
 
+# Write buffer for the streaming CLI mode
+STREAM_BUFFER_SIZE = 1 << 16
+
+# transform_text(explain=EXPLAIN_IDS) reports rule IDs instead of explanation strings
+EXPLAIN_IDS = 'ids'
+
+# Lines per task handed to a worker process in parallel mode
+PARALLEL_CHUNK_SIZE = 256
+
+# Total characters of converted sentences kept by the sentence cache (0 disables it)
+SENTENCE_CACHE_SIZE = int(os.getenv('SENTENCE_CACHE_SIZE', str(1 << 20)))
+_sentence_cache = LRUCache(SENTENCE_CACHE_SIZE, sizeof=len)
+
+# Converted once by each worker process to warm its caches
+WARMUP_TEXT = "Você não está falando com ela, mas eu quero ir para casa agora. Por que os meninos estão aqui?"
+
 # Combined set of all verb roots
-ALL_ROOTS = BASIC_VERB_ROOTS | ACTION_VERB_ROOTS | COGNITIVE_VERB_ROOTS | PROCESS_VERB_ROOTS
+ALL_ROOTS = LEXICON['all_roots']
+
+WORD_PAIRS = LEXICON['word_pairs']
+
+# Trie over WORD_PAIRS used by merge_word_pairs (see lexicon.build_phrase_index)
+PHRASE_INDEX = LEXICON['phrase_index']
 
 
 def remove_accents(text):
@@ -98,93 +125,120 @@ def restore_accents(word, template):
     return unicodedata.normalize('NFC', ''.join(result))
 
 
-def merge_word_pairs(tokens):
+class Token:
     """
-    Merge only if two adjacent tokens are both words (no punctuation in between)
-    and the exact pair (in lowercase) is in WORD_PAIRS.
+    One token of the text being converted: a word or a punctuation lump,
+    and the [start, end) span of the input it came from. Pipeline stages
+    update tokens in place: merging a phrase or combining two words keeps
+    the left token, extends its span and drops the others from the list.
     """
-    new_tokens = []
-    i = 0
-    explanations = []  # Move explanations list up here
-    while i < len(tokens):
-        word1, punct1 = tokens[i]
+    __slots__ = ('word', 'punct', 'start', 'end')
 
-        # If this token is punctuation, just keep it and move on
-        if not word1:
-            new_tokens.append((word1, punct1))
-            i += 1
-            continue
+    def __init__(self, word, punct, start, end):
+        self.word = word
+        self.punct = punct
+        self.start = start
+        self.end = end
 
-        # Check if there is a "next" token to form a pair
-        if i + 1 < len(tokens):
-            word2, punct2 = tokens[i + 1]
+    def __repr__(self):
+        return f"Token({self.word!r}, {self.punct!r}, {self.start}, {self.end})"
 
-            # If the next token is actually punctuation, we cannot form a pair
-            if not word2:
-                # Keep the current token (word1)
-                new_tokens.append((word1, punct1))
-                i += 1
-                continue
 
-            # Build a pair string in lowercase
-            pair = f"{word1.lower().strip()} {word2.lower().strip()}"
-
-            # Try an exact match against WORD_PAIRS
-            if pair in WORD_PAIRS:
-                # If matched, create a single merged token
-                replacement = WORD_PAIRS[pair]
-                # Merge punctuation from both tokens
-                merged_punct = punct1 + punct2
-                # Add to new_tokens
-                new_tokens.append((replacement, merged_punct))
-                explanations.append(
-                    f"Common pronunciation and usage: {pair} → {replacement}")
-                # Skip the second token in the pair
-                i += 2
-            else:
-                # No match, keep word1 as-is
-                new_tokens.append((word1, punct1))
-                i += 1
-        else:
-            # Last token, no pair to form
-            new_tokens.append((word1, punct1))
-            i += 1
+# Punctuation that ends a sentence (see split_sentences)
+SENTENCE_END = frozenset('.!?')
+
+# Words (including accented or numeric characters), punctuation lumps, hyphens
+TOKEN_PATTERN = re.compile(r'([A-Za-zÀ-ÖØ-öø-ÿ0-9]+)|([.,!?;:]+)|(-)')
+WORD_PATTERN = re.compile(r'[A-Za-zÀ-ÖØ-öø-ÿ0-9]+')
 
-    return new_tokens, explanations
+
+def match_phrase(tokens, i):
+    """
+    Find the longest WORD_PAIRS phrase formed by the word tokens starting at
+    tokens[i] (no punctuation in between), walking PHRASE_INDEX instead of
+    building candidate strings. Returns (end, (phrase, replacement)) with
+    `end` the index after the phrase's last token, or (i, None).
+    """
+    match_end = i
+    match = None
+    node = PHRASE_INDEX
+    j = i
+    n = len(tokens)
+    while j < n:
+        word = tokens[j].word
+        # Punctuation tokens end a phrase
+        if not word:
+            break
+        node = node.get(word.lower())
+        if node is None:
+            break
+        j += 1
+        if PHRASE_END in node:
+            match_end = j
+            match = node[PHRASE_END]
+    return match_end, match
+
+
+def merge_word_pairs(tokens, events=None):
+    """
+    Merge runs of adjacent word tokens (no punctuation in between) whose
+    lowercase words form a phrase in WORD_PAIRS, preferring the longest
+    phrase that starts at each position. One left-to-right pass that
+    compacts `tokens` in place and returns it: a phrase's first token takes
+    the replacement and the span of the whole phrase. If `events` is a list,
+    (merged_index, rule_ids.WORD_PAIR) is appended to it for every phrase.
+    """
+    n = len(tokens)
+    size = 0
+    i = 0
+    while i < n:
+        token = tokens[i]
+        match_end, match = match_phrase(tokens, i) if token.word else (i, None)
+
+        if match is None:
+            # Punctuation, or no phrase starts here: keep the token as-is
+            i += 1
+        else:
+            # Replace the whole phrase by a single token, keeping its punctuation
+            if events is not None:
+                events.append((size, rule_ids.WORD_PAIR))
+            token.word = match[1]
+            token.punct = ''.join(tokens[k].punct for k in range(i, match_end))
+            token.end = tokens[match_end - 1].end
+            i = match_end
+        tokens[size] = token
+        size += 1
+
+    del tokens[size:]
+    return tokens
 
 
 def tokenize_text(text):
     """
-    Capture words vs. punctuation lumps in a single pass.
-    - ([A-Za-zÀ-ÖØ-öø-ÿ0-9]+): words (including accented or numeric characters).
-    - ([.,!?;:]+): one or more punctuation marks.
-    - (-): hyphens are captured separately to preserve them
-    Returns a list of (word, punct) tuples, e.g.:
-        "Olá, mundo!" => [("Olá", ""), ("", ","), ("mundo", ""), ("", "!")]
-        "bem-vindo" => [("bem", ""), ("", "-"), ("vindo", "")]
+    Capture words vs. punctuation lumps in a single pass (TOKEN_PATTERN):
+    - words (including accented or numeric characters),
+    - one or more punctuation marks,
+    - hyphens, captured separately to preserve them.
+    Returns a list of Tokens, e.g. (as (word, punct, start, end)):
+        "Olá, mundo!" => [("Olá", "", 0, 3), ("", ",", 3, 4), ("mundo", "", 5, 10), ("", "!", 10, 11)]
+        "bem-vindo" => [("bem", "", 0, 3), ("", "-", 3, 4), ("vindo", "", 4, 9)]
     """
-    pattern = r'([A-Za-zÀ-ÖØ-öø-ÿ0-9]+)|([.,!?;:]+)|(-)'
     tokens = []
-
-    for match in re.finditer(pattern, text):
+    for match in TOKEN_PATTERN.finditer(text):
+        start, end = match.span()
         word = match.group(1)
-        punct = match.group(2)
-        hyphen = match.group(3)
-        
         if word:
-            tokens.append((word, ''))  # (word, "")
-        elif punct:
-            tokens.append(('', punct))  # ("", punctuation)
-        elif hyphen:
-            tokens.append(('', hyphen))  # ("", hyphen)
-
+            tokens.append(Token(word, '', start, end))
+        else:
+            # Punctuation lump or hyphen
+            tokens.append(Token('', match.group(0), start, end))
     return tokens
 
 
-def reassemble_tokens_smartly(final_tokens):
+def reassemble_tokens_smartly(final_tokens, alignment=None, started=False):
     """
-    Reassemble (word, punct) tokens into a single string without
-    introducing extra spaces before punctuation.
+    Reassemble tokens into a single string without introducing extra
+    spaces before punctuation.
 
     Example final_tokens could be: [("Olá", ""), ("", ","), ("mundo", ""), ("", "!")]
     We want to get: "Olá, mundo!"
@@ -194,175 +248,539 @@ def reassemble_tokens_smartly(final_tokens):
 
     Logic:
       - If 'word' is non-empty, append it to output (with a leading space if it's not the first).
-      - If 'punct' is non-empty:
-        - If it's a hyphen, append it directly (no leading space)
-        - Otherwise, append it directly (no leading space).
-      - Special case: if punctuation is a hyphen and followed by a word, don't add space after hyphen
+      - If 'punct' is non-empty, append it directly (no leading space).
+      - Special case: if the previous token's punctuation is a hyphen, don't add space after it
+
+    If `alignment` is a list, (source_start, source_end, output_start,
+    output_end) is appended to it for every token, mapping its span of the
+    input to its span of the returned string. started=True reassembles the
+    tokens as a continuation of earlier output (a leading word gets its
+    space), so pieces of a text can be reassembled separately and joined.
     """
     output = []
-    i = 0
-    while i < len(final_tokens):
-        word, punct = final_tokens[i]
-        
-        # If there's a word
+    position = 0
+    prev_punct = ''
+    for token in final_tokens:
+        word = token.word
+        output_start = position
+
+        # If there's a word: prepend a space unless it is the first
+        # token or follows a hyphen
         if word:
-            if not output:
-                # First token => add the word as is
-                output.append(word)
-            else:
-                # Check if previous token was a hyphen
-                prev_word, prev_punct = final_tokens[i-1] if i > 0 else ("", "")
-                if prev_punct == "-":
-                    # If previous token was a hyphen, don't add space
-                    output.append(word)
-                else:
-                    # Not the first and not after hyphen => prepend space
-                    output.append(" " + word)
+            if (output or started) and prev_punct != "-":
+                output.append(" ")
+                position += 1
+                output_start = position
+            output.append(word)
+            position += len(word)
 
         # If there's punctuation => attach immediately (no space)
+        punct = token.punct
         if punct:
             output.append(punct)
-            
-        i += 1
+            position += len(punct)
+
+        if alignment is not None:
+            alignment.append((token.start, token.end, output_start, position))
+        prev_punct = punct
 
     # Join everything into a single string
     return "".join(output)
 
 
-def transform_text(text):
+def apply_word_rules(tokens, events=None):
+    """
+    Apply dictionary + phonetic rules to every word token in place. If
+    `events` is a list, (token_index, rule_id) is appended to it for every
+    rule that fired.
+    """
+    n = len(tokens)
+    prev_word = None
+    for i, token in enumerate(tokens):
+        word = token.word
+        if word:
+            next_word = tokens[i + 1].word if (i + 1 < n) else None
+            next_next_word = tokens[i + 2].word if (i + 2 < n) else None
+
+            token.word, fired = apply_phonetic_rule_ids(
+                word, next_word, next_next_word, prev_word)
+            if events is not None:
+                for rule_id in fired:
+                    events.append((i, rule_id))
+        # Punctuation-only tokens are kept as they are
+        prev_word = word
+    return tokens
+
+
+def split_sentences(tokens):
+    """
+    Split a token list after every punctuation token containing '.', '!' or
+    '?'. Returns a list of token lists; only the last one may end without
+    such a token.
+
+    Phrases, word context and combinations never reach across a punctuation
+    token, so each piece converts exactly as it would inside the whole text,
+    provided every piece but the first is reassembled with started=True
+    (see convert_tokens).
+    """
+    sentences = []
+    current = []
+    for token in tokens:
+        current.append(token)
+        if token.punct and not SENTENCE_END.isdisjoint(token.punct):
+            sentences.append(current)
+            current = []
+    if current:
+        sentences.append(current)
+    return sentences
+
+
+def convert_tokens(tokens, started=False):
+    """
+    The explain=False pipeline on an already tokenized text or sentence:
+    merge phrases, apply the word rules and combinations in place, and
+    return the reassembled output (see reassemble_tokens_smartly for
+    `started`).
+    """
+    merge_word_pairs(tokens)
+    apply_word_rules(tokens)
+    combine_tokens(tokens)
+    return reassemble_tokens_smartly(tokens, started=started)
+
+
+def convert_sentences(tokens):
+    """
+    convert_tokens one sentence at a time (split_sentences), through the
+    sentence cache. The key is the sentence's tokens joined by single
+    spaces, so whitespace and characters that are not tokens do not matter;
+    sentences after the first are keyed with a leading space, since they
+    are reassembled with started=True.
+    """
+    cache = _sentence_cache
+    if not cache.maxsize:
+        return convert_tokens(tokens)
+    outputs = []
+    for sentence in split_sentences(tokens):
+        key = ' '.join([token.word or token.punct for token in sentence])
+        if outputs:
+            key = ' ' + key
+        output = cache.get(key)
+        if output is None:
+            output = convert_tokens(sentence, started=bool(outputs))
+            cache.put(key, output)
+        outputs.append(output)
+    return ''.join(outputs)
+
+
+def configure_sentence_cache(maxsize):
+    """Resize the sentence cache (in characters of output); 0 disables it."""
+    _sentence_cache.resize(maxsize)
+
+
+def clear_sentence_cache():
+    """Empty the sentence cache and reset its statistics."""
+    _sentence_cache.clear()
+
+
+def cache_stats():
+    """Return hit/miss statistics for the sentence and per-word caches."""
+    return {'sentences': _sentence_cache.stats(), 'words': word_cache_stats()}
+
+
+def render_events(text, merged, transformed_words, events):
+    """
+    Render the (token_index, rule_id) events recorded by transform_text into
+    its (explanations, combinations) strings. `merged` holds (word, start,
+    end) for every token after merge_word_pairs (which every token_index
+    refers to) and `transformed_words` the same tokens' words after the
+    single-word rules; phrases are read back from their span of `text`.
+    """
+    explanations = []
+    combinations = []
+    n = len(events)
+    i = 0
+    while i < n and not rule_ids.is_combination(events[i][1]):
+        index, rule_id = events[i]
+        if rule_id == rule_ids.WORD_PAIR:
+            replacement, start, end = merged[index]
+            phrase = ' '.join(WORD_PATTERN.findall(text, start, end)).lower()
+            explanations.append(rule_ids.describe_word_pair(phrase, replacement))
+            i += 1
+            continue
+        # Every rule that fired on this word, in order
+        j = i + 1
+        while j < n and events[j][0] == index and not rule_ids.is_combination(events[j][1]):
+            j += 1
+        word = merged[index][0]
+        fired = [rule_id for _, rule_id in events[i:j]]
+        explanations.append(f"{word}: {rule_ids.describe_word(word, transformed_words[index], fired)}")
+        i = j
+
+    # Replay combine_tokens to recover the words each merge joined
+    stack = []
+    for index, word in enumerate(transformed_words):
+        while i < n and events[i][0] == index:
+            word1 = stack.pop()
+            combined = combine_pair(word1, word, '')[0]
+            combinations.append(rule_ids.describe_combination(word1, word, combined, events[i][1]))
+            word = combined
+            i += 1
+        stack.append(word)
+    return explanations, combinations
+
+
+def transform_text(text, explain=True, align=False, debug=True):
     """
     1) Tokenize the input.
     2) Merge known word pairs from WORD_PAIRS before single-word phonetic rules.
-    3) Apply single-word transformations (apply_phonetic_rules).
-    4) Run multiple passes of inline combination rules (the big if/elif
+    3) Apply single-word transformations (apply_phonetic_rule_ids).
+    4) Apply inline combination rules until none applies (the big if/elif
        for 'r' + vowel, 'a' + vowel, 'sz' + vowel, etc.).
     5) Reassemble into the final text.
+
+    The stages share one list of Tokens and update it in place. Each stage
+    records what it did as (token_index, rule_id) events (see rule_ids.py),
+    rendered to English only at the end:
+
+      - explain=True returns 'before', 'after', and the rendered
+        'explanations' and 'combinations' lists;
+      - explain=EXPLAIN_IDS returns 'before', 'after', the raw events as
+        'rules', and the input text and [start, end) span of every token
+        they refer to (tokens after phrase merging) as 'tokens' and 'spans',
+        so clients can describe the rules themselves;
+      - explain=False returns only {'after': ...}: no events, no
+        intermediate 'before' string and no debug output. This is the fast
+        path for callers that only need the converted text; unless align
+        is set, it converts sentence by sentence through the sentence cache
+        (convert_sentences).
+
+    With align=True the result also has 'alignment': one
+    [source_start, source_end, output_start, output_end] per output token,
+    mapping spans of the input to the spans of 'after' they became.
+
+    debug=False drops the DEBUG line printed with explanations.
+
+    If the conversion fails, every mode returns the input unconverted, with
+    the message as 'error'.
     """
-    print("DEBUG: Input text =", repr(text))
+    if explain and debug:
+        print("DEBUG: Input text =", repr(text))
     try:
         # ---------------------------------------------------------------------
-        # 1) Normalize non-breaking spaces (optional)
+        # 1) Normalize non-breaking spaces (optional; keeps every offset)
         # ---------------------------------------------------------------------
         text = text.replace('\xa0', ' ')
+        events = [] if explain else None
 
         # ---------------------------------------------------------------------
         # 2) Tokenize
         # ---------------------------------------------------------------------
         tokens = tokenize_text(text)
 
+        # Without explanations or an alignment, repeated sentences come
+        # from the sentence cache
+        if not explain and not align:
+            return {'after': convert_sentences(tokens)}
+
         # ---------------------------------------------------------------------
-        # 3) Merge word pairs first (e.g. "por que" -> "purkê")
+        # 3) Merge word pairs and longer phrases first (e.g. "por que" -> "purkê")
         # ---------------------------------------------------------------------
-        tokens, word_pair_explanations = merge_word_pairs(tokens)
+        merge_word_pairs(tokens, events)
+        if explain:
+            merged = [(token.word, token.start, token.end) for token in tokens]
 
         # ---------------------------------------------------------------------
         # 4) Apply single-word phonetic transformations to each token
         #    (including those merged into single tokens)
         # ---------------------------------------------------------------------
-        transformed_tokens = []
-        explanations = word_pair_explanations  # Start with word pair explanations
-        for i, (word, punct) in enumerate(tokens):
-            if word:
-                next_word = tokens[i + 1][0] if (i + 1 < len(tokens)) else None
-                next_next_word = tokens[i +
-                                        2][0] if (i +
-                                                  2 < len(tokens)) else None
-                prev_word = tokens[i - 1][0] if (i - 1 >= 0) else None
-
-                # Apply dictionary + phonetic rules to this single word
-                new_word, explanation = apply_phonetic_rules(
-                    word, next_word, next_next_word, prev_word)
-                if explanation != "No changes needed":
-                    explanations.append(f"{word}: {explanation}")
-
-                transformed_tokens.append((new_word, punct))
-            else:
-                # This token is punctuation-only => just keep it
-                transformed_tokens.append((word, punct))
+        apply_word_rules(tokens, events)
 
         # ---------------------------------------------------------------------
         # Capture state after transformations but before combinations
         # ---------------------------------------------------------------------
-        before_combinations = reassemble_tokens_smartly(transformed_tokens)
+        if explain:
+            before_combinations = reassemble_tokens_smartly(tokens)
+            transformed_words = [token.word for token in tokens]
 
         # ---------------------------------------------------------------------
-        # 5) Now apply inline combination rules in a loop until no more merges
+        # 5) Now apply inline combination rules until no more merges
         #    (the big if/elif checks for 'r'+vowel, 'a'+vowel, 'sz'+vowel, etc.)
         # ---------------------------------------------------------------------
-        combination_explanations = []
-        combinations = []  # Initialize combinations list
-        made_combination = True  # Start as True to enter the loop
-
-        while made_combination:
-            made_combination = False  # Reset for this iteration
-            new_tokens = []
-            i = 0
-
-            while i < len(transformed_tokens):
-                if i < len(transformed_tokens) - 1:
-                    word1, punct1 = transformed_tokens[i]
-                    word2, punct2 = transformed_tokens[i + 1]
-
-                    # Try to combine words using the combination rules
-                    combined, rule_explanation = apply_combinations(word1, word2, punct1, punct2)
-                    if combined is not None and rule_explanation is not None and not made_combination:
-
-                            # If we found a combination to apply
-                            if combined is not None and rule_explanation is not None:
-                                print(
-                                    f"DEBUG: Found combination: {rule_explanation}"
-                                )
-                                combination_explanations.append(
-                                    rule_explanation)
-                                new_tokens.append((combined, punct2))
-                                i += 2
-                                made_combination = True
-                                continue
-
-                # If no combination was applied, keep the current token and move on
-                new_tokens.append(transformed_tokens[i])
-                i += 1
-
-            # Update tokens for next iteration
-            if made_combination:
-                transformed_tokens = new_tokens
+        combine_tokens(tokens, events)
 
         # ---------------------------------------------------------------------
         # 6) Reassemble the final text
         # ---------------------------------------------------------------------
-        after_combinations = reassemble_tokens_smartly(transformed_tokens)
-
-        return {
-            'before': before_combinations,
-            'after': after_combinations,
-            'explanations': explanations,
-            'combinations': combination_explanations
-        }
+        alignment = [] if align else None
+        after_combinations = reassemble_tokens_smartly(tokens, alignment)
+
+        if not explain:
+            result = {'after': after_combinations}
+        elif explain == EXPLAIN_IDS:
+            result = {
+                'before': before_combinations,
+                'after': after_combinations,
+                'rules': events,
+                'tokens': [text[start:end] for _, start, end in merged],
+                'spans': [(start, end) for _, start, end in merged]
+            }
+        else:
+            explanations, combination_explanations = render_events(
+                text, merged, transformed_words, events)
+            result = {
+                'before': before_combinations,
+                'after': after_combinations,
+                'explanations': explanations,
+                'combinations': combination_explanations
+            }
+        if align:
+            result['alignment'] = alignment
+        return result
 
     except Exception as e:
         print(f"Error in transform_text: {e}")
         traceback.print_exc()
-        return {
-            'before': text,
-            'after': text,
-            'explanations': [f"Error: {str(e)}"],
-            'combinations': []
-        }
+        if not explain:
+            result = {'after': text, 'error': str(e)}
+        elif explain == EXPLAIN_IDS:
+            result = {'before': text, 'after': text, 'rules': [], 'tokens': [], 'spans': [], 'error': str(e)}
+        else:
+            result = {
+                'before': text,
+                'after': text,
+                'explanations': [f"Error: {str(e)}"],
+                'combinations': [],
+                'error': str(e)
+            }
+        if align:
+            result['alignment'] = [(0, len(text), 0, len(text))]
+        return result
+
+
+def convert_text(text, explain=True, align=False, debug=True):
+    """
+    Convert Portuguese text to its phonetic representation with explanations.
+    Pass explain=False when only result['after'] is needed, and align=True
+    for the source → output span alignment (see transform_text).
+    """
+    result = transform_text(text, explain, align, debug)
+    return result
 
 
-def convert_text(text):
-    """Convert Portuguese text to its phonetic representation with explanations."""
-    result = transform_text(text)
-    return result
+def convert_texts(texts, explain=False, align=False):
+    """
+    Convert a batch of texts, returning one result per input in the same order.
+
+    Identical inputs are converted once and share the per-word cache with the
+    rest of the batch. An item that is not a string gets {'error': message}
+    in its slot, and one that fails to convert comes back unconverted with
+    an 'error' (see transform_text), instead of failing the whole batch.
+    explain and align are passed to transform_text for every item. Only
+    'after' is returned unless the caller asks for explanations, and no
+    DEBUG output is printed either way.
+    """
+    converted = {}
+    results = []
+    for text in texts:
+        if not isinstance(text, str):
+            results.append({'error': 'Text must be a string'})
+            continue
+        if text not in converted:
+            try:
+                converted[text] = convert_text(text, explain, align, debug=False)
+            except Exception as e:
+                converted[text] = {'error': str(e)}
+        results.append(dict(converted[text]))
+    return results
+
+
+def format_record(line, result, explanations=True, output_only=False):
+    """
+    Render one conversion result as a line of streaming output (without the
+    trailing newline): a JSON object with the input `text`, `before` and the
+    converted `after` string, plus `explanations` and `combinations`, or only
+    the converted text if output_only=True. `before` is the text after the
+    word rules and before combinations; with explanations=False that stage
+    is not kept, and `before` is the input line.
+    """
+    if output_only:
+        return result['after']
+    record = {
+        'text': line,
+        'before': result['before'] if explanations else line,
+        'after': result['after'],
+    }
+    if explanations:
+        record['explanations'] = result['explanations']
+        record['combinations'] = result['combinations']
+    return json.dumps(record, ensure_ascii=False)
+
+
+def record_explain(explanations, output_only):
+    """The explain argument that gives format_record what it needs."""
+    return explanations and not output_only
+
+
+def stream_convert(lines, out, explanations=True, output_only=False,
+                   workers=1, chunk_size=PARALLEL_CHUNK_SIZE):
+    """
+    Convert an iterable of lines one at a time and write each result to `out`
+    as soon as it is ready, so memory stays flat however long the input is.
+    See format_record for the output format. With workers > 1 the lines are
+    converted by convert_lines_parallel, still written in input order.
+
+    Returns a dict with the number of `lines` and `words` converted.
+    """
+    lines = (line.rstrip('\r\n') for line in lines)
+    stats = {'lines': 0, 'words': 0}
+    if workers > 1:
+        for record in convert_lines_parallel(lines, workers, chunk_size, stats=stats,
+                                             record_options=(explanations, output_only)):
+            out.write(record + '\n')
+        return stats
+
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for line in lines:
+            result = convert_text(line, explain=record_explain(explanations, output_only))
+            out.write(format_record(line, result, explanations, output_only) + '\n')
+            stats['lines'] += 1
+            stats['words'] += len(line.split())
+    return stats
+
+
+def init_worker():
+    """Process pool initializer: silence debug output and warm the caches."""
+    sys.stdout = open(os.devnull, 'w')
+    convert_text(WARMUP_TEXT)
+
+
+def _convert_chunk(lines, record_options=None):
+    """
+    Process pool task: convert a chunk of lines. Returns (results, word_count),
+    where results are convert_text dicts, or format_record strings if
+    record_options=(explanations, output_only) is given.
+    """
+    results = []
+    words = 0
+    explain = record_options is None or record_explain(*record_options)
+    for line in lines:
+        result = convert_text(line, explain)
+        if record_options is not None:
+            result = format_record(line, result, *record_options)
+        results.append(result)
+        words += len(line.split())
+    return results, words
 
 
-def main():
+def convert_lines_parallel(lines, workers=None, chunk_size=PARALLEL_CHUNK_SIZE,
+                           max_in_flight=None, stats=None, record_options=None):
+    """
+    Convert an iterable of lines on a pool of worker processes, yielding the
+    convert_text results in input order.
+
+    Lines are sent to the workers in chunks of `chunk_size`, and at most
+    `max_in_flight` chunks (default: twice the number of workers) are
+    pending at once, so memory stays bounded for any input size. Each
+    worker warms its caches once when it starts.
+
+    Args:
+        lines: Iterable of strings to convert
+        workers: Number of processes (default: os.cpu_count())
+        chunk_size: Lines per task sent to a worker
+        max_in_flight: Maximum number of chunks submitted but not yet yielded
+        stats: Optional dict whose 'lines' and 'words' counters are updated
+        record_options: If given as (explanations, output_only), yield
+            format_record strings instead of result dicts
+
+    Yields:
+        One result per input line, in input order
+    """
+    # Imported here so the API server does not pay for multiprocessing at startup
+    from concurrent.futures import ProcessPoolExecutor
+
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or 2 * workers
+    if stats is None:
+        stats = {}
+    stats.setdefault('lines', 0)
+    stats.setdefault('words', 0)
+
+    def collect(future):
+        results, words = future.result()
+        stats['lines'] += len(results)
+        stats['words'] += words
+        return results
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as pool:
+        pending = deque()
+        chunk = []
+        for line in lines:
+            chunk.append(line)
+            if len(chunk) < chunk_size:
+                continue
+            pending.append(pool.submit(_convert_chunk, chunk, record_options))
+            chunk = []
+            if len(pending) >= max_in_flight:
+                yield from collect(pending.popleft())
+        if chunk:
+            pending.append(pool.submit(_convert_chunk, chunk, record_options))
+        while pending:
+            yield from collect(pending.popleft())
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Convert Portuguese text to its colloquial phonetic spelling.")
+    parser.add_argument('input', nargs='?',
+                        help="Input file (default: standard input)")
+    parser.add_argument('--stream', action='store_true',
+                        help="Read line by line and write JSON Lines instead of the verbose report")
+    parser.add_argument('-o', '--output',
+                        help="Output file (implies --stream; default: standard output)")
+    parser.add_argument('--no-explanations', action='store_true',
+                        help="Convert without explanations: records carry text, before (the input line) "
+                             "and after (implies --stream)")
+    parser.add_argument('--output-only', action='store_true',
+                        help="Write only the converted text, one line per input line (implies --stream)")
+    parser.add_argument('-j', '--workers', type=int, default=1,
+                        help="Convert on this many processes, keeping the output in input order "
+                             "(implies --stream; 0 = one per CPU)")
+    parser.add_argument('--chunk-size', type=int, default=PARALLEL_CHUNK_SIZE,
+                        help="Lines sent to a worker process at a time (default: %(default)s)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+    if args.stream or args.output or args.no_explanations or args.output_only or workers > 1:
+        infile = open(args.input, 'r', encoding='utf-8') if args.input else \
+            io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8')
+        if args.output:
+            outfile = open(args.output, 'w', encoding='utf-8', buffering=STREAM_BUFFER_SIZE)
+        else:
+            outfile = io.TextIOWrapper(io.BufferedWriter(sys.stdout.buffer, STREAM_BUFFER_SIZE),
+                                       encoding='utf-8')
+        start = time.perf_counter()
+        with infile, outfile:
+            stats = stream_convert(infile, outfile,
+                                   explanations=not args.no_explanations,
+                                   output_only=args.output_only,
+                                   workers=workers, chunk_size=args.chunk_size)
+        if workers > 1:
+            elapsed = time.perf_counter() - start
+            print(f"Converted {stats['lines']} lines ({stats['words']} words) in {elapsed:.2f}s "
+                  f"on {workers} workers: {stats['lines'] / elapsed:.0f} lines/sec, "
+                  f"{stats['words'] / elapsed:.0f} words/sec", file=sys.stderr)
+        return
+
     # Set UTF-8 encoding for stdout
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
 
     # Check if file is provided as a command-line argument
-    if len(sys.argv) > 1:
-        with open(sys.argv[1], 'r', encoding='utf-8') as f:
+    if args.input:
+        with open(args.input, 'r', encoding='utf-8') as f:
             input_text = f.read()
     else:
         # If not, read from standard input
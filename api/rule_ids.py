@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Stable numeric IDs for every rule the converter can apply, and their English
+descriptions.
+
+The pipeline records what it did as compact (token_index, rule_id) events;
+portuguese_converter.render_events turns them into the explanation strings
+only when a caller asks for text. Clients that get the IDs (explain='ids')
+can look them up in RULES and describe them in their own language.
+
+  1        word pair / phrase replacement
+  10-29    whole-word rules (negation, você, irregular verbs, dictionary)
+  100-199  PHONETIC_RULES table (IDs are set in config/rule_table.py)
+  200-299  combination of adjacent words
+
+IDs are never reused; a removed rule leaves a gap.
+"""
+
+from config.rule_table import PHONETIC_RULES
+
+WORD_PAIR = 1
+
+NEGATION_PRONOUN_VERB = 10
+NEGATION_VERB = 11
+NEGATION_DEFAULT = 12
+VOCE_PRONOUN_VERB = 13
+VOCE_VERB = 14
+VOCES_PRONOUN_VERB = 15
+VOCES_VERB = 16
+IRREGULAR_VERB = 20
+DICTIONARY = 21
+
+SKIP_BRACKETED_PRONOUN = 200
+KEEP_R_BEFORE_VOWEL = 201
+DROP_N_BEFORE_M = 202
+JOIN_SAME_LETTER = 203
+JOIN_A_VOWEL = 204
+KEEP_EU_BEFORE_VOWEL = 205
+DROP_U_BEFORE_VOWEL = 206
+S_BETWEEN_VOWELS = 207
+JOIN_M_VOWEL = 208
+DROP_IA_BEFORE_I = 209
+DROP_I_BEFORE_E = 210
+ACUTE_A_TO_A = 211
+USE_E_ACUTE = 212
+YN_M_TO_YM = 213
+GA_TO_GUI = 214
+CA_TO_KI = 215
+DROP_A_BEFORE_IE = 216
+JOIN_VOWELS = 217
+
+# Descriptions; '{word}' and '{trans}' are filled in with the word and its
+# transformation when a whole-word rule is rendered
+WORD_RULES = {
+    NEGATION_PRONOUN_VERB: "Negation before pronoun+verb: não → nu",
+    NEGATION_VERB: "Negation before verb: não → nu",
+    NEGATION_DEFAULT: "Default negation: não → nãu",
+    VOCE_PRONOUN_VERB: "Pronoun before pronoun+verb: você → cê",
+    VOCE_VERB: "Pronoun before verb: você → cê",
+    VOCES_PRONOUN_VERB: "Pronoun before pronoun+verb: vocês → cêis",
+    VOCES_VERB: "Pronoun before verb: vocês → cêis",
+    IRREGULAR_VERB: "Irregular verb: {word} → {trans}",
+    DICTIONARY: "Dictionary: {word} → {trans}",
+}
+WORD_RULES.update((rule[0], rule[3]) for rule in PHONETIC_RULES)
+
+COMBINATION_RULES = {
+    SKIP_BRACKETED_PRONOUN: "Skip bracketed pronoun",
+    KEEP_R_BEFORE_VOWEL: "Keep 'r' when joining with vowel",
+    DROP_N_BEFORE_M: "Drop 'n' before 'm'",
+    JOIN_SAME_LETTER: "Join same letter/sound",
+    JOIN_A_VOWEL: "Join 'a' with following vowel",
+    KEEP_EU_BEFORE_VOWEL: "Keep 'eu/êu' before vowel",
+    DROP_U_BEFORE_VOWEL: "Drop 'u' before vowel",
+    S_BETWEEN_VOWELS: "'s' between vowels becomes 'z'",
+    JOIN_M_VOWEL: "Join 'm' with following vowel",
+    DROP_IA_BEFORE_I: "Drop 'ia' before 'i'",
+    DROP_I_BEFORE_E: "Drop 'i' before e/é/ê",
+    ACUTE_A_TO_A: "Convert 'á' to 'a'",
+    USE_E_ACUTE: "Use é",
+    YN_M_TO_YM: "yn + m → ym",
+    GA_TO_GUI: "ga + i/e → gui/gue",
+    CA_TO_KI: "ca + i/e → ki/ke",
+    DROP_A_BEFORE_IE: "Drop 'a' before i/e",
+    JOIN_VOWELS: "Join vowels",
+}
+
+RULES = {WORD_PAIR: "Common pronunciation and usage: {phrase} → {replacement}"}
+RULES.update(WORD_RULES)
+RULES.update(COMBINATION_RULES)
+
+
+def is_combination(rule_id):
+    return rule_id >= SKIP_BRACKETED_PRONOUN
+
+
+def describe_word(word, trans, rule_ids):
+    """The explanation apply_phonetic_rules gives for a word transformed by rule_ids."""
+    if not rule_ids:
+        return "No changes needed"
+    if len(rule_ids) == 1 and rule_ids[0] in (IRREGULAR_VERB, DICTIONARY):
+        return WORD_RULES[rule_ids[0]].format(word=word, trans=trans)
+    return " + ".join(WORD_RULES[rule_id] for rule_id in rule_ids)
+
+
+def describe_combination(word1, word2, combined, rule_id):
+    """The explanation apply_combinations gives for joining word1 and word2."""
+    if rule_id == SKIP_BRACKETED_PRONOUN:
+        return f"{COMBINATION_RULES[rule_id]}: {word1} {word2} → {combined}"
+    return f"{word1} + {word2} → {combined} ({COMBINATION_RULES[rule_id]})"
+
+
+def describe_word_pair(phrase, replacement):
+    return RULES[WORD_PAIR].format(phrase=phrase, replacement=replacement)
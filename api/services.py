@@ -0,0 +1,93 @@
+import os
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Seconds before a service whose factory failed for a transient reason (a
+# network error, an upstream 5xx) is constructed again
+SERVICE_RETRY_INTERVAL = float(os.getenv('SERVICE_RETRY_INTERVAL', '10'))
+
+
+class ServiceUnavailable(Exception):
+    """Raised when a service's factory failed, e.g. because credentials are missing."""
+
+    def __init__(self, name, error):
+        super().__init__(f"{name} is not available: {error}")
+        self.name = name
+        self.error = error
+
+
+class ServiceConfigurationError(Exception):
+    """Raised by a factory when the service is not configured, e.g. its credentials are missing."""
+
+
+class ServiceRegistry:
+    """
+    Lazily constructed integrations (LLM, Twilio, TTS, ...).
+
+    Each service is registered with a factory that imports its SDK and builds
+    it; nothing runs until the first get(). The instance is kept for the
+    life of the process. So is a configuration failure (the factory raised
+    ServiceConfigurationError, or the SDK is not installed), since it cannot
+    fix itself; any other failure is retried after SERVICE_RETRY_INTERVAL
+    seconds, so a failing service is not retried on every request.
+    """
+
+    def __init__(self):
+        self._factories = {}
+        self._instances = {}
+        self._errors = {}
+        # Reentrant, so a factory can get() the services it depends on
+        self._lock = threading.RLock()
+
+    def register(self, name, factory):
+        """Register a zero-argument factory for a service."""
+        self._factories[name] = factory
+
+    def get(self, name):
+        """Return the service, constructing it on first use; raises ServiceUnavailable."""
+        try:
+            return self._instances[name]
+        except KeyError:
+            pass
+        with self._lock:
+            if name in self._instances:
+                return self._instances[name]
+            if name in self._errors:
+                error, retry_at = self._errors[name]
+                if retry_at is None or time.monotonic() < retry_at:
+                    raise ServiceUnavailable(name, error)
+            try:
+                instance = self._factories[name]()
+            except Exception as e:
+                permanent = isinstance(e, (ServiceConfigurationError, ImportError))
+                logger.warning(f"{name} initialization failed{'' if permanent else ', will retry'}: {e}")
+                self._errors[name] = (e, None if permanent else time.monotonic() + SERVICE_RETRY_INTERVAL)
+                raise ServiceUnavailable(name, e)
+            logger.info(f"{name} successfully initialized")
+            self._errors.pop(name, None)
+            self._instances[name] = instance
+            return instance
+
+    def is_available(self, name):
+        """Construct the service if needed and report whether that succeeded."""
+        try:
+            self.get(name)
+            return True
+        except ServiceUnavailable:
+            return False
+
+    def is_initialized(self, name):
+        """Whether the service has been constructed, without constructing it."""
+        return name in self._instances
+
+    def reset(self, name=None):
+        """Forget one (or every) constructed instance or failure."""
+        with self._lock:
+            for store in (self._instances, self._errors):
+                if name is None:
+                    store.clear()
+                else:
+                    store.pop(name, None)
@@ -1,76 +1,262 @@
 
+import asyncio
 import os
+import threading
+import time
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
+from audio_cache import audio_cache_key
+from services import ServiceConfigurationError
+
+load_dotenv()
+
+# Overridable so the client can be pointed at a local stub server
+ELEVENLABS_BASE_URL = os.getenv('ELEVENLABS_BASE_URL', 'https://api.elevenlabs.io/v1')
+# Seconds to wait for a connection and for the response to a request
+TTS_CONNECT_TIMEOUT = float(os.getenv('TTS_CONNECT_TIMEOUT', '3.05'))
+TTS_READ_TIMEOUT = float(os.getenv('TTS_READ_TIMEOUT', '30'))
+# How long a successful voices check stays valid before it is repeated
+TTS_VOICES_TTL = float(os.getenv('TTS_VOICES_TTL', '3600'))
+# Keep-alive connections kept open per host by the sync client; each
+# request holds a worker thread, so this matches the server's threads
+TTS_POOL_SIZE = int(os.getenv('TTS_POOL_SIZE', '10'))
+# Connections of the async client (ASGI mode): a request waiting on
+# ElevenLabs costs only a socket there, so it is sized for the number of
+# syntheses in flight rather than for a thread pool
+TTS_ASYNC_POOL_SIZE = int(os.getenv('TTS_ASYNC_POOL_SIZE', '100'))
+# Bytes read from the upstream streaming endpoint per chunk
+TTS_STREAM_CHUNK_SIZE = int(os.getenv('TTS_STREAM_CHUNK_SIZE', '4096'))
+
 
 class TTSConverter:
-    def __init__(self):
-        load_dotenv()
-        self.api_key = os.getenv('ELEVENLABS_API_KEY')
-        self.base_url = 'https://api.elevenlabs.io/v1'
-        
-        # Verify API key and get available voices
-        print("Verifying API key and getting voices...")
-        voices_url = f'{self.base_url}/voices'
-        response = requests.get(voices_url, headers={'xi-api-key': self.api_key})
-        if response.status_code != 200:
-            print(f"API Key validation failed. Status: {response.status_code}")
-            print(f"Response: {response.text}")
-            raise Exception("Invalid ElevenLabs API key")
-        
-        self.voices = {
-            'br': "kd1lRcSdRGIfyKxQKjmH",  # Brazilian Portuguese
-            'pt': "NdHRjGnnDKGnnm2c19le"    # European Portuguese
+    """
+    ElevenLabs client meant to be built once per process and shared between
+    requests. It keeps a pooled keep-alive session, so synthesis reuses open
+    TLS connections. Construction does no I/O: the API key and voices are
+    checked on first use and again after TTS_VOICES_TTL seconds.
+    """
+
+    VOICES = {
+        'br': "kd1lRcSdRGIfyKxQKjmH",  # Brazilian Portuguese
+        'pt': "NdHRjGnnDKGnnm2c19le"    # European Portuguese
+    }
+    MODEL_ID = 'eleven_multilingual_v2'
+    VOICE_SETTINGS = {
+        'stability': 0.5,
+        'similarity_boost': 0.75,
+        'style': 0.0,
+        'use_speaker_boost': True
+    }
+
+    @classmethod
+    def voice_for(cls, variant):
+        return cls.VOICES.get(variant, cls.VOICES['br'])
+
+    @classmethod
+    def cache_key(cls, text, variant='br'):
+        """Audio cache key for text in a variant; needs no API call, so a hit skips construction."""
+        return audio_cache_key(text, variant, cls.voice_for(variant), cls.MODEL_ID, cls.VOICE_SETTINGS)
+
+    def __init__(self, api_key=None, base_url=None, timeout=None, voices_ttl=None):
+        self.api_key = api_key or os.getenv('ELEVENLABS_API_KEY')
+        if not self.api_key:
+            raise ServiceConfigurationError("ELEVENLABS_API_KEY is not set")
+        self.base_url = (base_url or ELEVENLABS_BASE_URL).rstrip('/')
+        self.timeout = timeout or (TTS_CONNECT_TIMEOUT, TTS_READ_TIMEOUT)
+        self.voices_ttl = TTS_VOICES_TTL if voices_ttl is None else voices_ttl
+        self.voices = self.VOICES
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=TTS_POOL_SIZE)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({'xi-api-key': self.api_key})
+
+        self.validated_at = None
+        self._validate_lock = threading.Lock()
+
+    def validate_voices(self, force=False):
+        """
+        Check the API key and voices with GET /voices, unless a previous check
+        is younger than voices_ttl. Raises if the key is rejected.
+        """
+        if not force and self._validation_fresh():
+            return
+        with self._validate_lock:
+            if not force and self._validation_fresh():
+                return
+            print("Verifying API key and getting voices...")
+            response = self.session.get(f'{self.base_url}/voices', timeout=self.timeout)
+            if response.status_code != 200:
+                print(f"API Key validation failed. Status: {response.status_code}")
+                print(f"Response: {response.text}")
+                raise Exception("Invalid ElevenLabs API key")
+            available = {voice.get('voice_id') for voice in response.json().get('voices', [])}
+            missing = [variant for variant, voice_id in self.voices.items() if voice_id not in available]
+            if available and missing:
+                print(f"Warning: voices not available for {', '.join(missing)}")
+            self.validated_at = time.monotonic()
+
+    def _validation_fresh(self):
+        return self.validated_at is not None and time.monotonic() - self.validated_at < self.voices_ttl
+
+    def close(self):
+        self.session.close()
+
+    @classmethod
+    def payload(cls, text):
+        return {
+            'text': text,
+            'model_id': cls.MODEL_ID,
+            'voice_settings': cls.VOICE_SETTINGS
         }
-        print(f"Available voices: BR and PT")
+
+    def stream_speech(self, text, variant='br', chunk_size=TTS_STREAM_CHUNK_SIZE):
+        """
+        Start synthesis on the upstream streaming endpoint and return an
+        iterator over MP3 chunks as they arrive, or None if the request failed.
+        The status is checked before returning, so a caller can still answer
+        with an error. Closing the iterator releases the upstream connection.
+        """
+        try:
+            self.validate_voices()
+            print(f"Attempting streaming TTS conversion with text: {text}")
+
+            tts_url = f"{self.base_url}/text-to-speech/{self.voice_for(variant)}/stream"
+            response = self.session.post(tts_url, json=self.payload(text), timeout=self.timeout, stream=True)
+
+            if response.status_code != 200:
+                print(f"ElevenLabs API Error: Status {response.status_code}")
+                print(f"Error details: {response.text}")
+                print(f"Request URL: {tts_url}")
+                response.close()
+                return None
+        except Exception as e:
+            print(f"Failed to start speech stream: {str(e)}")
+            return None
+
+        def chunks():
+            try:
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    if chunk:
+                        yield chunk
+            finally:
+                response.close()
+
+        return chunks()
 
     def synthesize_speech(self, text, variant='br'):
         try:
+            self.validate_voices()
             print(f"Attempting TTS conversion with text: {text}")
             print(f"Using API key: {self.api_key[:5]}... and variant: {variant}")
-            
-            headers = {
-                'xi-api-key': self.api_key,
-                'Content-Type': 'application/json'
-            }
-            
-            voice_id = self.voices.get(variant, self.voices['br'])
-            
-            payload = {
-                'text': text,
-                'model_id': 'eleven_multilingual_v2',
-                'voice_settings': {
-                    'stability': 0.5,
-                    'similarity_boost': 0.75,
-                    'style': 0.0,
-                    'use_speaker_boost': True
-                }
-            }
-            
-            print("Sending request to ElevenLabs API...")
+
+            voice_id = self.voice_for(variant)
+            payload = self.payload(text)
+
             tts_url = f"{self.base_url}/text-to-speech/{voice_id}"
-            print(f"Request URL: {tts_url}")
-            
-            response = requests.post(
-                tts_url,
-                json=payload,
-                headers=headers
-            )
-            
+            print(f"Sending request to ElevenLabs API: {tts_url}")
+
+            response = self.session.post(tts_url, json=payload, timeout=self.timeout)
+
             print(f"Response status: {response.status_code}")
-            print(f"Response headers: {response.headers}")
 
             if response.status_code == 200:
                 return response.content
             else:
-                error_details = response.json()
                 print(f"ElevenLabs API Error: Status {response.status_code}")
-                print(f"Error details: {error_details}")
-                print(f"Request URL: {self.url}")
-                print(f"Headers: {response.request.headers}")
-                print(f"Request body: {response.request.body}")
+                print(f"Error details: {response.text}")
+                print(f"Request URL: {tts_url}")
                 return None
 
         except Exception as e:
             print(f"Failed to synthesize speech: {str(e)}")
             return None
+
+
+class AsyncTTSConverter:
+    """
+    asyncio counterpart of TTSConverter for the ASGI app, on a pooled
+    httpx.AsyncClient. Construction does no I/O; the voices check runs on
+    first use and again after voices_ttl seconds.
+    """
+
+    def __init__(self, api_key=None, base_url=None, timeout=None, voices_ttl=None):
+        self.api_key = api_key or os.getenv('ELEVENLABS_API_KEY')
+        if not self.api_key:
+            raise ServiceConfigurationError("ELEVENLABS_API_KEY is not set")
+        self.base_url = (base_url or ELEVENLABS_BASE_URL).rstrip('/')
+        connect, read = timeout or (TTS_CONNECT_TIMEOUT, TTS_READ_TIMEOUT)
+        self.voices_ttl = TTS_VOICES_TTL if voices_ttl is None else voices_ttl
+        self.voices = TTSConverter.VOICES
+        self.client = httpx.AsyncClient(
+            headers={'xi-api-key': self.api_key},
+            timeout=httpx.Timeout(read, connect=connect),
+            limits=httpx.Limits(max_connections=TTS_ASYNC_POOL_SIZE,
+                                max_keepalive_connections=TTS_ASYNC_POOL_SIZE))
+        self.validated_at = None
+        self._validate_lock = asyncio.Lock()
+
+    def _validation_fresh(self):
+        return self.validated_at is not None and time.monotonic() - self.validated_at < self.voices_ttl
+
+    async def validate_voices(self, force=False):
+        """Check the API key with GET /voices unless a previous check is still fresh."""
+        if not force and self._validation_fresh():
+            return
+        async with self._validate_lock:
+            if not force and self._validation_fresh():
+                return
+            response = await self.client.get(f'{self.base_url}/voices')
+            if response.status_code != 200:
+                print(f"API Key validation failed. Status: {response.status_code}")
+                raise Exception("Invalid ElevenLabs API key")
+            self.validated_at = time.monotonic()
+
+    async def synthesize_speech(self, text, variant='br'):
+        try:
+            await self.validate_voices()
+            tts_url = f"{self.base_url}/text-to-speech/{TTSConverter.voice_for(variant)}"
+            response = await self.client.post(tts_url, json=TTSConverter.payload(text))
+            if response.status_code == 200:
+                return response.content
+            print(f"ElevenLabs API Error: Status {response.status_code}")
+            print(f"Error details: {response.text}")
+            return None
+        except Exception as e:
+            print(f"Failed to synthesize speech: {str(e)}")
+            return None
+
+    async def stream_speech(self, text, variant='br', chunk_size=TTS_STREAM_CHUNK_SIZE):
+        """
+        Start synthesis on the streaming endpoint and return an async iterator
+        over MP3 chunks, or None if the request failed. Closing the iterator
+        releases the upstream connection.
+        """
+        try:
+            await self.validate_voices()
+            tts_url = f"{self.base_url}/text-to-speech/{TTSConverter.voice_for(variant)}/stream"
+            request = self.client.build_request('POST', tts_url, json=TTSConverter.payload(text))
+            response = await self.client.send(request, stream=True)
+            if response.status_code != 200:
+                print(f"ElevenLabs API Error: Status {response.status_code}")
+                await response.aclose()
+                return None
+        except Exception as e:
+            print(f"Failed to start speech stream: {str(e)}")
+            return None
+
+        async def chunks():
+            try:
+                async for chunk in response.aiter_bytes(chunk_size):
+                    if chunk:
+                        yield chunk
+            finally:
+                await response.aclose()
+
+        return chunks()
+
+    async def aclose(self):
+        await self.client.aclose()
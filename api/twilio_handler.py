@@ -1,7 +1,11 @@
 
 from twilio.rest import Client
+from twilio.base.exceptions import TwilioRestException
+from twilio.http.http_client import TwilioHttpClient
 from portuguese_converter import convert_text
-from flask import request
+from message_queue import PermanentError
+from services import ServiceConfigurationError
+from urllib.parse import urlsplit
 from dotenv import load_dotenv
 import os
 import logging
@@ -12,30 +16,68 @@ logger = logging.getLogger(__name__)
 
 load_dotenv()
 
+# Send API requests here instead of https://*.twilio.com (e.g. a local fake API)
+TWILIO_API_BASE_URL = os.getenv('TWILIO_API_BASE_URL')
+TWILIO_TIMEOUT = float(os.getenv('TWILIO_TIMEOUT', '10'))
+
+
+class RebasedHttpClient(TwilioHttpClient):
+    """TwilioHttpClient that sends every request to another scheme and host."""
+
+    def __init__(self, base_url, **kwargs):
+        super().__init__(**kwargs)
+        self.base_url = base_url.rstrip('/')
+
+    def request(self, method, url, *args, **kwargs):
+        parts = urlsplit(url)
+        url = self.base_url + parts.path + (f'?{parts.query}' if parts.query else '')
+        return super().request(method, url, *args, **kwargs)
+
+
+def default_convert(text):
+    return convert_text(text, explain=False)['after']
+
+
 class TwilioHandler:
     def __init__(self):
         self.account_sid = os.getenv('TWILIO_ACCOUNT_SID')
         self.auth_token = os.getenv('TWILIO_AUTH_TOKEN')
         self.whatsapp_number = os.getenv('TWILIO_WHATSAPP_NUMBER')
-        
+
         if not all([self.account_sid, self.auth_token, self.whatsapp_number]):
             logger.error("Missing required Twilio credentials")
-            raise ValueError("Missing required Twilio credentials")
-            
-        self.client = Client(self.account_sid, self.auth_token)
+            raise ServiceConfigurationError("Missing required Twilio credentials")
+
+        if TWILIO_API_BASE_URL:
+            http_client = RebasedHttpClient(TWILIO_API_BASE_URL, timeout=TWILIO_TIMEOUT)
+        else:
+            http_client = TwilioHttpClient(timeout=TWILIO_TIMEOUT)
+        self.client = Client(self.account_sid, self.auth_token, http_client=http_client)
         logger.info("Twilio client initialized successfully")
-    
-    def handle_message(self, request_data):
+
+    def handle_message(self, request_data, convert=default_convert):
+        """
+        Convert an incoming WhatsApp message and send the result back.
+
+        `convert` takes the message text and returns the converted text, so
+        the caller decides where the CPU-bound conversion runs. Twilio errors
+        that a retry cannot fix (4xx other than 429) are raised as
+        PermanentError.
+        """
         incoming_msg = request_data.get('Body', '').strip()
         sender = request_data.get('From', '')
-        
+
         # Convert text using existing transformer
-        result = convert_text(incoming_msg)
-        response_text = result['after']
-        
+        response_text = convert(incoming_msg)
+
         # Send transformed text back via WhatsApp
-        self.client.messages.create(
-            body=response_text,
-            from_=f'whatsapp:{self.whatsapp_number}',
-            to=sender
-        )
+        try:
+            self.client.messages.create(
+                body=response_text,
+                from_=f'whatsapp:{self.whatsapp_number}',
+                to=sender
+            )
+        except TwilioRestException as e:
+            if 400 <= e.status < 500 and e.status != 429:
+                raise PermanentError(f"Twilio rejected the reply to {sender}: {e.status} {e.msg}") from e
+            raise
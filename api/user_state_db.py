@@ -0,0 +1,203 @@
+"""
+Per-user tutor state (syllabus position and what the user told the tutor).
+
+States are JSON documents in a SQLite table. Reads and writes go through an
+in-process write-back cache: save_user_state only updates memory and marks
+the user dirty, and a background thread writes every dirty state in one
+transaction every USER_STATE_FLUSH_INTERVAL seconds, or as soon as
+USER_STATE_FLUSH_BATCH users are dirty. Dirty states are also flushed before
+they are evicted and at interpreter exit.
+
+The cache is per process: with several workers, route a user to one worker,
+or set USER_STATE_FLUSH_INTERVAL=0 to write through and
+USER_STATE_CACHE_SIZE=0 to always read from the database.
+"""
+
+import atexit
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+USER_STATE_DB = os.getenv('USER_STATE_DB', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'user_state.db'))
+# Users whose state is kept in memory
+USER_STATE_CACHE_SIZE = int(os.getenv('USER_STATE_CACHE_SIZE', '10000'))
+# Seconds between flushes of dirty states (0 writes every save through)
+USER_STATE_FLUSH_INTERVAL = float(os.getenv('USER_STATE_FLUSH_INTERVAL', '2'))
+# Number of dirty users that triggers an early flush
+USER_STATE_FLUSH_BATCH = int(os.getenv('USER_STATE_FLUSH_BATCH', '100'))
+
+
+class UserStateStore:
+    """SQLite-backed user state with an LRU write-back cache."""
+
+    def __init__(self, db_path=USER_STATE_DB, cache_size=USER_STATE_CACHE_SIZE,
+                 flush_interval=USER_STATE_FLUSH_INTERVAL, flush_batch=USER_STATE_FLUSH_BATCH):
+        self.db_path = db_path
+        self.cache_size = cache_size
+        self.flush_interval = flush_interval
+        self.flush_batch = flush_batch
+        self._cache = OrderedDict()
+        self._dirty = set()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        self.hits = 0
+        self.misses = 0
+        self.flushes = 0
+
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS user_state ("
+            "user_id TEXT PRIMARY KEY, state TEXT NOT NULL, updated_at REAL NOT NULL)")
+
+        self._flusher = None
+        if flush_interval > 0:
+            self._flusher = threading.Thread(target=self._flush_loop, name='user-state-flush', daemon=True)
+            self._flusher.start()
+
+    def get(self, user_id):
+        """Return the user's state, or None for a user with no saved state. Do not mutate it in place."""
+        with self._lock:
+            if user_id in self._cache:
+                self._cache.move_to_end(user_id)
+                self.hits += 1
+                return self._cache[user_id]
+            self.misses += 1
+
+        with self._flush_lock:
+            row = self._conn.execute("SELECT state FROM user_state WHERE user_id = ?", (user_id,)).fetchone()
+        state = json.loads(row[0]) if row else None
+
+        if state is not None:
+            with self._lock:
+                # A save may have raced with the read; the cached value wins
+                state = self._cache.setdefault(user_id, state)
+                self._cache.move_to_end(user_id)
+            self._evict()
+        return state
+
+    def save(self, user_id, state):
+        """Replace the user's state. It is written to SQLite on the next flush."""
+        if self.flush_interval <= 0 or self.cache_size <= 0:
+            self._write([(user_id, state)])
+            with self._lock:
+                if self.cache_size > 0:
+                    self._cache[user_id] = state
+                    self._cache.move_to_end(user_id)
+            self._evict()
+            return
+
+        with self._lock:
+            self._cache[user_id] = state
+            self._cache.move_to_end(user_id)
+            self._dirty.add(user_id)
+            pending = len(self._dirty)
+        if pending >= self.flush_batch:
+            self._wakeup.set()
+        self._evict()
+
+    def _evict(self):
+        with self._lock:
+            overflow = len(self._cache) - self.cache_size
+            if overflow <= 0:
+                return
+            evicted = []
+            for _ in range(overflow):
+                user_id, state = self._cache.popitem(last=False)
+                if user_id in self._dirty:
+                    self._dirty.discard(user_id)
+                    evicted.append((user_id, state))
+        if evicted:
+            self._write(evicted)
+
+    def flush(self):
+        """Write every dirty state to SQLite in one transaction; returns how many were written."""
+        with self._lock:
+            batch = [(user_id, self._cache[user_id]) for user_id in self._dirty if user_id in self._cache]
+            self._dirty.clear()
+        if batch:
+            try:
+                self._write(batch)
+            except sqlite3.Error:
+                # Keep them dirty for the next attempt, unless saved again meanwhile
+                with self._lock:
+                    self._dirty.update(user_id for user_id, _ in batch if user_id in self._cache)
+                raise
+        return len(batch)
+
+    def _write(self, batch):
+        now = time.time()
+        rows = [(user_id, json.dumps(state, ensure_ascii=False), now) for user_id, state in batch]
+        with self._flush_lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO user_state (user_id, state, updated_at) VALUES (?, ?, ?)", rows)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        with self._lock:
+            self.flushes += 1
+
+    def _flush_loop(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except sqlite3.Error as e:
+                logger.error(f"User state flush failed: {e}")
+
+    def close(self):
+        """Flush pending states and stop the background thread."""
+        self._closed = True
+        self._wakeup.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        self.flush()
+        self._conn.close()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'cached': len(self._cache),
+                'dirty': len(self._dirty),
+                'flushes': self.flushes,
+            }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """The process-wide store, opened on first use and flushed at exit."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = UserStateStore()
+                atexit.register(_store.close)
+    return _store
+
+
+def get_user_state(user_id):
+    return get_store().get(user_id)
+
+
+def save_user_state(user_id, state):
+    get_store().save(user_id, state)
@@ -1,90 +1,154 @@
+from rule_ids import (COMBINATION_RULES, describe_combination,
+                      SKIP_BRACKETED_PRONOUN, KEEP_R_BEFORE_VOWEL, DROP_N_BEFORE_M, JOIN_SAME_LETTER,
+                      JOIN_A_VOWEL, KEEP_EU_BEFORE_VOWEL, DROP_U_BEFORE_VOWEL, S_BETWEEN_VOWELS,
+                      JOIN_M_VOWEL, DROP_IA_BEFORE_I, DROP_I_BEFORE_E, ACUTE_A_TO_A, USE_E_ACUTE,
+                      YN_M_TO_YM, GA_TO_GUI, CA_TO_KI, DROP_A_BEFORE_IE, JOIN_VOWELS)
 
-def apply_combinations(word1, word2, punct1, punct2):
-    """Apply combination rules to two adjacent words."""
+
+def combine_pair(word1, word2, punct1):
+    """
+    Apply combination rules to two adjacent words.
+
+    Returns (combined, rule_id), or (None, None) if no rule applies.
+    """
     # Only try to combine if both tokens are words (no punctuation)
     if not word1 or not word2 or punct1:
         return None, None
-        
+
     vowels = 'aeiouáéíóúâêîô úãẽĩõũy'
     combined = None
-    rule_explanation = None
+    rule = None
     
     # Skip bracketed pronouns
     if word1 in ["[eu]", "[nós]"]:
-        combined = word2
-        rule_explanation = f"Skip bracketed pronoun: {word1} {word2} → {combined}"
-        return combined, rule_explanation
+        return word2, SKIP_BRACKETED_PRONOUN
 
     # Rules for combining words
     if word1[-1] == 'r' and word2[0] in vowels:
         combined = word1 + word2
-        rule_explanation = f"{word1} + {word2} → {combined} (Keep 'r' when joining with vowel)"
+        rule = KEEP_R_BEFORE_VOWEL
     
     elif word1.endswith('n') and word2.startswith('m'):
         combined = word1[:-1] + word2
-        rule_explanation = f"{word1} + {word2} → {combined} (Drop 'n' before 'm')"
+        rule = DROP_N_BEFORE_M
     
     elif word1[-1].lower() == word2[0].lower():
         combined = word1[:-1] + word2
-        rule_explanation = f"{word1} + {word2} → {combined} (Join same letter/sound)"
+        rule = JOIN_SAME_LETTER
     
     elif word1[-1] == 'a' and word2[0] in vowels:
         combined = word1[:-1] + word2
-        rule_explanation = f"{word1} + {word2} → {combined} (Join 'a' with following vowel)"
+        rule = JOIN_A_VOWEL
     
     elif word1[-1] == 'u' and word2[0] in vowels:
         if word1.endswith(('eu', 'êu')):
             combined = word1 + word2
-            rule_explanation = f"{word1} + {word2} → {combined} (Keep 'eu/êu' before vowel)"
+            rule = KEEP_EU_BEFORE_VOWEL
         else:
             combined = word1[:-1] + word2
-            rule_explanation = f"{word1} + {word2} → {combined} (Drop 'u' before vowel)"
+            rule = DROP_U_BEFORE_VOWEL
     
     elif word1[-1] in 'sz' and word2[0] in vowels:
         combined = word1[:-1] + 'z' + word2
-        rule_explanation = f"{word1} + {word2} → {combined} ('s' between vowels becomes 'z')"
+        rule = S_BETWEEN_VOWELS
     
     elif word1[-1] == 'm' and word2[0] in vowels:
         combined = word1 + word2
-        rule_explanation = f"{word1} + {word2} → {combined} (Join 'm' with following vowel)"
+        rule = JOIN_M_VOWEL
     
     elif word1.endswith('ia') and word2.startswith('i'):
         combined = word1[:-2] + word2
-        rule_explanation = f"{word1} + {word2} → {combined} (Drop 'ia' before 'i')"
+        rule = DROP_IA_BEFORE_I
     
     elif word1.endswith('i') and word2[0] in 'eéê':
         combined = word1[:-1] + word2
-        rule_explanation = f"{word1} + {word2} → {combined} (Drop 'i' before e/é/ê)"
+        rule = DROP_I_BEFORE_E
     
     elif word1.endswith('á') and word2.startswith('a'):
         combined = word1[:-1] + word2
-        rule_explanation = f"{word1} + {word2} → {combined} (Convert 'á' to 'a')"
+        rule = ACUTE_A_TO_A
     
     elif word1.endswith('ê') and word2.startswith('é'):
         combined = word1[:-1] + word2
-        rule_explanation = f"{word1} + {word2} → {combined} (Use é)"
+        rule = USE_E_ACUTE
     
     elif word1.endswith('yn') and word2.startswith('m'):
         combined = word1[:-2] + 'y' + word2
-        rule_explanation = f"{word1} + {word2} → {combined} (yn + m → ym)"
+        rule = YN_M_TO_YM
     
     elif word1.endswith(('a', 'ã')) and word2[0] in 'ie':
         if word1.endswith('ga'):
             combined = word1[:-2] + 'gu' + word2
-            rule_explanation = f"{word1} + {word2} → {combined} (ga + i/e → gui/gue)"
+            rule = GA_TO_GUI
         elif word1.endswith('ca'):
             combined = word1[:-2] + 'k' + word2
-            rule_explanation = f"{word1} + {word2} → {combined} (ca + i/e → ki/ke)"
+            rule = CA_TO_KI
         else:
             combined = word1[:-1] + word2
-            rule_explanation = f"{word1} + {word2} → {combined} (Drop 'a' before i/e)"
+            rule = DROP_A_BEFORE_IE
     
     elif word1[-1] in vowels and word2[0] in vowels:
         combined = word1 + word2
-        rule_explanation = f"{word1} + {word2} → {combined} (Join vowels)"
+        rule = JOIN_VOWELS
     
     elif word1[-1].lower() == word2[0].lower():
         combined = word1[:-1] + word2
-        rule_explanation = f"{word1} + {word2} → {combined} (Join same letter/sound)"
+        rule = JOIN_SAME_LETTER
     
-    return combined, rule_explanation
+    if combined is None:
+        return None, None
+    return combined, rule
+
+
+def apply_combinations(word1, word2, punct1, punct2, explain=True):
+    """
+    Apply combination rules to two adjacent words.
+
+    Returns (combined, rule_explanation), or (None, None) if no rule applies.
+    With explain=False the explanation is only the rule's short description,
+    so no per-call string is built.
+    """
+    combined, rule_id = combine_pair(word1, word2, punct1)
+    if combined is None:
+        return None, None
+    if not explain:
+        return combined, COMBINATION_RULES[rule_id]
+    return combined, describe_combination(word1, word2, combined, rule_id)
+
+
+def combine_tokens(tokens, events=None):
+    """
+    Apply combination rules to a list of tokens (objects with word, punct
+    and end attributes, see portuguese_converter.Token) until no adjacent
+    pair combines any more. Compacts `tokens` in place and returns it.
+
+    Equivalent to repeatedly merging the leftmost combinable pair, but done
+    in a single left-to-right pass: the combined prefix tokens[:size] is a
+    stack that never holds a combinable pair, so after a merge only the new
+    token's left neighbour needs to be checked again. A merge keeps the
+    left token, with the combined word, the right token's punctuation and
+    a span reaching the right token's end.
+
+    If `events` is a list, one (token_index, rule_id) pair is appended to it
+    per merge, in merge order, where token_index is the position in `tokens`
+    of the token that was merged into its left neighbour (see
+    portuguese_converter.render_events).
+    """
+    size = 0
+    for index, token in enumerate(tokens):
+        while size:
+            left = tokens[size - 1]
+            combined, rule_id = combine_pair(left.word, token.word, left.punct)
+            if combined is None:
+                break
+            if events is not None:
+                events.append((index, rule_id))
+            left.word = combined
+            left.punct = token.punct
+            left.end = token.end
+            token = left
+            size -= 1
+        tokens[size] = token
+        size += 1
+    del tokens[size:]
+    return tokens